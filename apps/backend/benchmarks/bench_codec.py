@@ -0,0 +1,122 @@
+"""
+Payload size and throughput of the wire codecs for one historicalData event.
+
+Fills a tick ring buffer with ``--points`` synthetic ticks and, for each
+codec in ``wire_codec``, times the server side (records/columns plus the
+Socket.IO packet encode) and the client side (packet decode plus turning
+the data back into usable values), and reports the bytes on the wire.
+msgpack is skipped when the package is not installed.
+
+Usage (from apps/backend):
+    python benchmarks/bench_codec.py
+    python benchmarks/bench_codec.py --points 50000 --repeat 5 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from socketio import packet
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wire_codec  # noqa: E402
+from tick_store import TICK_DTYPE, tick_buffer  # noqa: E402
+
+SYMBOL = 'NSE:SBIN-EQ'
+
+
+def make_history(points):
+    rng = np.random.default_rng(7)
+    rows = np.zeros(points, dtype=TICK_DTYPE)
+    rows['timestamp'] = 1749443100 + np.arange(points)
+    rows['ltp'] = np.round(800 * np.exp(np.cumsum(rng.normal(0, 2e-4, points))), 2)
+    rows['volume'] = np.cumsum(rng.integers(1, 500, points))
+    rows['bid'] = rows['ltp'] - 0.05
+    rows['ask'] = rows['ltp'] + 0.05
+    rows['open'] = rows['close'] = 800.0
+    rows['change'] = np.round(rows['ltp'] - 800.0, 2)
+    rows['changePercent'] = np.round(rows['change'] / 8.0, 2)
+    rows['high'] = np.maximum.accumulate(rows['ltp'])
+    rows['low'] = np.minimum.accumulate(rows['ltp'])
+    buffer = tick_buffer(points)
+    buffer.extend(rows)
+    return buffer
+
+
+def encode(buffer, codec):
+    encoding, data = wire_codec.pack_rows(buffer, buffer.view(), codec, symbol=SYMBOL)
+    event = {'symbol': SYMBOL, 'data': data}
+    if encoding != 'json':
+        event['encoding'] = encoding
+    encoded = packet.Packet(packet.EVENT, data=['historicalData', event], namespace='/').encode()
+    return encoded if isinstance(encoded, list) else [encoded]
+
+
+def decode(parts, codec):
+    pkt = packet.Packet(encoded_packet=parts[0])
+    for attachment in parts[1:]:
+        pkt.add_attachment(attachment)
+    data = pkt.data[1]['data']
+    if codec == 'msgpack':
+        return wire_codec.msgpack.unpackb(data)
+    if codec == 'binary':
+        return {name: np.frombuffer(column, dtype=wire_codec.COLUMN_DTYPE) for name, column in data['columns'].items()}
+    return data
+
+
+def wire_bytes(parts):
+    return sum(len(part.encode('utf-8')) if isinstance(part, str) else len(part) for part in parts)
+
+
+def measure(buffer, codec, repeat):
+    encode_s, decode_s = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parts = encode(buffer, codec)
+        encode_s.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        decode(parts, codec)
+        decode_s.append(time.perf_counter() - started)
+    points = len(buffer)
+    encode_best, decode_best = min(encode_s), min(decode_s)
+    return {
+        'codec': codec,
+        'points': points,
+        'bytes': wire_bytes(parts),
+        'attachments': len(parts) - 1,
+        'encode_ms': round(encode_best * 1e3, 2),
+        'decode_ms': round(decode_best * 1e3, 2),
+        'encode_points_per_s': round(points / encode_best),
+        'decode_points_per_s': round(points / decode_best),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='historicalData payload size and codec throughput.')
+    parser.add_argument('--points', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    buffer = make_history(args.points)
+    results = [measure(buffer, codec, args.repeat) for codec in wire_codec.available()]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    missing = [codec for codec in wire_codec.CODECS if codec not in wire_codec.available()]
+    print(f"historicalData, {args.points} ticks (best of {args.repeat})")
+    print(f"{'codec':>8} {'bytes':>12} {'vs json':>8} {'encode ms':>10} {'decode ms':>10} {'enc pts/s':>12}")
+    baseline = results[0]['bytes']
+    for r in results:
+        print(f"{r['codec']:>8} {r['bytes']:>12,} {r['bytes'] / baseline:>7.2f}x {r['encode_ms']:>10} "
+              f"{r['decode_ms']:>10} {r['encode_points_per_s']:>12,}")
+    if missing:
+        print(f"(not installed: {', '.join(missing)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+"""
+End-to-end tick -> client latency benchmark for the live Socket.IO servers.
+
+Starts a server on the fake Fyers feed (``fake_fyers.py``), connects a swarm
+of Socket.IO clients that subscribe to symbols, and reports:
+
+- tick -> client latency p50/p90/p99/max, measured against the feed's
+  ``last_traded_time`` (same host, same clock)
+- server CPU and RSS, sampled from /proc (or psutil when installed)
+- server event-loop lag (fyers_new_5001 only, from ``get_trading_status``)
+  and client-side loop lag
+- Socket.IO frames received per second and JSON bytes per quote update
+  (a ``chartUpdate``'s bytes count towards its quote update); with ``--batch`` (fyers_new_5001 only)
+  clients opt in to columnar ``marketBatch`` frames, and events/s still
+  counts symbol updates (batch rows); with ``--delta`` they opt in to
+  delta-encoded ``quoteDelta`` messages, and sequence gaps are counted
+- with ``--stalled N``, N extra long-polling clients subscribe and then
+  never poll again; the swarm's numbers show whether they hold anyone
+  else back, and the server's outbound report (fyers_new_5001 only) how
+  far behind they are
+
+The server runs in a scratch directory under /tmp that is removed after
+the run, unless ``--keep`` is given or the run fails (its ``server.log``
+then says why).
+
+Usage (from apps/backend):
+    python benchmarks/bench_e2e.py --server fyers_new_5001 --symbols 50 --rate 2000 --clients 20
+    python benchmarks/bench_e2e.py --server fyers_new_5001 --symbols 60 --clients 20 --batch
+    python benchmarks/bench_e2e.py --server fyers_new_5001 --symbols 20 --clients 5 --delta
+    python benchmarks/bench_e2e.py --server fyers_new_5001 --symbols 20 --clients 5 --stalled 3
+    python benchmarks/bench_e2e.py --server fyers_service_5010 --symbols 6 --clients 10 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+import socketio
+from engineio import payload
+
+# The Python client refuses long-polling responses of more than 16 packets
+# (browsers have no such cap); a server flushing a burst of room broadcasts
+# legitimately queues more than that between two polls.
+payload.Payload.max_decode_packets = 4096
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+SERVERS = {
+    'fyers_new_5001': {'port': 5001, 'subscribe': 'subscribe_companies', 'key': 'symbols',
+                       'event': 'marketDataUpdate', 'max_symbols': None, 'modes': {'batch': 'set_batch_mode', 'delta': 'set_delta_mode'}},
+    'fyers_service_5010': {'port': 5010, 'subscribe': 'subscribe_companies', 'key': 'companyCodes',
+                           'event': 'marketData', 'max_symbols': 6},
+}
+
+
+def bench_symbols(count):
+    return [f"NSE:BENCH{i:03d}-EQ" for i in range(count)]
+
+
+class ProcessSampler:
+    """CPU% and RSS of one process from /proc, or psutil when available."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf('SC_CLK_TCK')
+        self.page = os.sysconf('SC_PAGE_SIZE')
+        self.cpu = []
+        self.rss = []
+        self._last = None
+        try:
+            import psutil
+            self._proc = psutil.Process(pid)
+        except ImportError:
+            self._proc = None
+
+    def _read(self):
+        if self._proc is not None:
+            times = self._proc.cpu_times()
+            return times.user + times.system, self._proc.memory_info().rss
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f"/proc/{self.pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        return (int(fields[11]) + int(fields[12])) / self.ticks, rss_pages * self.page
+
+    def sample(self):
+        try:
+            cpu_seconds, rss = self._read()
+        except (OSError, IndexError):
+            return
+        now = time.monotonic()
+        if self._last is not None:
+            wall = now - self._last[0]
+            self.cpu.append(100.0 * (cpu_seconds - self._last[1]) / max(wall, 1e-9))
+        self._last = (now, cpu_seconds)
+        self.rss.append(rss)
+
+
+def percentiles(values):
+    if not values:
+        return {'count': 0}
+    arr = np.asarray(values) * 1000.0
+    p50, p90, p99 = np.percentile(arr, [50, 90, 99])
+    return {'count': len(values), 'p50_ms': round(float(p50), 2), 'p90_ms': round(float(p90), 2),
+            'p99_ms': round(float(p99), 2), 'max_ms': round(float(arr.max()), 2)}
+
+
+def start_server(name, rate, workdir, log_path):
+    env = dict(os.environ, BENCH_TICK_RATE=str(rate), PYTHONUNBUFFERED='1')
+    with open(log_path, 'w') as log:
+        return subprocess.Popen(
+            [sys.executable, os.path.join(BENCH_DIR, 'fake_fyers.py'), f"{name}.py", workdir],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+
+async def wait_for_port(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return True
+        except OSError:
+            await asyncio.sleep(0.2)
+    return False
+
+
+class Swarm:
+    def __init__(self, config, url, clients, symbols, per_client, transport='websocket', mode=None):
+        self.config = config
+        self.transport = transport
+        self.mode = mode
+        self.url = url
+        self.symbols = symbols
+        self.clients = clients
+        self.per_client = per_client
+        self.latencies = []
+        self.events = 0
+        self.frames = 0
+        self.bytes = 0
+        self.gaps = 0
+        self.recording = False
+        self.sockets = []
+
+    def _on_update(self, payload):
+        if not self.recording:
+            return
+        self.events += 1
+        self.frames += 1
+        self.bytes += len(json.dumps(payload))
+        sent = payload.get('timestamp') if isinstance(payload, dict) else None
+        if sent:
+            self.latencies.append(time.time() - sent)
+
+    def _on_chart(self, payload):
+        if self.recording:
+            self.bytes += len(json.dumps(payload))
+
+    def _on_batch(self, payload):
+        if not self.recording:
+            return
+        self.frames += 1
+        self.events += len(payload['symbols'])
+        self.bytes += len(json.dumps(payload))
+        now = time.time()
+        self.latencies.extend(now - sent for sent in payload['timestamp'] if sent)
+
+    def _on_delta(self, last_seq, message):
+        # Sequence numbers are checked even outside the recording window.
+        if last_seq[0] is not None and message['seq'] != last_seq[0] + 1:
+            self.gaps += 1
+        last_seq[0] = message['seq']
+        if not self.recording:
+            return
+        self.events += 1
+        self.frames += 1
+        self.bytes += len(json.dumps(message))
+        sent = message['data'].get('timestamp')
+        if sent:
+            self.latencies.append(time.time() - sent)
+
+    async def connect(self):
+        for i in range(self.clients):
+            client = socketio.AsyncClient(reconnection=False)
+            client.on(self.config['event'], self._on_update)
+            client.on('chartUpdate', self._on_chart)
+            client.on('marketBatch', self._on_batch)
+            client.on('quoteDelta', lambda message, last_seq=[None]: self._on_delta(last_seq, message))
+            await client.connect(self.url, transports=[self.transport])
+            self.sockets.append(client)
+            if self.mode:
+                await client.call(self.config['modes'][self.mode], {'enabled': True}, timeout=10)
+
+            start = (i * self.per_client) % len(self.symbols)
+            wanted = [self.symbols[(start + j) % len(self.symbols)] for j in range(self.per_client)]
+            if self.config['key'] == 'companyCodes':
+                wanted = [s.split(':')[1].split('-')[0] for s in wanted]
+            await client.call(self.config['subscribe'], {self.config['key']: wanted}, timeout=60)
+
+    async def trading_status(self):
+        if not self.sockets:
+            return None
+        try:
+            return await self.sockets[0].call('get_trading_status', {}, timeout=5)
+        except Exception:
+            return None
+
+    async def close(self):
+        # A polling client waits out its in-flight long-poll (up to the ping
+        # timeout) after sending close; the server has already dropped it.
+        for client in self.sockets:
+            try:
+                await asyncio.wait_for(client.disconnect(), 5)
+            except Exception:
+                pass
+
+
+class StalledClient:
+    """Engine.IO long-polling client that subscribes and then stops polling."""
+
+    def __init__(self, config, url):
+        self.config = config
+        self.base = f"{url}/socket.io/?EIO=4&transport=polling"
+
+    def _http(self, url, body=None):
+        request = urllib.request.Request(url, data=body.encode() if body else None,
+                                         headers={'Content-Type': 'text/plain;charset=UTF-8'})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.read().decode()
+
+    def _stall(self, symbols):
+        handshake = self._http(self.base)
+        url = f"{self.base}&sid={json.loads(handshake[1:])['sid']}"
+        self._http(url, '40')
+        self._http(url)  # namespace connect ack
+        self._http(url, '42' + json.dumps([self.config['subscribe'], {self.config['key']: symbols}]))
+
+    async def connect(self, symbols):
+        await asyncio.get_running_loop().run_in_executor(None, self._stall, symbols)
+
+
+async def client_loop_lag(samples, interval=0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def run(args):
+    config = SERVERS[args.server]
+    mode = 'batch' if args.batch else 'delta' if args.delta else None
+    if mode and mode not in config.get('modes', {}):
+        raise SystemExit(f"{args.server} has no {mode} mode")
+    symbols = bench_symbols(args.symbols)
+    per_client = min(args.per_client or len(symbols), config['max_symbols'] or len(symbols))
+
+    workdir = tempfile.mkdtemp(prefix='fyers-bench-')
+    log_path = os.path.join(workdir, 'server.log')
+    server = start_server(args.server, args.rate, workdir, log_path)
+    sampler = ProcessSampler(server.pid)
+    swarm = Swarm(config, f"http://127.0.0.1:{config['port']}", args.clients, symbols, per_client,
+                  args.transport, mode)
+    client_lag = []
+    server_lag_max = None
+    outbound = None
+    lag_task = None
+    keep = args.keep
+
+    try:
+        if not await wait_for_port(config['port'], args.startup_timeout):
+            raise RuntimeError(f"{args.server} did not start; see {log_path}")
+        await swarm.connect()
+        for _ in range(args.stalled):
+            await StalledClient(config, swarm.url).connect(symbols[:per_client])
+        lag_task = asyncio.create_task(client_loop_lag(client_lag))
+
+        await asyncio.sleep(args.warmup)
+        swarm.recording = True
+        client_lag.clear()
+        started = time.monotonic()
+        sampler.sample()
+        while time.monotonic() - started < args.duration:
+            await asyncio.sleep(1.0)
+            sampler.sample()
+        swarm.recording = False
+        elapsed = time.monotonic() - started
+
+        status = await swarm.trading_status()
+        if isinstance(status, dict) and 'loop_lag' in status:
+            server_lag_max = status['loop_lag'].get('max_ms')
+        if isinstance(status, dict) and 'outbound' in status:
+            outbound = status['outbound']
+    except BaseException:
+        keep = True
+        raise
+    finally:
+        if lag_task:
+            lag_task.cancel()
+        await swarm.close()
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+        if keep:
+            print(f"Server log kept in {log_path}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'server': args.server,
+        'symbols': len(symbols),
+        'feed_rate': args.rate,
+        'clients': args.clients,
+        'symbols_per_client': per_client,
+        'duration_s': round(elapsed, 1),
+        'mode': mode,
+        'events_per_s': round(swarm.events / max(elapsed, 1e-9), 1),
+        'frames_per_s': round(swarm.frames / max(elapsed, 1e-9), 1),
+        'bytes_per_update': round(swarm.bytes / swarm.events, 1) if swarm.events else None,
+        'sequence_gaps': swarm.gaps if mode == 'delta' else None,
+        'latency': percentiles(swarm.latencies),
+        'server_cpu_pct': round(float(np.mean(sampler.cpu)), 1) if sampler.cpu else None,
+        'server_rss_mb': round(max(sampler.rss) / 2 ** 20, 1) if sampler.rss else None,
+        'server_loop_lag_max_ms': server_lag_max,
+        'stalled_clients': args.stalled,
+        'outbound': outbound,
+        'client_loop_lag': percentiles(client_lag),
+        'server_log': log_path if keep else None,
+    }
+
+
+def print_report(result):
+    latency = result['latency']
+    mode = f" ({result['mode']} mode)" if result['mode'] else ''
+    print(f"{result['server']}: {result['symbols']} symbols @ {result['feed_rate']:.0f} ticks/s, "
+          f"{result['clients']} clients x {result['symbols_per_client']} symbols, {result['duration_s']}s"
+          f"{mode}")
+    print(f"  events/s          {result['events_per_s']}")
+    print(f"  frames/s          {result['frames_per_s']}")
+    print(f"  bytes/update      {result['bytes_per_update']}")
+    if result['sequence_gaps'] is not None:
+        print(f"  sequence gaps     {result['sequence_gaps']}")
+    if latency['count']:
+        print(f"  tick->client      p50 {latency['p50_ms']} ms  p90 {latency['p90_ms']} ms  "
+              f"p99 {latency['p99_ms']} ms  max {latency['max_ms']} ms  (n={latency['count']})")
+    else:
+        print("  tick->client      no updates received")
+    print(f"  server CPU        {result['server_cpu_pct']}%")
+    print(f"  server RSS        {result['server_rss_mb']} MB")
+    print(f"  server loop lag   {result['server_loop_lag_max_ms'] if result['server_loop_lag_max_ms'] is not None else 'n/a'} ms max")
+    outbound = result['outbound']
+    if outbound:
+        worst = outbound['clients'][0] if outbound['clients'] else {}
+        print(f"  outbound          {outbound['lagging']} lagging, worst backlog {worst.get('backlog', 0)} packets, "
+              f"{worst.get('pending', 0)} pending, {worst.get('conflated', 0)} conflated")
+    client_lag = result['client_loop_lag']
+    if client_lag['count']:
+        print(f"  client loop lag   p99 {client_lag['p99_ms']} ms  max {client_lag['max_ms']} ms")
+    if result['server_log']:
+        print(f"  server log        {result['server_log']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tick -> client latency benchmark on a fake Fyers feed.')
+    parser.add_argument('--server', choices=sorted(SERVERS), default='fyers_new_5001')
+    parser.add_argument('--symbols', type=int, default=50, help='Symbols in the synthetic feed (N)')
+    parser.add_argument('--rate', type=float, default=1000, help='Total feed ticks per second (R)')
+    parser.add_argument('--clients', type=int, default=10, help='Socket.IO clients (M)')
+    parser.add_argument('--per-client', type=int, default=None, help='Symbols per client (default: all)')
+    parser.add_argument('--warmup', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    parser.add_argument('--stalled', type=int, default=0, help='Extra clients that subscribe and never read')
+    parser.add_argument('--transport', choices=['websocket', 'polling'], default='websocket')
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--batch', action='store_true', help='Clients opt in to marketBatch frames')
+    modes.add_argument('--delta', action='store_true', help='Clients opt in to quoteDelta messages')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    parser.add_argument('--keep', action='store_true', help="Keep the server's scratch directory and log")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == '__main__':
+    main()
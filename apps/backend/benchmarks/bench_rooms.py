@@ -0,0 +1,116 @@
+"""
+Serialization cost of one quote update versus the number of viewers.
+
+Compares the old fan-out (one ``sio.emit(..., room=sid)`` per viewer) with
+a single broadcast to a per-symbol room, on an in-process
+``socketio.AsyncServer`` whose transport is replaced by a no-op, so only
+packet building and encoding is measured. Reports packet encodes and
+microseconds per update for each viewer count.
+
+Usage (from apps/backend):
+    python benchmarks/bench_rooms.py
+    python benchmarks/bench_rooms.py --viewers 1 10 100 1000 --updates 200 --json
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import socketio
+from socketio import packet
+
+
+def sample_payload(i):
+    return {
+        'symbol': 'NSE:SBIN-EQ', 'ltp': 812.35 + i * 0.05, 'change': 4.1, 'changePercent': 0.51,
+        'volume': 1234567 + i, 'open': 808.0, 'high': 815.2, 'low': 806.75, 'close': 808.25,
+        'bid': 812.3, 'ask': 812.4, 'timestamp': 1749540000 + i, 'tradedVolume': 120,
+        'tradedValue': 97482.0, 'sma_20': 811.9, 'ema_9': 812.1, 'rsi_14': 57.3,
+        'bb_upper': 814.2, 'bb_lower': 809.6, 'min_20': 809.9, 'max_20': 814.0,
+        'vwap': 811.2, 'dollarVolume': 1.0e9,
+    }
+
+
+class EncodeCounter:
+    """Counts Socket.IO packet encodes by wrapping ``Packet.encode``."""
+
+    def __init__(self):
+        self.count = 0
+        self._original = packet.Packet.encode
+
+    def __enter__(self):
+        counter = self
+
+        def encode(pkt):
+            counter.count += 1
+            return counter._original(pkt)
+
+        packet.Packet.encode = encode
+        return self
+
+    def __exit__(self, *exc):
+        packet.Packet.encode = self._original
+
+
+async def make_server(viewers, room):
+    sio = socketio.AsyncServer(async_mode='asgi')
+
+    async def send(eio_sid, pkt):
+        return None
+
+    sio._send_eio_packet = send
+    sids = []
+    for i in range(viewers):
+        sid = await sio.manager.connect(f"eio-{i}", '/')
+        await sio.enter_room(sid, room)
+        sids.append(sid)
+    return sio, sids
+
+
+async def measure(viewers, updates, mode):
+    room = 'quote:NSE:SBIN-EQ'
+    sio, sids = await make_server(viewers, room)
+    with EncodeCounter() as counter:
+        started = time.perf_counter()
+        for i in range(updates):
+            payload = sample_payload(i)
+            if mode == 'per_client':
+                for sid in sids:
+                    await sio.emit('marketDataUpdate', payload, room=sid)
+            else:
+                await sio.emit('marketDataUpdate', payload, room=room)
+        elapsed = time.perf_counter() - started
+    return {
+        'mode': mode,
+        'viewers': viewers,
+        'encodes_per_update': counter.count / updates,
+        'us_per_update': round(elapsed / updates * 1e6, 1),
+    }
+
+
+async def run(args):
+    results = []
+    for viewers in args.viewers:
+        for mode in ('per_client', 'room'):
+            results.append(await measure(viewers, args.updates, mode))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-viewer vs per-room Socket.IO serialization cost.')
+    parser.add_argument('--viewers', type=int, nargs='+', default=[1, 10, 100, 500])
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'viewers':>8} {'mode':>11} {'encodes/update':>15} {'us/update':>10}")
+    for r in results:
+        print(f"{r['viewers']:>8} {r['mode']:>11} {r['encodes_per_update']:>15.0f} {r['us_per_update']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Memory/latency comparison: deque-of-dicts vs. the NumPy ring buffer store.
+
+Usage:
+    python benchmarks/bench_tick_store.py --symbols 300 --points 50000 --sample 5
+
+Building 300 x 50k Python dicts needs well over 10 GB, so by default only
+``--sample`` symbols are materialised per layout and the totals are
+extrapolated linearly (every symbol holds the same number of points).
+Pass ``--sample`` equal to ``--symbols`` to measure the full universe.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tick_store import tick_buffer  # noqa: E402
+
+
+def make_tick(symbol, i):
+    price = 100.0 + (i % 500) * 0.05
+    return {
+        'symbol': symbol,
+        'ltp': price,
+        'change': price - 100.0,
+        'changePercent': (price - 100.0),
+        'volume': 1000 + i,
+        'open': 100.0,
+        'high': 125.0,
+        'low': 99.5,
+        'close': 100.2,
+        'bid': price - 0.05,
+        'ask': price + 0.05,
+        'timestamp': 1749443100 + i,
+    }
+
+
+def build_deques(symbols, points):
+    store = {}
+    for symbol in symbols:
+        d = deque(maxlen=points)
+        for i in range(points):
+            d.append(make_tick(symbol, i))
+        store[symbol] = d
+    return store
+
+
+def build_ring_buffers(symbols, points):
+    store = {}
+    for symbol in symbols:
+        buf = tick_buffer(points)
+        for i in range(points):
+            buf.append_dict(make_tick(symbol, i))
+        store[symbol] = buf
+    return store
+
+
+def measure(builder, symbols, points):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = builder(symbols, points)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, current, elapsed
+
+
+def time_it(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare tick storage layouts.')
+    parser.add_argument('--symbols', type=int, default=300, help='Symbols in the universe')
+    parser.add_argument('--points', type=int, default=50000, help='Points retained per symbol')
+    parser.add_argument('--sample', type=int, default=5, help='Symbols actually materialised')
+    args = parser.parse_args()
+
+    sample = min(args.sample, args.symbols)
+    symbols = [f"NSE:SYM{i:04d}-EQ" for i in range(sample)]
+    scale = args.symbols / sample
+
+    deques, deque_bytes, deque_build = measure(build_deques, symbols, args.points)
+    first = symbols[0]
+    deque_copy = time_it(lambda: list(deques[first]))
+    last_ts = deques[first][-1]['timestamp']
+    deque_range = time_it(lambda: [p for p in deques[first] if p['timestamp'] >= last_ts - 300])
+    del deques
+    gc.collect()
+
+    rings, ring_bytes, ring_build = measure(build_ring_buffers, symbols, args.points)
+    ring_view = time_it(lambda: rings[first].view())
+    ring_range = time_it(lambda: rings[first].since(last_ts - 300))
+    ring_records = time_it(lambda: rings[first].to_records(symbol=first), repeat=3)
+
+    mb = 1024 * 1024
+    print(f"Universe: {args.symbols} symbols x {args.points} points "
+          f"(measured {sample}, scaled x{scale:.1f})")
+    print(f"{'layout':<22}{'measured MB':>14}{'projected MB':>15}{'build s':>10}")
+    print(f"{'deque of dicts':<22}{deque_bytes / mb:>14.1f}{deque_bytes * scale / mb:>15.1f}{deque_build:>10.2f}")
+    print(f"{'numpy ring buffer':<22}{ring_bytes / mb:>14.1f}{ring_bytes * scale / mb:>15.1f}{ring_build:>10.2f}")
+    print(f"Memory ratio: {deque_bytes / max(ring_bytes, 1):.1f}x smaller")
+    print()
+    print("Per-symbol query cost (best of N):")
+    print(f"  list(deque) full copy        {deque_copy * 1e3:9.3f} ms")
+    print(f"  ring.view() zero-copy        {ring_view * 1e3:9.3f} ms")
+    print(f"  deque scan, last 5 minutes   {deque_range * 1e3:9.3f} ms")
+    print(f"  ring.since(), last 5 minutes {ring_range * 1e3:9.3f} ms")
+    print(f"  ring.to_records() full       {ring_records * 1e3:9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
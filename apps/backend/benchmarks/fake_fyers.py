@@ -0,0 +1,192 @@
+"""
+Local stand-in for the Fyers SDK, used to run the live servers without a
+Fyers account or market hours.
+
+``FakeFyersModel`` answers ``get_profile`` and ``history`` with synthetic
+1-minute candles. ``FakeFyersDataSocket`` emits synthetic SymbolUpdate ticks
+for every subscribed symbol at ``BENCH_TICK_RATE`` ticks/sec in total,
+calling ``on_message`` from its own thread like the real socket does.
+``last_traded_time`` carries the float wall-clock send time so clients can
+measure tick-to-client latency.
+
+Run a server on the fake feed (from apps/backend):
+    BENCH_TICK_RATE=2000 python benchmarks/fake_fyers.py fyers_new_5001.py
+"""
+import json
+import os
+import random
+import runpy
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TICK_RATE = float(os.getenv("BENCH_TICK_RATE", "1000"))
+HISTORY_CANDLES = int(os.getenv("BENCH_HISTORY_CANDLES", "375"))
+TICK_INTERVAL = 0.01
+
+
+class FakeFyersModel:
+    def __init__(self, client_id=None, token=None, log_path=None, **kwargs):
+        self.client_id = client_id
+
+    def get_profile(self):
+        return {'s': 'ok', 'data': {'name': 'Benchmark'}}
+
+    def history(self, data):
+        now = int(time.time()) // 60 * 60
+        price = 100.0 + random.random() * 900
+        candles = []
+        for i in range(HISTORY_CANDLES):
+            open_price = price
+            price = max(1.0, price * (1 + random.gauss(0, 0.001)))
+            candles.append([
+                now - (HISTORY_CANDLES - i) * 60,
+                round(open_price, 2),
+                round(max(open_price, price) * 1.001, 2),
+                round(min(open_price, price) * 0.999, 2),
+                round(price, 2),
+                random.randint(100, 10000)
+            ])
+        return {'s': 'ok', 'candles': candles}
+
+
+class FakeFyersDataSocket:
+    """Synthetic tick generator with the FyersDataSocket callback interface."""
+
+    _active = None
+
+    def __init__(self, access_token=None, on_connect=None, on_close=None, on_error=None,
+                 on_message=None, **kwargs):
+        self.on_connect = on_connect
+        self.on_close = on_close
+        self.on_message = on_message
+        self.rate = TICK_RATE
+        self._symbols = []
+        self._state = {}
+        self._lock = threading.Lock()
+        self._running = False
+
+    def connect(self):
+        # The servers re-create the socket when the auth file is re-read; keep one feed.
+        previous = FakeFyersDataSocket._active
+        if previous is not None and previous is not self:
+            with previous._lock:
+                self._symbols = list(previous._symbols)
+            previous.close_connection()
+        FakeFyersDataSocket._active = self
+
+        self._running = True
+        threading.Thread(target=self._run, name="FakeFyersFeed", daemon=True).start()
+        if self.on_connect:
+            self.on_connect()
+
+    def close_connection(self):
+        self._running = False
+
+    def subscribe(self, symbols, data_type="SymbolUpdate"):
+        with self._lock:
+            for symbol in symbols:
+                if symbol not in self._symbols:
+                    self._symbols.append(symbol)
+
+    def unsubscribe(self, symbols, data_type="SymbolUpdate"):
+        with self._lock:
+            self._symbols = [s for s in self._symbols if s not in symbols]
+
+    def keep_running(self):
+        while self._running:
+            time.sleep(1)
+
+    def _tick(self, symbol):
+        state = self._state.get(symbol)
+        if state is None:
+            prev_close = 100.0 + random.random() * 900
+            state = {'prev_close': prev_close, 'ltp': prev_close, 'high': prev_close,
+                     'low': prev_close, 'open': prev_close, 'volume': 0}
+            self._state[symbol] = state
+
+        state['ltp'] = round(max(1.0, state['ltp'] * (1 + random.gauss(0, 0.0005))), 2)
+        state['high'] = max(state['high'], state['ltp'])
+        state['low'] = min(state['low'], state['ltp'])
+        state['volume'] += random.randint(1, 500)
+        change = state['ltp'] - state['prev_close']
+        return {
+            'type': 'sf',
+            'symbol': symbol,
+            'ltp': state['ltp'],
+            'ch': round(change, 2),
+            'chp': round(change / state['prev_close'] * 100, 2),
+            'vol_traded_today': state['volume'],
+            'open_price': state['open'],
+            'high_price': state['high'],
+            'low_price': state['low'],
+            'prev_close_price': state['prev_close'],
+            'bid_price': round(state['ltp'] - 0.05, 2),
+            'ask_price': round(state['ltp'] + 0.05, 2),
+            'last_traded_time': time.time(),
+        }
+
+    def _run(self):
+        next_at = time.monotonic()
+        owed = 0.0
+        cursor = 0
+        while self._running:
+            with self._lock:
+                symbols = list(self._symbols)
+            if symbols:
+                owed += self.rate * TICK_INTERVAL
+                count = int(owed)
+                owed -= count
+                for _ in range(count):
+                    symbol = symbols[cursor % len(symbols)]
+                    cursor += 1
+                    try:
+                        self.on_message(self._tick(symbol))
+                    except Exception as e:
+                        print(f"fake feed: on_message failed: {e}", file=sys.stderr)
+            next_at += TICK_INTERVAL
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+
+def install():
+    """Swap the SDK classes the servers look up at call time for the fakes."""
+    from fyers_apiv3 import fyersModel
+    from fyers_apiv3.FyersWebsocket import data_ws
+    fyersModel.FyersModel = FakeFyersModel
+    data_ws.FyersDataSocket = FakeFyersDataSocket
+
+
+def run_server(script, workdir=None):
+    """
+    Run a server script on the fake feed inside a scratch working directory.
+    A directory created here (no ``workdir`` given) is removed when the
+    server exits; a given one belongs to the caller.
+    """
+    script = os.path.abspath(os.path.join(BACKEND_DIR, script))
+    scratch = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="fyers-bench-")
+    os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+    with open(os.path.join(workdir, 'data', 'fyers_data_auth.json'), 'w') as f:
+        json.dump({'access_token': 'BENCH-100:bench.fake.token', 'client_id': 'BENCH-100'}, f)
+
+    install()
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+    sys.argv = [script]
+    try:
+        runpy.run_path(script, run_name='__main__')
+    finally:
+        if scratch:
+            os.chdir(BACKEND_DIR)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("usage: fake_fyers.py <server script> [workdir]", file=sys.stderr)
+        sys.exit(2)
+    run_server(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
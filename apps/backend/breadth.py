@@ -0,0 +1,94 @@
+"""
+Market-breadth aggregates over every symbol the server tracks.
+
+Each symbol contributes a small tuple of flags (advancing/declining,
+above VWAP, above SMA-20, at its session high/low). The tracker remembers
+the flags it last counted per symbol, so an update only subtracts the old
+flags and adds the new ones: O(1) per tick, never a scan of the universe.
+"""
+
+COUNTERS = (
+    'advancing', 'declining', 'unchanged',
+    'vwap_known', 'above_vwap',
+    'sma_known', 'above_sma',
+    'at_high', 'at_low',
+)
+
+
+def symbol_flags(data):
+    """Breadth flags of one symbol from its latest payload."""
+    ltp = data.get('ltp')
+    change = data.get('change')
+    if change is None:
+        # Some feeds (and recordings) omit 'ch'; 'close' is the previous close.
+        change = ltp - data['close'] if ltp and data.get('close') else 0
+    vwap = data.get('vwap')
+    sma = data.get('sma_20')
+    high = data.get('high')
+    low = data.get('low')
+    return (
+        change > 0,
+        change < 0,
+        change == 0,
+        vwap is not None,
+        vwap is not None and ltp is not None and ltp > vwap,
+        sma is not None,
+        sma is not None and ltp is not None and ltp > sma,
+        bool(ltp) and bool(high) and ltp >= high,
+        bool(ltp) and bool(low) and ltp <= low,
+    )
+
+
+class BreadthTracker:
+    def __init__(self):
+        self._flags = {}
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self.version = 0     # bumped whenever a count changes
+
+    def __len__(self):
+        return len(self._flags)
+
+    def _apply(self, flags, step):
+        for name, flag in zip(COUNTERS, flags):
+            if flag:
+                self._counts[name] += step
+
+    def update(self, symbol, data):
+        flags = symbol_flags(data)
+        old = self._flags.get(symbol)
+        if old == flags:
+            return
+        if old is not None:
+            self._apply(old, -1)
+        self._apply(flags, 1)
+        self._flags[symbol] = flags
+        self.version += 1
+
+    def remove(self, symbol):
+        old = self._flags.pop(symbol, None)
+        if old is not None:
+            self._apply(old, -1)
+            self.version += 1
+
+    def snapshot(self):
+        """The 'breadth' event payload."""
+        counts = self._counts
+        declining = counts['declining']
+        return {
+            'symbols': len(self._flags),
+            'advancing': counts['advancing'],
+            'declining': declining,
+            'unchanged': counts['unchanged'],
+            'advanceDeclineRatio': counts['advancing'] / declining if declining else None,
+            'aboveVwap': counts['above_vwap'],
+            'aboveVwapPercent': _percent(counts['above_vwap'], counts['vwap_known']),
+            'aboveSma20': counts['above_sma'],
+            'aboveSma20Percent': _percent(counts['above_sma'], counts['sma_known']),
+            # Symbols trading at their session high/low right now, not new highs/lows made.
+            'atHigh': counts['at_high'],
+            'atLow': counts['at_low'],
+        }
+
+
+def _percent(part, whole):
+    return part / whole * 100 if whole else None
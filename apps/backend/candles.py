@@ -0,0 +1,251 @@
+"""
+Incremental multi-resolution OHLC candles for live symbols.
+
+Every tick updates the open candle of each resolution in O(1); buckets are
+anchored to the 09:15 IST session open, so 1h candles run 09:15-10:15 and
+the daily candle starts at the open of the trading day. Candles live in
+``tick_store.RingBuffer`` instances and can be served straight from memory.
+
+``CandleRollup.add_tick`` reports what each tick did as bar events: a
+``BAR_CLOSED`` event carries the finished candle when a tick opens a new
+bucket, and a ``BAR_UPDATED`` event always carries the candle in progress.
+
+Live candles add up the quantity traded per tick (see ``session_volume``)
+and its turnover, so every candle carries its own volume and VWAP. Fetched
+bars have no turnover and are valued at their typical price.
+"""
+import numpy as np
+
+from tick_store import OHLC_DTYPE, RingBuffer
+
+
+IST_OFFSET = 5 * 3600 + 30 * 60
+SESSION_OPEN = 9 * 3600 + 15 * 60
+DAY = 86400
+
+RESOLUTIONS = {
+    '1m': 60,
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '30m': 30 * 60,
+    '1h': 60 * 60,
+    '1D': DAY,
+}
+
+# Fyers-style names accepted by get_ohlc as well.
+RESOLUTION_ALIASES = {
+    '1': '1m', '5': '5m', '15': '15m', '30': '30m', '60': '1h', 'D': '1D', '1d': '1D',
+}
+
+DAILY_CAPACITY = 400
+
+BAR_CLOSED = 'closed'
+BAR_UPDATED = 'updated'
+
+
+def normalize_resolution(resolution):
+    """Map a client-supplied resolution to a key of RESOLUTIONS, or ``None``."""
+    resolution = str(resolution)
+    resolution = RESOLUTION_ALIASES.get(resolution, resolution)
+    return resolution if resolution in RESOLUTIONS else None
+
+
+def session_open(timestamp):
+    """Epoch seconds of 09:15 IST on the IST calendar day of ``timestamp``."""
+    return (timestamp + IST_OFFSET) // DAY * DAY - IST_OFFSET + SESSION_OPEN
+
+
+def bucket_starts(timestamps, seconds):
+    """Vectorized ``bucket_start`` for an int64 array of timestamps."""
+    timestamps = np.asarray(timestamps, dtype='i8')
+    open_ts = session_open(timestamps)
+    if seconds >= DAY:
+        return open_ts
+    return open_ts + (timestamps - open_ts) // seconds * seconds
+
+
+def bucket_start(timestamp, seconds):
+    """Start of the session-anchored bucket of width ``seconds`` holding ``timestamp``."""
+    timestamp = int(timestamp)
+    open_ts = session_open(timestamp)
+    if seconds >= DAY:
+        return open_ts
+    return open_ts + (timestamp - open_ts) // seconds * seconds
+
+
+def ohlc_rows(bars):
+    """OHLC rows for an ``(n, 6)`` array of fetched bars, valued at their typical price."""
+    bars = np.asarray(bars, dtype='f8').reshape(-1, 6)
+    rows = np.empty(len(bars), dtype=OHLC_DTYPE)
+    for column, name in enumerate(('timestamp', 'open', 'high', 'low', 'close', 'volume')):
+        rows[name] = bars[:, column]
+    rows['vwap'] = (bars[:, 2] + bars[:, 3] + bars[:, 4]) / 3
+    rows['turnover'] = rows['vwap'] * bars[:, 5]
+    return rows
+
+
+class CandleSeries:
+    """Candles of one resolution for one symbol."""
+
+    def __init__(self, seconds, capacity):
+        self.seconds = seconds
+        self.buffer = RingBuffer(OHLC_DTYPE, capacity)
+
+    def add_tick(self, timestamp, price, volume=0, turnover=0.0):
+        """
+        Fold a trade of ``volume`` shares worth ``turnover`` into the open
+        candle; returns the candle it closed, if any.
+        """
+        start = bucket_start(timestamp, self.seconds)
+        candle = self.buffer.last()
+        if candle is None or candle['timestamp'] < start:
+            self.buffer.append((start, price, price, price, price, volume, turnover,
+                                turnover / volume if volume else price))
+            return candle
+
+        candle['high'] = max(candle['high'], price)
+        candle['low'] = min(candle['low'], price)
+        candle['close'] = price
+        if volume:
+            candle['volume'] += volume
+            candle['turnover'] += turnover
+            candle['vwap'] = candle['turnover'] / candle['volume']
+        elif not candle['volume']:
+            candle['vwap'] = price
+        return None
+
+    def add_bars(self, timestamps, opens, highs, lows, closes, volumes, earlier=False):
+        """
+        Merge arrays of finer-grained bars (e.g. fetched 1m candles) in time
+        order. The bars come after the candles held, or with ``earlier``
+        before the trading those candles saw; a bar sharing a held candle's
+        bucket is folded into it.
+        """
+        starts = bucket_starts(timestamps, self.seconds)
+        first = np.concatenate([[0], np.flatnonzero(np.diff(starts)) + 1])
+        last = np.append(first[1:] - 1, len(starts) - 1)
+
+        rows = np.empty(len(first), dtype=OHLC_DTYPE)
+        rows['timestamp'] = starts[first]
+        rows['open'] = opens[first]
+        rows['high'] = np.maximum.reduceat(highs, first)
+        rows['low'] = np.minimum.reduceat(lows, first)
+        rows['close'] = closes[last]
+        rows['volume'] = np.add.reduceat(volumes, first)
+        rows['turnover'] = np.add.reduceat((highs + lows + closes) / 3 * volumes, first)
+        rows['vwap'] = np.divide(rows['turnover'], rows['volume'], out=rows['close'].copy(),
+                                 where=rows['volume'] > 0)
+
+        if earlier:
+            # The last bar may share a bucket with a candle already held; it opens that candle.
+            held = self.buffer.view()
+            i = np.searchsorted(held['timestamp'], rows['timestamp'][-1])
+            if i < len(held) and held[i]['timestamp'] == rows['timestamp'][-1]:
+                _fold(held[i], rows[-1], earlier=True)
+                rows = rows[:-1]
+            self.buffer.merge(rows)
+            return
+
+        candle = self.buffer.last()
+        if candle is not None and candle['timestamp'] >= rows['timestamp'][0]:
+            _fold(candle, rows[0], earlier=False)
+            rows = rows[1:]
+        self.buffer.extend(rows)
+
+
+def _fold(candle, bar, earlier):
+    """Add ``bar``'s trading to ``candle``; an earlier bar sets the open, a later one the close."""
+    candle['high'] = max(candle['high'], bar['high'])
+    candle['low'] = min(candle['low'], bar['low'])
+    if earlier:
+        candle['open'] = bar['open']
+    else:
+        candle['close'] = bar['close']
+    candle['volume'] += bar['volume']
+    candle['turnover'] += bar['turnover']
+    if candle['volume']:
+        candle['vwap'] = candle['turnover'] / candle['volume']
+
+
+class CandleRollup:
+    """All resolutions of one symbol, updated together."""
+
+    def __init__(self, capacity):
+        self.series = {
+            name: CandleSeries(seconds, DAILY_CAPACITY if seconds >= DAY else capacity)
+            for name, seconds in RESOLUTIONS.items()
+        }
+
+    def __getitem__(self, resolution):
+        return self.series[resolution].buffer
+
+    def add_tick(self, timestamp, price, volume=0, turnover=0.0):
+        """Update every resolution; returns ``[(resolution, BAR_CLOSED | BAR_UPDATED, candle)]``."""
+        events = []
+        for name, series in self.series.items():
+            closed = series.add_tick(timestamp, price, volume, turnover)
+            if closed is not None:
+                events.append((name, BAR_CLOSED, closed))
+            events.append((name, BAR_UPDATED, series.buffer.last()))
+        return events
+
+    def add_bars(self, bars):
+        """
+        Merge an ``(n, 6)`` array of fetched 1m candles
+        ``[timestamp, open, high, low, close, volume]`` in one vectorized pass
+        per resolution. Bars before the first 1m candle held (e.g. the
+        morning's history fetched after live ticks started) go in front of
+        it, bars after the newest one are appended, and bars for minutes
+        already covered are ignored, so refetching a day never duplicates or
+        reorders candles.
+        """
+        bars = np.asarray(bars, dtype='f8')
+        if not len(bars):
+            return
+        bars = bars[np.argsort(bars[:, 0], kind='stable')]
+        timestamps = bars[:, 0].astype('i8')
+
+        held = self.series['1m'].buffer.view()
+        if not len(held):
+            parts = [(np.ones(len(bars), dtype=bool), False)]
+        else:
+            minutes = bucket_starts(timestamps, 60)
+            parts = [(minutes < held['timestamp'][0], True), (minutes > held['timestamp'][-1], False)]
+
+        for part, earlier in parts:
+            if not part.any():
+                continue
+            volumes = bars[part, 5].astype('i8')
+            for series in self.series.values():
+                series.add_bars(timestamps[part], bars[part, 1], bars[part, 2], bars[part, 3],
+                                bars[part, 4], volumes, earlier)
+
+    def discard_before(self, timestamp):
+        """Apply intraday retention; daily candles are kept."""
+        for series in self.series.values():
+            if series.seconds < DAY:
+                series.buffer.discard_before(timestamp)
+
+    def snapshot(self):
+        """Copies of every series, keyed ``ohlc_<resolution>`` for ``snapshots``."""
+        return {f"ohlc_{name}": series.buffer.view().copy() for name, series in self.series.items()}
+
+    def restore(self, arrays):
+        for name, series in self.series.items():
+            rows = arrays.get(f"ohlc_{name}")
+            if rows is None:
+                continue
+            if rows.dtype != series.buffer.dtype:
+                # Snapshot from before a column was added: copy the fields it has.
+                converted = np.zeros(len(rows), dtype=series.buffer.dtype)
+                for field in rows.dtype.names:
+                    if field in converted.dtype.names:
+                        converted[field] = rows[field]
+                if 'vwap' not in rows.dtype.names:
+                    converted['vwap'] = converted['close']
+                rows = converted
+            series.buffer.extend(rows)
+
+    def rows(self, resolution, since=None):
+        buffer = self.series[resolution].buffer
+        return buffer.since(since) if since else buffer.view()
@@ -0,0 +1,55 @@
+"""
+Per-client outbound buffer with latest-value conflation.
+
+The flush loop sends straight to clients that keep up, but never to a
+client that is behind: for that one it only marks which of the client's
+symbols changed. The client's own sender task waits until its transport
+has drained, then takes everything marked and renders it from the
+current state. A symbol marked again before it was sent is conflated,
+so the client gets that symbol's latest value once. The outbox is
+bounded by the client's subscriptions, however far behind it falls.
+
+Other keys (e.g. ``'correlationUpdate'``) can carry a payload; a newer
+payload under the same key replaces the pending one.
+"""
+import asyncio
+
+
+class ClientOutbox:
+    def __init__(self):
+        self._pending = {}           # key -> payload (None: render at send time), oldest first
+        self._ready = asyncio.Event()
+        self.marked = 0
+        self.conflated = 0
+        self.sent = 0
+        self.stalls = 0              # times the sender waited for the transport to drain
+
+    def __len__(self):
+        return len(self._pending)
+
+    def mark(self, key, payload=None):
+        self.marked += 1
+        if key in self._pending:
+            self.conflated += 1
+        self._pending[key] = payload
+        self._ready.set()
+
+    async def wait(self):
+        await self._ready.wait()
+
+    def take(self):
+        """Every pending ``(key, payload)``, oldest first."""
+        items = list(self._pending.items())
+        self._pending.clear()
+        self._ready.clear()
+        self.sent += len(items)
+        return items
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'marked': self.marked,
+            'conflated': self.conflated,
+            'sent': self.sent,
+            'stalls': self.stalls,
+        }
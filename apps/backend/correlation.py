@@ -0,0 +1,227 @@
+"""
+Streaming pairwise correlation and beta for a basket of symbols.
+
+``RollingCovariance`` is a multivariate Welford accumulator: per-bar log
+returns of the basket arrive as one vector and update the mean and the
+``(n, n)`` co-moment matrix with a single outer product. With a window the
+oldest return vector is taken back out with the inverse update, so memory
+is O(n^2) for the moments plus the window's return vectors.
+
+``CorrelationBasket`` lines the members' 1m bars up by bar time: a bar row
+is finished once any member opens a later bar, and members that did not
+trade in it carry their previous close (a zero return).
+
+``CorrelationRegistry`` shares one basket between every client asking for
+the same symbols and window, seeds a new basket from the 1m candles
+already in memory, and drops it when its last client leaves.
+"""
+import numpy as np
+
+
+class RollingCovariance:
+    def __init__(self, size, window=None):
+        self.size = size
+        self.window = window
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.comoment = np.zeros((size, size))
+        self._returns = np.zeros((window, size)) if window else None
+        self._pos = 0
+
+    def push(self, x):
+        """Add one return vector, dropping the oldest once the window is full."""
+        x = np.asarray(x, dtype='f8')
+        if self.window:
+            if self.count == self.window:
+                self._remove(self._returns[self._pos].copy())
+            self._returns[self._pos] = x
+            self._pos = (self._pos + 1) % self.window
+
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.comoment += np.outer(delta, x - self.mean)
+
+    def _remove(self, x):
+        if self.count == 1:
+            self.count = 0
+            self.mean[:] = 0
+            self.comoment[:] = 0
+            return
+        mean = (self.count * self.mean - x) / (self.count - 1)
+        self.comoment -= np.outer(x - mean, x - self.mean)
+        self.mean = mean
+        self.count -= 1
+
+    def seed(self, returns):
+        """Start from a ``(bars, size)`` matrix of returns, oldest first, in one step."""
+        returns = np.asarray(returns, dtype='f8')
+        if self.window:
+            returns = returns[-self.window:]
+            self._returns[:len(returns)] = returns
+            self._pos = len(returns) % self.window
+        self.count = len(returns)
+        if not self.count:
+            return
+        self.mean = returns.mean(axis=0)
+        centered = returns - self.mean
+        self.comoment = centered.T @ centered
+
+    def covariance(self):
+        if self.count < 2:
+            return np.full((self.size, self.size), np.nan)
+        return self.comoment / (self.count - 1)
+
+    def correlation(self):
+        cov = self.covariance()
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return cov / np.outer(std, std)
+
+    def beta(self):
+        """``beta[i, j]``: sensitivity of symbol i's returns to symbol j's."""
+        cov = self.covariance()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return cov / np.diag(cov)[None, :]
+
+
+def _json_matrix(matrix):
+    return [[value if np.isfinite(value) else None for value in row] for row in matrix.tolist()]
+
+
+class CorrelationBasket:
+    def __init__(self, symbols, window):
+        self.symbols = list(symbols)
+        self.window = window
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.stats = RollingCovariance(len(self.symbols), window)
+        self._prev = np.full(len(self.symbols), np.nan)   # closes of the last finished row
+        self._row = np.full(len(self.symbols), np.nan)    # closes of the row being filled
+        self.row_time = None
+        self.bar_time = None                               # newest finished row
+
+    def seed(self, candles):
+        """Seed from each member's 1m candle buffer, aligned on bar time."""
+        views = [candles.get(symbol) for symbol in self.symbols]
+        # window returns need window + 1 closed bars, plus the open one.
+        views = [view[-(self.window + 2):] if view is not None else None for view in views]
+        times = np.unique(np.concatenate(
+            [view['timestamp'] for view in views if view is not None and len(view)] or [np.empty(0, 'i8')]
+        ))
+        if not len(times):
+            return
+
+        closes = np.full((len(times), len(self.symbols)), np.nan)
+        for column, view in enumerate(views):
+            if view is None or not len(view):
+                continue
+            closes[np.searchsorted(times, view['timestamp']), column] = view['close']
+        # Carry each member's last close forward over bars it did not trade in.
+        filled = np.where(np.isnan(closes), 0, np.arange(len(times))[:, None])
+        closes = closes[np.maximum.accumulate(filled, axis=0), np.arange(len(self.symbols))]
+
+        # The newest row may still be open for some members; keep it as the row being filled.
+        complete = closes[:-1]
+        valid = ~np.isnan(complete).any(axis=1)
+        returns = np.log(complete[1:] / complete[:-1])[valid[1:] & valid[:-1]]
+        self.stats.seed(returns)
+        if len(complete):
+            self._prev = complete[-1].copy()
+            self.bar_time = int(times[-2])
+        self._row = closes[-1].copy()
+        self.row_time = int(times[-1])
+
+    def add_bar(self, symbol, timestamp, close):
+        """Record a member's latest close for bar ``timestamp``; returns True when a row was finished."""
+        finished = False
+        if self.row_time is None:
+            self.row_time = timestamp
+        elif timestamp > self.row_time:
+            finished = self._finish()
+            self.row_time = timestamp
+        if timestamp == self.row_time:
+            self._row[self._index[symbol]] = close
+        return finished
+
+    def _finish(self):
+        row = np.where(np.isnan(self._row), self._prev, self._row)
+        finished = False
+        if not np.isnan(self._prev).any() and not np.isnan(row).any():
+            self.stats.push(np.log(row / self._prev))
+            finished = True
+        self._prev = row
+        self._row = row.copy()
+        self.bar_time = self.row_time
+        return finished
+
+    def payload(self):
+        return {
+            'symbols': self.symbols,
+            'window': self.window,
+            'bars': self.stats.count,
+            'timestamp': self.bar_time,
+            'correlation': _json_matrix(self.stats.correlation()),
+            'beta': _json_matrix(self.stats.beta()),
+        }
+
+
+class CorrelationRegistry:
+    def __init__(self, candles_for):
+        # symbol -> 1m candle RingBuffer (or None)
+        self._candles_for = candles_for
+        self._baskets = {}           # (symbols, window) -> CorrelationBasket
+        self._watchers = {}          # (symbols, window) -> set of sids
+        self._client = {}            # sid -> (symbols, window)
+        self._by_symbol = {}         # symbol -> set of basket keys
+        self._updated = set()
+
+    def watch(self, sid, symbols, window):
+        """Point ``sid`` at the basket for ``symbols``/``window`` (replacing its previous one)."""
+        key = (tuple(dict.fromkeys(symbols)), window)
+        self.unwatch(sid)
+        basket = self._baskets.get(key)
+        if basket is None:
+            basket = self._baskets[key] = CorrelationBasket(key[0], window)
+            candles = {}
+            for symbol in key[0]:
+                buffer = self._candles_for(symbol)
+                candles[symbol] = buffer.view() if buffer else None
+            basket.seed(candles)
+            for symbol in key[0]:
+                self._by_symbol.setdefault(symbol, set()).add(key)
+        self._watchers.setdefault(key, set()).add(sid)
+        self._client[sid] = key
+        return basket
+
+    def unwatch(self, sid):
+        key = self._client.pop(sid, None)
+        if key is None:
+            return
+        watchers = self._watchers[key]
+        watchers.discard(sid)
+        if watchers:
+            return
+        del self._watchers[key]
+        del self._baskets[key]
+        self._updated.discard(key)
+        for symbol in key[0]:
+            keys = self._by_symbol[symbol]
+            keys.discard(key)
+            if not keys:
+                del self._by_symbol[symbol]
+
+    def on_bars(self, events):
+        """Bar-event listener for 1m candles (closed and updated alike)."""
+        for symbol, _, candle in events:
+            for key in self._by_symbol.get(symbol, ()):
+                if self._baskets[key].add_bar(symbol, int(candle['timestamp']), float(candle['close'])):
+                    self._updated.add(key)
+
+    def drain_updates(self):
+        """``[(sids, payload)]`` for every basket that finished a bar since the last call."""
+        updates = [(set(self._watchers[key]), self._baskets[key].payload()) for key in self._updated]
+        self._updated.clear()
+        return updates
+
+    def stats(self):
+        return {'baskets': len(self._baskets), 'clients': len(self._client)}
@@ -2,11 +2,24 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime, timedelta
 import argparse
+import calendar
+import os
 import sys
 import json
 import time
 import logging
 
+# Indicators come from the live server's modules one directory up; images
+# that ship only this data directory run without them.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import numpy as np
+    from candles import IST_OFFSET
+    from indicator_registry import INDICATORS, compute_series, parse_spec
+    from tick_store import OHLC_DTYPE
+except ImportError:
+    INDICATORS = None
+
 # Configure logging with proper levels
 logging.basicConfig(
     level=logging.INFO,
@@ -46,8 +59,12 @@ def main():
                        help='Optimize query for date range requests')
     parser.add_argument('--buffer_minutes', type=int, default=30,
                        help='Buffer minutes to add around date range')
-    parser.add_argument('--indicators', type=str, default='',
-                       help='Comma-separated list of indicators (future feature)')
+    if INDICATORS is not None:
+        parser.add_argument('--indicators', type=str, default='',
+                            help=f"Semicolon-separated indicator specs, e.g. 'macd:12,26,9;vwap' "
+                                 f"({', '.join(sorted(INDICATORS))})")
+    else:
+        parser.add_argument('--indicators', type=str, default='', help=argparse.SUPPRESS)
     parser.add_argument('--parallel_processing', type=str, default='false',
                        choices=['true', 'false'],
                        help='Enable parallel processing (future feature)')
@@ -64,7 +81,7 @@ def main():
     parallel_processing = args.parallel_processing.lower() == 'true'
     
     # Parse indicators
-    indicators = [ind.strip() for ind in args.indicators.split(',') if ind.strip()] if args.indicators else []
+    indicators = [ind.strip() for ind in args.indicators.split(';') if ind.strip()] if args.indicators else []
     
     if fetch_all_data:
         start_date = None
@@ -315,9 +332,8 @@ def main():
         if len(results) > 0:
             logger.info(f"Data range: {results[0]['interval_start']} to {results[-1]['interval_start']}")
             
-        # Future: Indicator calculations
-        if indicators:
-            logger.info(f"Note: Indicators requested but not yet implemented: {indicators}")
+        if indicators and results:
+            print_indicators(results, indicators)
 
     except psycopg2.Error as e:
         logger.error(f"Database error: {e}")
@@ -333,6 +349,36 @@ def main():
         if 'conn' in locals():
             conn.close()
 
+def print_indicators(results, indicators):
+    """Print an Indicators: line per interval, after the Interval: lines."""
+    if INDICATORS is None:
+        logger.warning("Indicators requested but the indicator modules are not installed with this script")
+        return
+
+    specs = []
+    for name in indicators:
+        try:
+            parse_spec(name)
+            specs.append(name)
+        except ValueError as e:
+            logger.warning(f"Skipping indicator: {e}")
+    if not specs:
+        return
+
+    bars = np.array([
+        (calendar.timegm(r['interval_start'].timetuple()) - IST_OFFSET,
+         r['open'], r['high'], r['low'], r['close'], r['volume'],
+         (r['high'] + r['low'] + r['close']) / 3 * r['volume'], (r['high'] + r['low'] + r['close']) / 3)
+        for r in results
+    ], dtype=OHLC_DTYPE)
+    series = compute_series(bars, specs)
+
+    for i, result in enumerate(results):
+        values = {key: values[i] for key, values in series.items()}
+        print(f"Indicators:{result['interval_start'].isoformat()}|{json.dumps(values)}")
+    logger.info(f"Computed indicators {', '.join(series)} for {len(results)} intervals")
+
+
 def parse_date_string(date_str):
     """Parse date string in various formats with enhanced support"""
     try:
@@ -9,11 +9,25 @@ import asyncio
 import numpy as np
 import os
 import requests
-from collections import deque, defaultdict
+from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from fyers_apiv3 import fyersModel
 from fyers_apiv3.FyersWebsocket import data_ws
 from typing import Dict, Set
+from tick_store import RingBuffer, TICK_DTYPE, tick_buffer, chart_buffer
+from candles import CandleRollup, bucket_starts, normalize_resolution, ohlc_rows, session_open, BAR_CLOSED, BAR_UPDATED
+from ingest_queue import TickIngestQueue
+from snapshots import SnapshotWriter, read_manifest, load_symbol
+from indicator_engine import IndicatorEngine, SMA_PERIOD
+from indicator_registry import IndicatorRegistry
+from session_volume import VolumeTracker
+from topk import TopKEngine
+from breadth import BreadthTracker
+from correlation import CorrelationRegistry
+from indicator_cache import IndicatorCache
+from quote_delta import DeltaEncoder
+from client_outbox import ClientOutbox
+import wire_codec
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import uvicorn
@@ -54,15 +68,18 @@ grant_type = "authorization_code"
 # ============ Global State ============
 clients: Dict[str, dict] = {}
 symbol_to_clients: Dict[str, Set[str]] = {}
+# symbol -> {quote room: (indicator keys, sids)}; every viewer of a symbol is in
+# exactly one of its quote rooms, so each update is encoded once per room.
+quote_rooms: Dict[str, Dict[str, tuple]] = defaultdict(dict)
 running = True
 auth_initialized = False
 main_loop = None
 
 
 # ============ Multi-symbol persistent data storage ============
-historical_data: Dict[str, deque] = {}
-ohlc_data: Dict[str, deque] = {}
-chart_updates: Dict[str, deque] = {}
+historical_data: Dict[str, RingBuffer] = {}
+ohlc_data: Dict[str, CandleRollup] = {}
+chart_updates: Dict[str, RingBuffer] = {}
 active_symbols: Set[str] = set()
 symbol_subscriptions = defaultdict(int)
 
@@ -74,22 +91,89 @@ DATA_RETENTION_HOURS = 24
 
 INDIA_TZ = pytz.timezone('Asia/Kolkata')
 
+# Clock for tick timestamps and retention; replay.py swaps in a virtual one.
+clock = time.time
+
 
 fyers = None
 fyers_client = None
 
 
 # ============ Real-time Configuration ============
-REAL_TIME_INTERVAL = 0.2
-CHART_UPDATE_INTERVAL = 0.1
-last_emit_time = defaultdict(float)
+# Micro-batch window: ticks arriving within it are flushed together.
+FLUSH_WINDOW = float(os.getenv("FLUSH_WINDOW_MS", "25")) / 1000
 pending_data = {}
+dirty_symbols: Set[str] = set()
+flush_event = asyncio.Event()
+# Enriched quotes as of the last flush; what per-client senders render from.
+published_quotes: Dict[str, dict] = {}
+# A client with more engine.io packets queued than the high-water mark is skipped
+# by room broadcasts and served conflated updates by its own sender task until
+# its queue is back under the low-water mark.
+OUTBOUND_HIGH_WATER = int(os.getenv("OUTBOUND_HIGH_WATER", "500"))
+OUTBOUND_LOW_WATER = OUTBOUND_HIGH_WATER // 4
+OUTBOUND_RETRY = 0.05
+lagging_clients: Set[str] = set()
+outbound_stats = {'lag_events': 0, 'caught_up_updates': 0}
+# Clients in batch mode get one columnar 'marketBatch' frame per flush instead of
+# per-symbol events; row i of every column belongs to symbols[i].
+BATCH_FIELDS = (
+    'ltp', 'change', 'changePercent', 'volume', 'open', 'high', 'low', 'close',
+    'bid', 'ask', 'timestamp', 'tradedVolume', 'tradedValue', 'vwap', 'dollarVolume'
+)
+batch_stats = {'frames': 0, 'rows': 0}
+# Clients in delta mode get 'quoteDelta' messages with only the changed fields,
+# plus a full keyframe per symbol at least this often.
+DELTA_KEYFRAME_INTERVAL = float(os.getenv("DELTA_KEYFRAME_SECONDS", "30"))
+delta_stats = {'messages': 0, 'keyframes': 0, 'keyframe_requests': 0}
 
 
 # ============ Persistent data management ============
-cached_indicators = {}
-data_cleanup_interval = 3600
-last_cleanup_time = time.time()
+indicator_engine = IndicatorEngine()
+# Extra indicators computed only for symbols a client asked them for.
+indicator_registry = IndicatorRegistry(lambda symbol: ohlc_data[symbol]['1m'] if symbol in ohlc_data else None)
+# Per-tick traded quantity, session VWAP and dollar volume from vol_traded_today.
+volume_tracker = VolumeTracker()
+
+# Server-side rankings across all active symbols; clients get rank-change deltas.
+TOPK_SIZE = int(os.getenv("TOPK_SIZE", "20"))
+RANKING_METRICS = ('changePercent', 'dollarVolume', 'relativeVolume', 'volume', 'rsi_14')
+RELATIVE_VOLUME_BARS = 5
+topk_engine = TopKEngine(TOPK_SIZE, RANKING_METRICS)
+topk_clients: Dict[str, Set[str]] = defaultdict(set)   # board id -> sids
+
+# Advance/decline and friends, kept incrementally and broadcast on a fixed cadence.
+BREADTH_INTERVAL = float(os.getenv("BREADTH_INTERVAL_MS", "1000")) / 1000
+breadth_tracker = BreadthTracker()
+
+# Rolling correlation/beta of 1m log returns for client baskets.
+CORRELATION_WINDOW = 30
+MAX_CORRELATION_WINDOW = 375
+MAX_CORRELATION_SYMBOLS = int(os.getenv("MAX_CORRELATION_SYMBOLS", "50"))
+correlation_registry = CorrelationRegistry(lambda symbol: ohlc_data[symbol]['1m'] if symbol in ohlc_data else None)
+
+# Indicator series served with candles; closed bars are computed once.
+INDICATOR_CACHE_BYTES = int(os.getenv("INDICATOR_CACHE_MB", "64")) * 2 ** 20
+indicator_cache = IndicatorCache(INDICATOR_CACHE_BYTES)
+RETENTION_SWEEP_INTERVAL = 60
+RETENTION_SLICE_SYMBOLS = 25
+retention_stats = {
+    'sweeps': 0,
+    'slices': 0,
+    'rows_evicted': 0,
+    'last_slice_ms': 0.0,
+    'max_slice_ms': 0.0,
+    'last_sweep_ms': 0.0
+}
+
+
+# ============ Snapshot / restore ============
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join('data', 'snapshots'))
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "300"))
+snapshot_manifest = None
+snapshot_pending: Set[str] = set()   # in the snapshot, not yet loaded into memory
+backfill_pending: Dict[str, int] = {}   # restored symbol -> newest snapshot point, gap not yet fetched
+history_loaded: Dict[str, int] = {}     # symbol -> session open of the day its history was applied
 
 
 # ✅ NEW: HTTP Session with connection pooling and retries
@@ -125,6 +209,8 @@ http_session = create_resilient_session()
 
 # ✅ NEW: Thread pool for blocking operations
 executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="FyersWorker")
+EMPTY_CANDLES = np.empty((0, 6))
+WARM_START_CHUNK = 10   # symbols fetched concurrently per warm-start batch
 
 
 # ============ Helper Functions ============
@@ -253,63 +339,72 @@ async def auth_watcher():
             await asyncio.sleep(10)
 
 
-def cleanup_old_data():
-    """Remove data older than DATA_RETENTION_HOURS"""
-    global last_cleanup_time
-    current_time = time.time()
-    cutoff_time = current_time - (DATA_RETENTION_HOURS * 3600)
-
-    if current_time - last_cleanup_time < data_cleanup_interval:
-        return
-
-    logger.info("Starting data cleanup...")
+def evict_expired(symbols, cutoff_time):
+    """
+    Drop data older than cutoff_time for a slice of symbols.
+    Stores are time-ordered, so each symbol costs a binary search plus a
+    head-pointer advance regardless of how many rows it holds.
+    """
+    evicted = 0
     cleaned_symbols = []
 
-    for symbol in list(historical_data.keys()):
-        if symbol in historical_data:
-            recent_data = deque(maxlen=MAX_HISTORY_POINTS)
-            for point in historical_data[symbol]:
-                if point['timestamp'] > cutoff_time:
-                    recent_data.append(point)
+    for symbol in symbols:
+        if symbol not in historical_data:
+            continue
 
-            if len(recent_data) > 0:
-                historical_data[symbol] = recent_data
-            else:
-                if symbol_subscriptions[symbol] == 0:
-                    del historical_data[symbol]
-                    cleaned_symbols.append(symbol)
+        evicted += historical_data[symbol].discard_before(cutoff_time)
+        if not historical_data[symbol] and symbol_subscriptions[symbol] == 0:
+            del historical_data[symbol]
+            cleaned_symbols.append(symbol)
 
         if symbol in ohlc_data:
-            recent_ohlc = deque(maxlen=MAX_HISTORY_POINTS)
-            for candle in ohlc_data[symbol]:
-                if candle['timestamp'] > cutoff_time:
-                    recent_ohlc.append(candle)
-
-            if len(recent_ohlc) > 0:
-                ohlc_data[symbol] = recent_ohlc
-            elif symbol_subscriptions[symbol] == 0:
-                if symbol in ohlc_data:
-                    del ohlc_data[symbol]
+            ohlc_data[symbol].discard_before(cutoff_time)
+            if not ohlc_data[symbol]['1m'] and symbol_subscriptions[symbol] == 0:
+                del ohlc_data[symbol]
 
         if symbol in chart_updates:
-            recent_updates = deque(maxlen=MAX_CHART_UPDATES)
-            for update in chart_updates[symbol]:
-                if update['timestamp'] > cutoff_time:
-                    recent_updates.append(update)
-
-            if len(recent_updates) > 0:
-                chart_updates[symbol] = recent_updates
-            elif symbol_subscriptions[symbol] == 0:
-                if symbol in chart_updates:
-                    del chart_updates[symbol]
+            evicted += chart_updates[symbol].discard_before(cutoff_time)
+            if not chart_updates[symbol] and symbol_subscriptions[symbol] == 0:
+                del chart_updates[symbol]
 
     for symbol in cleaned_symbols:
-        if symbol in cached_indicators:
-            del cached_indicators[symbol]
+        indicator_engine.remove(symbol)
+        volume_tracker.remove(symbol)
+        history_loaded.pop(symbol, None)
+        topk_engine.remove(symbol)
+        breadth_tracker.remove(symbol)
+        indicator_cache.discard(symbol)
+        published_quotes.pop(symbol, None)
         active_symbols.discard(symbol)
 
-    last_cleanup_time = current_time
-    logger.info(f"Data cleanup completed. Cleaned {len(cleaned_symbols)} old symbols.")
+    return evicted, cleaned_symbols
+
+
+async def cleanup_old_data():
+    """Remove data older than DATA_RETENTION_HOURS, a few symbols per loop turn."""
+    sweep_started = time.perf_counter()
+    cutoff_time = clock() - (DATA_RETENTION_HOURS * 3600)
+    symbols = list(historical_data.keys())
+    cleaned_total = 0
+
+    for i in range(0, len(symbols), RETENTION_SLICE_SYMBOLS):
+        slice_started = time.perf_counter()
+        evicted, cleaned = evict_expired(symbols[i:i + RETENTION_SLICE_SYMBOLS], cutoff_time)
+        slice_ms = (time.perf_counter() - slice_started) * 1000
+
+        retention_stats['slices'] += 1
+        retention_stats['rows_evicted'] += evicted
+        retention_stats['last_slice_ms'] = round(slice_ms, 3)
+        retention_stats['max_slice_ms'] = max(retention_stats['max_slice_ms'], round(slice_ms, 3))
+        cleaned_total += len(cleaned)
+
+        # Yield between slices so emission and client requests interleave.
+        await asyncio.sleep(0)
+
+    retention_stats['sweeps'] += 1
+    retention_stats['last_sweep_ms'] = round((time.perf_counter() - sweep_started) * 1000, 3)
+    if cleaned_total:
+        logger.info(f"Data cleanup completed. Cleaned {cleaned_total} old symbols.")
 
 
 def get_trading_hours():
@@ -331,9 +426,15 @@ def is_trading_hours():
 
 # ============ Socket.IO Event Handlers ============
 @sio.event
-async def connect(sid, environ):
-    logger.info(f"Client connected: {sid}")
-    clients[sid] = {'subscriptions': set(), 'last_ping': time.time()}
+async def connect(sid, environ, auth=None):
+    codec, requested = wire_codec.negotiate(environ, auth)
+    if codec != requested:
+        logger.warning(f"Client {sid} asked for codec {requested!r}; using {codec}")
+    logger.info(f"Client connected: {sid} (codec: {codec})")
+    outbox = ClientOutbox()
+    clients[sid] = {'subscriptions': set(), 'rooms': {}, 'batch': False, 'delta': None, 'codec': codec,
+                    'outbox': outbox, 'last_ping': time.time()}
+    clients[sid]['sender'] = asyncio.create_task(client_sender(sid, outbox))
     
     await sio.emit('authStatus', {
         'authenticated': auth_initialized,
@@ -353,14 +454,108 @@ async def disconnect(sid):
             if symbol_subscriptions[symbol] == 0:
                 logger.info(f"No more active clients for {symbol}, but keeping background collection")
 
+        # Socket.IO drops a disconnected sid from its rooms itself.
+        for symbol, room in clients[sid]['rooms'].items():
+            forget_room_member(sid, symbol, room)
+        clients[sid]['sender'].cancel()
         del clients[sid]
+    lagging_clients.discard(sid)
+    indicator_registry.unwatch(sid)
+    correlation_registry.unwatch(sid)
+    for sids in topk_clients.values():
+        sids.discard(sid)
+
+
+async def rows_event(sid, symbol, buffer, rows=None, tag_records=False):
+    """
+    ``{'symbol', 'data'[, 'encoding']}`` for ``rows`` (default: all) of
+    ``buffer`` in the client's codec; ``tag_records`` repeats the symbol in
+    every json/msgpack record.
+
+    Building records for a full buffer takes ~100 ms, so the rows are
+    copied on the loop (views move with the next append) and packed in the
+    executor; tick flushes keep running meanwhile.
+    """
+    codec = clients[sid]['codec'] if sid in clients else 'json'
+    extra = {'symbol': symbol} if tag_records else {}
+    rows = (buffer.view() if rows is None else rows).copy()
+    loop = asyncio.get_running_loop()
+    encoding, data = await loop.run_in_executor(
+        executor, lambda: wire_codec.pack_rows(buffer, rows, codec, **extra)
+    )
+    event = {'symbol': symbol, 'data': data}
+    if encoding != 'json':
+        event['encoding'] = encoding
+    return event
+
+
+def quote_room(symbol, keys=()):
+    """marketDataUpdate room of a symbol's viewers that watch the indicator ``keys``."""
+    return f"quote:{symbol}|{','.join(keys)}" if keys else f"quote:{symbol}"
+
+
+def chart_room(symbol):
+    return f"chart:{symbol}"
+
+
+def forget_room_member(sid, symbol, room):
+    members = quote_rooms[symbol].get(room)
+    if members is not None:
+        members[1].discard(sid)
+        if not members[1]:
+            del quote_rooms[symbol][room]
+    if not quote_rooms[symbol]:
+        del quote_rooms[symbol]
+
+
+async def join_symbol(sid, symbol):
+    """Put ``sid`` in the symbol's chart room and the quote room matching its indicators."""
+    if sid not in clients:
+        return
+    if clients[sid]['delta']:
+        # A (re)subscribe starts the symbol's delta stream over with a keyframe.
+        clients[sid]['delta'].reset([symbol])
+    if clients[sid]['batch'] or clients[sid]['delta']:
+        return
+    keys = indicator_registry.keys_for(sid, symbol)
+    room = quote_room(symbol, keys)
+    current = clients[sid]['rooms'].get(symbol)
+    if current == room:
+        return
+    if current is not None:
+        await sio.leave_room(sid, current)
+        forget_room_member(sid, symbol, current)
+    else:
+        await sio.enter_room(sid, chart_room(symbol))
+
+    await sio.enter_room(sid, room)
+    quote_rooms[symbol].setdefault(room, (keys, set()))[1].add(sid)
+    clients[sid]['rooms'][symbol] = room
+
+
+async def leave_symbol(sid, symbol):
+    room = clients[sid]['rooms'].pop(symbol, None) if sid in clients else None
+    if room is None:
+        return
+    await sio.leave_room(sid, room)
+    await sio.leave_room(sid, chart_room(symbol))
+    forget_room_member(sid, symbol, room)
+
+
+async def rejoin_symbols(sid):
+    """Re-sort ``sid`` into rooms after its delivery mode changed."""
+    for symbol in list(clients[sid]['subscriptions']):
+        await leave_symbol(sid, symbol)
+        await join_symbol(sid, symbol)
 
 
 # ✅ ENHANCED: Fetch historical data with timeout protection
-def fetch_historical_intraday_data(symbol, date=None):
+def fetch_intraday_candles(symbol, date=None, since=None):
     """
-    Fetch historical data with timeout and error handling.
-    This is a BLOCKING function that should be called via executor.
+    Fetch 1m candles as an (n, 6) float array [timestamp, open, high, low, close, volume].
+    When since (epoch seconds) is given only candles after it are requested.
+    This is a BLOCKING function that should be called via executor; it does
+    not touch the shared stores, see apply_history.
     """
     if not date:
         date = datetime.datetime.now(INDIA_TZ).strftime('%Y-%m-%d')
@@ -368,7 +563,7 @@ def fetch_historical_intraday_data(symbol, date=None):
     try:
         if not fyers_client or not auth_initialized:
             logger.warning(f"Fyers client not initialized for {symbol}")
-            return []
+            return EMPTY_CANDLES
             
         date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
         date_obj = INDIA_TZ.localize(date_obj)
@@ -379,14 +574,20 @@ def fetch_historical_intraday_data(symbol, date=None):
         now = datetime.datetime.now(INDIA_TZ)
         if date == now.strftime('%Y-%m-%d') and now < market_open:
             logger.info(f"Market not yet open for {date}")
-            return []
+            return EMPTY_CANDLES
 
         if date == now.strftime('%Y-%m-%d') and now < market_close:
             end_time = now
         else:
             end_time = market_close
 
-        from_date = market_open.strftime('%Y-%m-%d %H:%M:%S')
+        start_time = market_open
+        if since:
+            start_time = max(market_open, datetime.datetime.fromtimestamp(since, INDIA_TZ))
+            if start_time >= end_time:
+                return EMPTY_CANDLES
+
+        from_date = start_time.strftime('%Y-%m-%d %H:%M:%S')
         to_date = end_time.strftime('%Y-%m-%d %H:%M:%S')
 
         logger.info(f"Fetching historical data for {symbol} from {from_date} to {to_date}")
@@ -404,73 +605,93 @@ def fetch_historical_intraday_data(symbol, date=None):
         response = fyers_client.history(data_args)
 
         if response and response.get('s') == 'ok' and 'candles' in response:
-            candles = response['candles']
+            candles = np.asarray(response['candles'], dtype='f8').reshape(-1, 6)
             logger.info(f"Received {len(candles)} candles for {symbol}")
 
-            result = []
-
-            for candle in candles:
-                timestamp, open_price, high_price, low_price, close_price, volume = candle
-
-                if timestamp > 10000000000:
-                    timestamp = timestamp // 1000
-
-                data_point = {
-                    'symbol': symbol,
-                    'ltp': close_price,
-                    'open': open_price,
-                    'high': high_price,
-                    'low': low_price,
-                    'close': close_price,
-                    'volume': volume,
-                    'timestamp': timestamp,
-                    'change': 0,
-                    'changePercent': 0
-                }
-
-                result.append(data_point)
-
-                if symbol not in ohlc_data:
-                    ohlc_data[symbol] = deque(maxlen=MAX_HISTORY_POINTS)
-
-                minute_timestamp = (timestamp // 60) * 60
-
-                ohlc_candle = {
-                    'timestamp': minute_timestamp,
-                    'open': open_price,
-                    'high': high_price,
-                    'low': low_price,
-                    'close': close_price,
-                    'volume': volume
-                }
-
-                if not ohlc_data[symbol] or ohlc_data[symbol][-1]['timestamp'] != minute_timestamp:
-                    ohlc_data[symbol].append(ohlc_candle)
-
-            if result:
-                prev_close = result[0]['open']
-                for point in result:
-                    point['change'] = point['ltp'] - prev_close
-                    point['changePercent'] = (point['change'] / prev_close) * 100 if prev_close else 0
-
-            if result:
-                calculate_indicators_optimized(symbol, init=True)
-                active_symbols.add(symbol)
-
-            return result
+            millis = candles[:, 0] > 10000000000
+            candles[millis, 0] //= 1000
+            return candles
         else:
             logger.error(f"Failed to fetch historical data: {response}")
 
-        return []
+        return EMPTY_CANDLES
 
     except requests.exceptions.Timeout:
         logger.error(f"⏱️ Timeout fetching historical data for {symbol}")
-        return []
+        return EMPTY_CANDLES
     except Exception as e:
         logger.error(f"Error fetching historical data for {symbol}: {e}")
         import traceback
         traceback.print_exc()
-        return []
+        return EMPTY_CANDLES
+
+
+def candles_to_ticks(candles):
+    """Tick-store rows for fetched 1m candles; change is measured from the first open."""
+    rows = np.zeros(len(candles), dtype=TICK_DTYPE)
+    if not len(candles):
+        return rows
+    rows['timestamp'] = candles[:, 0]
+    rows['open'] = candles[:, 1]
+    rows['high'] = candles[:, 2]
+    rows['low'] = candles[:, 3]
+    rows['close'] = candles[:, 4]
+    rows['ltp'] = candles[:, 4]
+    rows['volume'] = candles[:, 5]
+
+    prev_close = candles[0, 1]
+    rows['change'] = candles[:, 4] - prev_close
+    if prev_close:
+        rows['changePercent'] = rows['change'] / prev_close * 100
+    return rows
+
+
+def candle_records(symbol, candles):
+    rows = candles_to_ticks(candles)
+    fields = ('ltp', 'open', 'high', 'low', 'close', 'volume', 'timestamp', 'change', 'changePercent')
+    columns = [rows[name].tolist() for name in fields]
+    return [dict(zip(fields, values), symbol=symbol) for values in zip(*columns)]
+
+
+def apply_history(fetched):
+    """
+    Merge fetched candles ({symbol: candles}) into the live stores and seed
+    indicators for all of them in one vectorized call. Runs on the event loop.
+
+    Live ticks can arrive before the fetch returns; fetched points older
+    than them are inserted in front, and the session volume gets the
+    trading those earlier bars saw.
+    """
+    seeded = []
+    for symbol, candles in fetched.items():
+        if not len(candles):
+            continue
+
+        if symbol not in ohlc_data:
+            ohlc_data[symbol] = CandleRollup(MAX_HISTORY_POINTS)
+        held = ohlc_data[symbol]['1m'].view()
+        live_from = int(held['timestamp'][0]) if len(held) else None
+        ohlc_data[symbol].add_bars(candles)
+
+        if symbol not in historical_data:
+            historical_data[symbol] = tick_buffer(MAX_HISTORY_POINTS)
+        buffer = historical_data[symbol]
+        rows = candles_to_ticks(candles)
+        if buffer:
+            live = buffer.view()['timestamp']
+            rows = rows[(rows['timestamp'] < live[0]) | (rows['timestamp'] > live[-1])]
+        buffer.merge(rows)
+
+        active_symbols.add(symbol)
+        if live_from is not None and symbol in volume_tracker:
+            earlier = candles[bucket_starts(candles[:, 0], 60) < live_from]
+            typical = (earlier[:, 2] + earlier[:, 3] + earlier[:, 4]) / 3
+            volume_tracker.backfill(symbol, live_from, int(earlier[:, 5].sum()),
+                                    float((typical * earlier[:, 5]).sum()))
+        seed_volume(symbol)
+        seeded.append(symbol)
+
+    seed_indicators(seeded)
 
 
 def fetch_daily_historical_data(symbol, days=30):
@@ -506,6 +727,60 @@ def fetch_daily_historical_data(symbol, days=30):
         return []
 
 
+async def warm_start(symbols, timeout=10.0, raise_timeout=False):
+    """
+    Make sure historical_data holds today's session for every symbol. A
+    symbol restored from a snapshot only fetches the gap after its newest
+    point. Live ticks received so far do not count as history: the fetch
+    still runs and is merged in front of them. Fetches run in the executor;
+    the results are applied on the loop in one batch so indicator seeding
+    is a single vectorized call.
+    """
+    loop = asyncio.get_event_loop()
+    session = session_open(int(clock()))
+    fetches = {}
+    for symbol in dict.fromkeys(symbols):
+        restore_symbol(symbol)
+
+        if history_loaded.get(symbol) == session and symbol not in backfill_pending:
+            logger.info(f"Using cached historical data for {symbol} ({len(historical_data.get(symbol, ()))} points)")
+            continue
+
+        since = backfill_pending.get(symbol)
+        if since:
+            logger.info(f"Backfilling {symbol} since snapshot")
+        else:
+            logger.info(f"Fetching fresh historical data for {symbol}")
+        fetches[symbol] = asyncio.wait_for(
+            loop.run_in_executor(executor, fetch_intraday_candles, symbol, None, since),
+            timeout=timeout
+        )
+
+    if not fetches:
+        return
+
+    results = await asyncio.gather(*fetches.values(), return_exceptions=True)
+    fetched = {}
+    for symbol, result in zip(fetches, results):
+        if isinstance(result, asyncio.TimeoutError):
+            if raise_timeout:
+                raise result
+            logger.error(f"⏱️ Timeout fetching historical data for {symbol}")
+        elif isinstance(result, Exception):
+            logger.error(f"Error fetching historical data for {symbol}: {result}")
+        else:
+            backfill_pending.pop(symbol, None)
+            history_loaded[symbol] = session
+            fetched[symbol] = result
+
+    apply_history(fetched)
+
+
+async def ensure_history(symbol, timeout=10.0):
+    """Single-symbol warm_start that raises asyncio.TimeoutError like a direct fetch."""
+    await warm_start([symbol], timeout, raise_timeout=True)
+
+
 @sio.event
 async def subscribe(sid, data):
     symbol = data.get('symbol')
@@ -515,40 +790,29 @@ async def subscribe(sid, data):
     if not auth_initialized:
         return {'success': False, 'error': 'Authentication not initialized'}
 
+    try:
+        indicator_keys = indicator_registry.watch(sid, symbol, data['indicators']) if 'indicators' in data else []
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+
     logger.info(f"Client {sid} subscribing to {symbol}")
 
     clients[sid]['subscriptions'].add(symbol)
     if symbol not in symbol_to_clients:
         symbol_to_clients[symbol] = set()
     symbol_to_clients[symbol].add(sid)
+    await join_symbol(sid, symbol)
 
     symbol_subscriptions[symbol] += 1
     active_symbols.add(symbol)
 
     # ✅ Fetch historical data with timeout in executor
-    if symbol not in historical_data or not historical_data[symbol]:
-        logger.info(f"Fetching fresh historical data for {symbol}")
-        loop = asyncio.get_event_loop()
-        
-        try:
-            # ✅ Add timeout wrapper
-            hist_data = await asyncio.wait_for(
-                loop.run_in_executor(executor, fetch_historical_intraday_data, symbol, None),
-                timeout=10.0
-            )
-
-            if symbol not in historical_data:
-                historical_data[symbol] = deque(maxlen=MAX_HISTORY_POINTS)
-
-            for data_point in hist_data:
-                historical_data[symbol].append(data_point)
-                
-        except asyncio.TimeoutError:
-            logger.error(f"⏱️ Timeout fetching historical data for {symbol}")
-        except Exception as e:
-            logger.error(f"Error fetching historical data: {e}")
-    else:
-        logger.info(f"Using cached historical data for {symbol} ({len(historical_data[symbol])} points)")
+    try:
+        await ensure_history(symbol, timeout=10.0)
+    except asyncio.TimeoutError:
+        logger.error(f"⏱️ Timeout fetching historical data for {symbol}")
+    except Exception as e:
+        logger.error(f"Error fetching historical data: {e}")
 
     # Subscribe to real-time updates
     if fyers and hasattr(fyers, 'subscribe') and callable(fyers.subscribe):
@@ -562,27 +826,20 @@ async def subscribe(sid, data):
     # Send all available data to client
     if symbol in historical_data and historical_data[symbol]:
         logger.info(f"Sending {len(historical_data[symbol])} historical data points for {symbol}")
-        hist_data_list = list(historical_data[symbol])
-        await sio.emit('historicalData', {
-            'symbol': symbol,
-            'data': hist_data_list
-        }, room=sid)
+        event = await rows_event(sid, symbol, historical_data[symbol], tag_records=True)
+        await sio.emit('historicalData', event, room=sid)
 
-    if symbol in ohlc_data and ohlc_data[symbol]:
-        logger.info(f"Sending {len(ohlc_data[symbol])} OHLC data points for {symbol}")
-        await sio.emit('ohlcData', {
-            'symbol': symbol,
-            'data': list(ohlc_data[symbol])
-        }, room=sid)
+    if symbol in ohlc_data and ohlc_data[symbol]['1m']:
+        logger.info(f"Sending {len(ohlc_data[symbol]['1m'])} OHLC data points for {symbol}")
+        await sio.emit('ohlcData', await rows_event(sid, symbol, ohlc_data[symbol]['1m']), room=sid)
 
     if symbol in chart_updates and chart_updates[symbol]:
         logger.info(f"Sending {len(chart_updates[symbol])} cached chart updates for {symbol}")
-        await sio.emit('chartUpdatesHistory', {
-            'symbol': symbol,
-            'data': list(chart_updates[symbol])
-        }, room=sid)
+        await sio.emit('chartUpdatesHistory', await rows_event(sid, symbol, chart_updates[symbol], tag_records=True),
+                       room=sid)
 
-    return {'success': True, 'symbol': symbol, 'cached_points': len(historical_data.get(symbol, []))}
+    return {'success': True, 'symbol': symbol, 'cached_points': len(historical_data.get(symbol, [])),
+            'indicators': indicator_keys}
 
 
 # ✅ NEW: Batch subscription endpoint with rate limiting
@@ -604,6 +861,14 @@ async def subscribe_companies(sid, data):
     
     if not auth_initialized:
         return {'success': False, 'error': 'Authentication not initialized', 'count': 0}
+
+    indicator_keys = []
+    if 'indicators' in data:
+        try:
+            for symbol in symbols:
+                indicator_keys = indicator_registry.watch(sid, symbol, data['indicators'])
+        except ValueError as e:
+            return {'success': False, 'error': str(e), 'count': 0}
     
     logger.info(f"📥 Client {sid} subscribing to {len(symbols)} symbols")
     
@@ -625,6 +890,7 @@ async def subscribe_companies(sid, data):
                     if symbol not in symbol_to_clients:
                         symbol_to_clients[symbol] = set()
                     symbol_to_clients[symbol].add(sid)
+                    await join_symbol(sid, symbol)
                     
                     symbol_subscriptions[symbol] += 1
                     active_symbols.add(symbol)
@@ -671,6 +937,7 @@ async def subscribe_companies(sid, data):
             'success': True,
             'count': subscribed_count,
             'failed': failed_symbols,
+            'indicators': indicator_keys,
             'message': f'Subscribed to {subscribed_count} symbols'
         }
         
@@ -689,42 +956,20 @@ async def send_batch_historical_data(sid, symbols):
     Send historical data for symbols in background without blocking main thread.
     """
     try:
+        for start in range(0, len(symbols), WARM_START_CHUNK):
+            # Fetch (or backfill) a chunk concurrently, 10 second timeout per symbol
+            await warm_start(symbols[start:start + WARM_START_CHUNK], timeout=10.0)
+
         for symbol in symbols:
             try:
-                # Check if data already exists
-                if symbol not in historical_data or len(historical_data[symbol]) == 0:
-                    # Fetch with timeout
-                    loop = asyncio.get_event_loop()
-                    
-                    future = loop.run_in_executor(
-                        executor,
-                        fetch_historical_intraday_data,
-                        symbol,
-                        None
-                    )
-                    
-                    # 10 second timeout per symbol
-                    hist_data = await asyncio.wait_for(future, timeout=10.0)
-                    
-                    if symbol not in historical_data:
-                        historical_data[symbol] = deque(maxlen=MAX_HISTORY_POINTS)
-                    
-                    for data_point in hist_data:
-                        historical_data[symbol].append(data_point)
-                
                 # Emit data if available
                 if symbol in historical_data and len(historical_data[symbol]) > 0:
-                    hist_data_list = list(historical_data[symbol])
-                    await sio.emit('historicalData', {
-                        'symbol': symbol,
-                        'data': hist_data_list
-                    }, room=sid)
+                    event = await rows_event(sid, symbol, historical_data[symbol], tag_records=True)
+                    await sio.emit('historicalData', event, room=sid)
                 
                 # Small delay to prevent socket flooding
                 await asyncio.sleep(0.05)
                 
-            except asyncio.TimeoutError:
-                logger.warning(f"⏱️ Timeout fetching historical data for {symbol}")
             except Exception as e:
                 logger.error(f"Error sending historical data for {symbol}: {e}")
         
@@ -780,6 +1025,10 @@ async def unsubscribe(sid, data):
 
     if sid in clients:
         clients[sid]['subscriptions'].discard(symbol)
+    indicator_registry.unwatch(sid, symbol)
+    await leave_symbol(sid, symbol)
+    if sid in clients and clients[sid]['delta']:
+        clients[sid]['delta'].reset([symbol])
 
     if symbol in symbol_to_clients:
         symbol_to_clients[symbol].discard(sid)
@@ -791,6 +1040,135 @@ async def unsubscribe(sid, data):
     return {'success': True, 'symbol': symbol}
 
 
+@sio.event
+async def set_batch_mode(sid, data):
+    """
+    Opt in to (``enabled: true``) or out of batched delivery. In batch mode
+    the client gets one ``marketBatch`` per flush covering every subscribed
+    symbol that changed, instead of marketDataUpdate/chartUpdate per symbol.
+    """
+    if sid not in clients:
+        return {'success': False, 'error': 'Client not registered'}
+    enabled = bool((data or {}).get('enabled', True))
+    if enabled and clients[sid]['delta']:
+        return {'success': False, 'error': 'Disable delta mode first'}
+    if clients[sid]['batch'] != enabled:
+        clients[sid]['batch'] = enabled
+        await rejoin_symbols(sid)
+        logger.info(f"Client {sid} {'enabled' if enabled else 'disabled'} batch mode")
+    return {'success': True, 'enabled': enabled, 'fields': list(BATCH_FIELDS)}
+
+
+@sio.event
+async def set_delta_mode(sid, data):
+    """
+    Opt in to (``enabled: true``) or out of delta-encoded quotes. In delta
+    mode marketDataUpdate/chartUpdate are replaced by ``quoteDelta``
+    messages ``{seq, symbol, data[, keyframe: true]}`` where ``data`` holds
+    only the fields changed since the previous message for that symbol
+    (``None`` for a removed field). On a gap in ``seq`` call request_keyframe.
+    """
+    if sid not in clients:
+        return {'success': False, 'error': 'Client not registered'}
+    enabled = bool((data or {}).get('enabled', True))
+    if enabled and clients[sid]['batch']:
+        return {'success': False, 'error': 'Disable batch mode first'}
+    if bool(clients[sid]['delta']) != enabled:
+        clients[sid]['delta'] = DeltaEncoder(DELTA_KEYFRAME_INTERVAL) if enabled else None
+        await rejoin_symbols(sid)
+        logger.info(f"Client {sid} {'enabled' if enabled else 'disabled'} delta mode")
+    return {'success': True, 'enabled': enabled, 'keyframeInterval': DELTA_KEYFRAME_INTERVAL}
+
+
+@sio.event
+async def request_keyframe(sid, data):
+    """Resend ``symbols`` (default: every subscription) as keyframes with the next delivery."""
+    encoder = clients[sid]['delta'] if sid in clients else None
+    if encoder is None:
+        return {'success': False, 'error': 'Delta mode is not enabled'}
+    subscriptions = clients[sid]['subscriptions']
+    symbols = [s for s in ((data or {}).get('symbols') or subscriptions) if s in subscriptions]
+    delta_stats['keyframe_requests'] += 1
+    encoder.reset(symbols)
+    for symbol in symbols:
+        if symbol in published_quotes:
+            clients[sid]['outbox'].mark(symbol)
+    return {'success': True, 'symbols': symbols, 'seq': encoder.seq}
+
+
+@sio.event
+async def subscribe_topk(sid, data):
+    """
+    Follow live rankings. ``boards`` lists board ids such as
+    ``changePercent:top`` (default: all). The response carries the current
+    boards; afterwards only rank changes arrive as ``topkUpdate``. A client
+    that fell behind gets a ``topkUpdate`` with ``snapshot: true`` and its
+    full boards, as in this response, instead.
+    """
+    boards = (data or {}).get('boards') or topk_engine.board_ids()
+    unknown = [board for board in boards if board not in topk_engine.board_ids()]
+    if unknown:
+        return {'success': False, 'error': f"Unknown boards: {', '.join(unknown)}"}
+
+    for board in boards:
+        topk_clients[board].add(sid)
+    logger.info(f"Client {sid} following {len(boards)} top-K boards")
+    return {
+        'success': True,
+        'k': TOPK_SIZE,
+        'boards': {board: topk_engine.board(board) for board in boards}
+    }
+
+
+@sio.event
+async def unsubscribe_topk(sid, data):
+    boards = (data or {}).get('boards') or list(topk_clients)
+    for board in boards:
+        if board in topk_clients:
+            topk_clients[board].discard(sid)
+    return {'success': True, 'boards': boards}
+
+
+@sio.event
+async def get_correlation(sid, data):
+    """
+    Correlation and beta matrices of 1m log returns over the last ``window``
+    bars for ``symbols`` (default: the client's subscriptions). The client
+    then receives ``correlationUpdate`` after every 1m bar until it calls
+    stop_correlation or asks for another basket.
+    """
+    data = data or {}
+    symbols = data.get('symbols')
+    if not symbols and sid in clients:
+        symbols = sorted(clients[sid]['subscriptions'])
+    symbols = list(dict.fromkeys(symbols or []))
+    if len(symbols) < 2:
+        return {'success': False, 'error': 'At least two symbols are required'}
+    if len(symbols) > MAX_CORRELATION_SYMBOLS:
+        return {'success': False, 'error': f"At most {MAX_CORRELATION_SYMBOLS} symbols are supported"}
+
+    try:
+        window = int(data.get('window', CORRELATION_WINDOW))
+    except (TypeError, ValueError):
+        return {'success': False, 'error': 'window must be an integer'}
+    if not 2 <= window <= MAX_CORRELATION_WINDOW:
+        return {'success': False, 'error': f"window must be between 2 and {MAX_CORRELATION_WINDOW}"}
+
+    basket = correlation_registry.watch(sid, symbols, window)
+    return dict(basket.payload(), success=True)
+
+
+@sio.event
+async def stop_correlation(sid, data):
+    correlation_registry.unwatch(sid)
+    return {'success': True}
+
+
+@sio.event
+async def get_breadth(sid, data):
+    return dict(breadth_tracker.snapshot(), success=True, timestamp=clock())
+
+
 @sio.event
 async def get_trading_status(sid, data):
     start_time, end_time = get_trading_hours()
@@ -802,7 +1180,19 @@ async def get_trading_status(sid, data):
         'is_market_day': datetime.datetime.now(INDIA_TZ).weekday() < 5,
         'active_symbols': list(active_symbols),
         'total_data_points': sum(len(data) for data in historical_data.values()),
-        'auth_status': auth_initialized
+        'auth_status': auth_initialized,
+        'ingest': ingest_queue.stats(),
+        'retention': retention_stats,
+        'loop_lag': loop_lag_stats,
+        'indicator_registry': indicator_registry.stats(),
+        'volume': volume_tracker.stats(),
+        'topk': topk_engine.stats(),
+        'correlation': correlation_registry.stats(),
+        'indicator_cache': indicator_cache.stats(),
+        'batch': batch_stats,
+        'delta': delta_stats,
+        'outbound': outbound_report(),
+        'codecs': {codec: sum(1 for c in clients.values() if c['codec'] == codec) for codec in wire_codec.available()}
     }
 
 
@@ -824,17 +1214,25 @@ async def get_historical_data_for_date(sid, data):
         loop = asyncio.get_event_loop()
         
         # ✅ Add timeout
-        hist_data = await asyncio.wait_for(
-            loop.run_in_executor(executor, fetch_historical_intraday_data, symbol, date),
+        candles = await asyncio.wait_for(
+            loop.run_in_executor(executor, fetch_intraday_candles, symbol, date),
             timeout=15.0
         )
         
-        return {
+        response = {
             'success': True,
             'symbol': symbol,
             'date': date,
-            'data': hist_data
+            'data': candle_records(symbol, candles)
         }
+        if data.get('indicators'):
+            today = datetime.datetime.now(INDIA_TZ).strftime('%Y-%m-%d')
+            response['indicators'] = indicator_series(
+                symbol, date, data['indicators'], ohlc_rows(candles), last_open=date == today
+            )
+        return response
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
     except asyncio.TimeoutError:
         logger.error(f"⏱️ Timeout fetching historical data for {symbol} on {date}")
         return {'success': False, 'error': 'Request timeout'}
@@ -892,211 +1290,527 @@ async def get_daily_data(sid, data):
         return {'success': False, 'error': str(e)}
 
 
+def indicator_series(symbol, source, specs, bars, since=None, last_open=True):
+    """``{key: [{'timestamp', ...values}]}`` for each requested indicator, via indicator_cache."""
+    if isinstance(specs, (str, dict)):
+        specs = [specs]
+    series = {}
+    for spec in specs:
+        key, records = indicator_cache.records(symbol, source, spec, bars, since, last_open)
+        series[key] = records
+    return series
+
+
+@sio.event
+async def get_ohlc(sid, data):
+    """Serve live candles at any maintained resolution straight from memory."""
+    symbol = data.get('symbol')
+    resolution = normalize_resolution(data.get('resolution', '1m'))
+    since = data.get('since')
+
+    if not symbol:
+        return {'success': False, 'error': 'No symbol provided'}
+
+    if not resolution:
+        return {'success': False, 'error': f"Unsupported resolution: {data.get('resolution')}"}
+
+    if since is not None:
+        try:
+            since = int(since)
+        except (TypeError, ValueError):
+            return {'success': False, 'error': f"Invalid since: {since!r} (epoch seconds expected)"}
+
+    restore_symbol(symbol)
+    if symbol not in ohlc_data:
+        return {'success': False, 'error': f'No live data for {symbol}'}
+
+    try:
+        rows = ohlc_data[symbol].rows(resolution, since)
+        response = dict(await rows_event(sid, symbol, ohlc_data[symbol][resolution], rows),
+                        success=True, resolution=resolution)
+        if data.get('indicators'):
+            response['indicators'] = indicator_series(
+                symbol, resolution, data['indicators'], ohlc_data[symbol][resolution].view(), since
+            )
+        return response
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+    except Exception as e:
+        logger.error(f"Error serving OHLC for {symbol}: {e}")
+        return {'success': False, 'error': str(e)}
+
+
 # ============ Data Storage and Processing ============
 def store_historical_data(symbol, data_point):
-    """Store data for ALL active symbols"""
+    """
+    Store data for ALL active symbols; returns the candle events the tick
+    produced. The stores are time-ordered (eviction and range queries
+    binary-search them), so a tick older than the newest stored point is
+    not stored; VolumeTracker counts it as out of order. A tick without a
+    price is not stored either: it would become a 0 in the chart and the
+    candles.
+    """
+    if data_point.get('ltp') is None:
+        return []
+
     if symbol not in historical_data:
-        historical_data[symbol] = deque(maxlen=MAX_HISTORY_POINTS)
+        historical_data[symbol] = tick_buffer(MAX_HISTORY_POINTS)
 
     if 'timestamp' not in data_point:
-        data_point['timestamp'] = int(time.time())
+        data_point['timestamp'] = int(clock())
+
+    last = historical_data[symbol].last()
+    if last is not None and data_point['timestamp'] < last['timestamp']:
+        return []
 
-    historical_data[symbol].append(data_point)
-    update_ohlc_data(symbol, data_point)
+    historical_data[symbol].append_dict(data_point)
+    events = update_ohlc_data(symbol, data_point)
 
     if symbol not in chart_updates:
-        chart_updates[symbol] = deque(maxlen=MAX_CHART_UPDATES)
+        chart_updates[symbol] = chart_buffer(MAX_CHART_UPDATES)
 
-    chart_update = {
-        'symbol': symbol,
-        'price': data_point['ltp'],
-        'timestamp': data_point['timestamp'],
-        'volume': data_point.get('volume', 0),
-        'change': data_point.get('change', 0),
-        'changePercent': data_point.get('changePercent', 0)
-    }
-    chart_updates[symbol].append(chart_update)
+    chart_updates[symbol].append((
+        data_point['timestamp'],
+        data_point['ltp'] or 0,
+        data_point.get('volume') or 0,
+        data_point.get('change') or 0,
+        data_point.get('changePercent') or 0
+    ))
+    return events
 
 
 def update_ohlc_data(symbol, data_point):
     if symbol not in ohlc_data:
-        ohlc_data[symbol] = deque(maxlen=MAX_HISTORY_POINTS)
-
-    timestamp = data_point['timestamp']
-    price = data_point['ltp']
-
-    minute_timestamp = (timestamp // 60) * 60
-
-    if not ohlc_data[symbol] or ohlc_data[symbol][-1]['timestamp'] < minute_timestamp:
-        ohlc_data[symbol].append({
-            'timestamp': minute_timestamp,
-            'open': price,
-            'high': price,
-            'low': price,
-            'close': price,
-            'volume': data_point.get('volume', 0)
-        })
-    else:
-        current_candle = ohlc_data[symbol][-1]
-        current_candle['high'] = max(current_candle['high'], price)
-        current_candle['low'] = min(current_candle['low'], price)
-        current_candle['close'] = price
-        current_candle['volume'] = data_point.get('volume', current_candle['volume'])
+        ohlc_data[symbol] = CandleRollup(MAX_HISTORY_POINTS)
 
+    events = ohlc_data[symbol].add_tick(
+        data_point['timestamp'], data_point['ltp'] or 0,
+        data_point.get('tradedVolume') or 0, data_point.get('tradedValue') or 0.0
+    )
+    return [(symbol, resolution, kind, candle) for resolution, kind, candle in events]
 
-def calculate_indicators_optimized(symbol, init=False):
-    if symbol not in ohlc_data or len(ohlc_data[symbol]) < 20:
-        return {}
 
-    latest_close = ohlc_data[symbol][-1]['close']
+def seed_volume(symbol):
+    """Start a symbol's session volume/VWAP from its daily candle, unless ticks already did."""
+    if symbol in volume_tracker or symbol not in ohlc_data:
+        return
+    day = ohlc_data[symbol]['1D'].last()
+    # An older day's candle says nothing about today's cumulative volume.
+    if day is not None and day['volume'] and day['timestamp'] == session_open(int(clock())):
+        volume_tracker.seed(symbol, int(day['timestamp']), int(day['volume']), float(day['turnover']))
+
+
+def relative_volume(symbol):
+    """Average volume of the last few 1m bars over the session's average per 1m bar."""
+    rollup = ohlc_data.get(symbol)
+    if rollup is None:
+        return None
+    day = rollup['1D'].last()
+    if day is None or not day['volume']:
+        return None
+    session = rollup['1m'].since(day['timestamp'])
+    if len(session) < RELATIVE_VOLUME_BARS:
+        return None
+    recent = session['volume'][-RELATIVE_VOLUME_BARS:].sum() / RELATIVE_VOLUME_BARS
+    return float(recent * len(session) / day['volume'])
+
+
+def rank_symbol(symbol, data):
+    """Feed one flushed symbol's payload into the top-K boards."""
+    topk_engine.update(symbol, {
+        'changePercent': data.get('changePercent'),
+        'dollarVolume': data.get('dollarVolume'),
+        'relativeVolume': relative_volume(symbol),
+        'volume': data.get('volume'),
+        'rsi_14': data.get('rsi_14'),
+    })
+
+
+async def emit_topk_deltas():
+    """
+    Send each follower the rank changes of the boards it follows. A lagging
+    follower gets its full boards through its outbox instead, so a newer
+    snapshot replaces an unsent one and deltas resume once it caught up.
+    """
+    deltas = topk_engine.deltas()
+    if not deltas:
+        return
+    per_client = defaultdict(dict)
+    for board, delta in deltas.items():
+        for sid in topk_clients.get(board, ()):
+            per_client[sid][board] = delta
+
+    timestamp = clock()
+    snapshots = {}
+    for sid, boards in per_client.items():
+        if sid in lagging_clients and sid in clients:
+            followed = [board for board, sids in topk_clients.items() if sid in sids]
+            for board in followed:
+                if board not in snapshots:
+                    snapshots[board] = topk_engine.board(board)
+            clients[sid]['outbox'].mark(('topkUpdate',), {
+                'boards': {board: snapshots[board] for board in followed},
+                'snapshot': True,
+                'timestamp': timestamp
+            })
+            continue
+        try:
+            await sio.emit('topkUpdate', {'boards': boards, 'timestamp': timestamp}, room=sid)
+        except Exception as e:
+            logger.error(f"Error sending top-K update to {sid}: {e}")
 
-    if symbol not in cached_indicators or init:
-        closes = np.array([candle['close'] for candle in ohlc_data[symbol]])
 
-        sma_20 = np.mean(closes[-20:]) if len(closes) >= 20 else latest_close
+def emit_correlation_updates():
+    """Queue the new matrices of baskets that finished a 1m bar; a newer one replaces an unsent one."""
+    for sids, payload in correlation_registry.drain_updates():
+        for sid in sids:
+            if sid in clients:
+                clients[sid]['outbox'].mark(('correlationUpdate',), payload)
 
-        if len(closes) >= 9:
-            ema_9 = closes[0]
-            alpha = 2 / (9 + 1)
-            for price in closes[1:]:
-                ema_9 = alpha * price + (1 - alpha) * ema_9
-        else:
-            ema_9 = latest_close
 
-        if len(closes) >= 15:
-            changes = np.diff(closes)
-            gains = np.where(changes > 0, changes, 0)
-            losses = np.where(changes < 0, -changes, 0)
+# ============ Bar events ============
+# resolution -> listeners called once per flush with [(symbol, kind, candle), ...]
+bar_listeners = defaultdict(list)
 
-            avg_gain = np.mean(gains[-14:])
-            avg_loss = np.mean(losses[-14:])
 
-            if avg_loss == 0:
-                rsi = 100
-            else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-        else:
-            rsi = 50
-
-        cached_indicators[symbol] = {
-            'sma_20': float(sma_20),
-            'ema_9': float(ema_9),
-            'rsi_14': float(rsi),
-            'avg_gain': avg_gain if len(closes) >= 15 else 0,
-            'avg_loss': avg_loss if len(closes) >= 15 else 0,
-            'prev_close': latest_close
-        }
-    else:
-        cache = cached_indicators[symbol]
-        prev_close = cache['prev_close']
+def publish_bar_events(events):
+    """Hand each listener the closed/updated candle events of its resolution."""
+    by_resolution = defaultdict(list)
+    for symbol, resolution, kind, candle in events:
+        if resolution in bar_listeners:
+            by_resolution[resolution].append((symbol, kind, candle))
 
-        if len(ohlc_data[symbol]) >= 20:
-            old_sma = cache['sma_20']
-            cache['sma_20'] = old_sma + (latest_close - old_sma) / 20
+    for resolution, batch in by_resolution.items():
+        for listener in bar_listeners[resolution]:
+            try:
+                listener(batch)
+            except Exception as e:
+                logger.error(f"Error in {resolution} bar listener {listener.__name__}: {e}")
 
-        alpha = 2 / (9 + 1)
-        cache['ema_9'] = alpha * latest_close + (1 - alpha) * cache['ema_9']
 
-        change = latest_close - prev_close
-        gain = max(0, change)
-        loss = max(0, -change)
+def seed_indicators(symbols, states=None):
+    """Initialise indicators of every symbol with enough 1m candles, in one vectorized call."""
+    ready, closes, bar_times, ready_states = [], [], [], []
+    for i, symbol in enumerate(symbols):
+        rollup = ohlc_data.get(symbol)
+        if rollup is None or len(rollup['1m']) < SMA_PERIOD:
+            continue
+        candles = rollup['1m'].view()
+        ready.append(symbol)
+        closes.append(candles['close'])
+        bar_times.append(candles['timestamp'][-1])
+        ready_states.append(states[i] if states else None)
 
-        cache['avg_gain'] = (cache['avg_gain'] * 13 + gain) / 14
-        cache['avg_loss'] = (cache['avg_loss'] * 13 + loss) / 14
+    indicator_engine.seed_many(ready, closes, bar_times, ready_states)
 
-        if cache['avg_loss'] == 0:
-            cache['rsi_14'] = 100
-        else:
-            rs = cache['avg_gain'] / cache['avg_loss']
-            cache['rsi_14'] = 100 - (100 / (1 + rs))
 
-        cache['prev_close'] = latest_close
+def on_minute_bars(events):
+    """Commit closed 1m bars to indicator state, then preview the open ones; one vectorized step each."""
+    closed = ([], [], [])
+    updated = ([], [], [])
+    for symbol, kind, candle in events:
+        if symbol not in indicator_engine:
+            if kind == BAR_UPDATED:
+                seed_indicators([symbol])
+            continue
+        target = closed if kind == BAR_CLOSED else updated
+        target[0].append(symbol)
+        target[1].append(candle['close'])
+        target[2].append(candle['timestamp'])
+
+    indicator_engine.commit(*closed)
+    indicator_engine.preview(*updated)
+
+
+bar_listeners['1m'].append(on_minute_bars)
+bar_listeners['1m'].append(indicator_registry.on_bars)
+bar_listeners['1m'].append(correlation_registry.on_bars)
+
 
+# ============ Background Tasks ============
+def market_batch(sid, symbols):
+    """Columnar 'marketBatch' payload of ``symbols`` for one batch-mode client."""
+    payload = {'symbols': symbols}
+    rows = [published_quotes[symbol] for symbol in symbols]
+    for field in BATCH_FIELDS:
+        payload[field] = [row.get(field) for row in rows]
+
+    extras = [indicator_registry.values_for(sid, symbol) for symbol in symbols]
+    keys = dict.fromkeys(key for extra in extras if extra for key in extra)
+    if keys:
+        payload['indicators'] = {key: [extra.get(key) if extra else None for extra in extras] for key in keys}
+    return payload
+
+
+def chart_update(symbol, data):
     return {
-        'sma_20': cached_indicators[symbol]['sma_20'],
-        'ema_9': cached_indicators[symbol]['ema_9'],
-        'rsi_14': cached_indicators[symbol]['rsi_14']
+        'symbol': symbol,
+        'price': data['ltp'],
+        'timestamp': data['timestamp'],
+        'volume': data.get('volume', 0),
+        'change': data.get('change', 0),
+        'changePercent': data.get('changePercent', 0)
     }
 
 
-# ============ Background Tasks ============
-async def emit_real_time_data():
-    """Enhanced to emit data for all symbols and manage background collection"""
-    global running
-    while running:
+async def emit_quote_delta(sid, encoder, symbol, now):
+    extra = indicator_registry.values_for(sid, symbol)
+    data = published_quotes[symbol]
+    message = encoder.encode(symbol, dict(data, indicators=extra) if extra else data, now)
+    if message is None:
+        return
+    await sio.emit('quoteDelta', message, room=sid)
+    delta_stats['messages'] += 1
+    if message.get('keyframe'):
+        delta_stats['keyframes'] += 1
+
+
+# ============ Per-client delivery ============
+def transport_backlog(sid):
+    """Packets engine.io has queued for ``sid`` that the client has not taken yet."""
+    eio_sid = sio.manager.eio_sid_from_sid(sid, '/')
+    socket = sio.eio.sockets.get(eio_sid) if eio_sid else None
+    return socket.queue.qsize() if socket is not None else 0
+
+
+def refresh_lagging():
+    """Move clients in and out of ``lagging_clients`` by transport backlog, with hysteresis."""
+    for sid, client in clients.items():
+        backlog = transport_backlog(sid)
+        if sid not in lagging_clients:
+            if backlog > OUTBOUND_HIGH_WATER:
+                lagging_clients.add(sid)
+                outbound_stats['lag_events'] += 1
+                logger.warning(f"🐢 Client {sid} is falling behind ({backlog} packets queued)")
+        elif backlog <= OUTBOUND_LOW_WATER and not client['outbox']:
+            lagging_clients.discard(sid)
+            logger.info(f"✅ Client {sid} caught up")
+
+
+async def send_modes(symbols):
+    """
+    Send the flushed symbols to batch/delta clients: directly to a client
+    that keeps up, through its outbox (conflated) to one that lags.
+    """
+    direct = defaultdict(list)
+    for symbol in symbols:
+        for sid in symbol_to_clients.get(symbol, ()):
+            client = clients.get(sid)
+            if client is None or not (client['batch'] or client['delta']):
+                continue
+            if sid in lagging_clients:
+                client['outbox'].mark(symbol)
+            else:
+                direct[sid].append((symbol, None))
+
+    for sid, items in direct.items():
         try:
-            current_time = time.time()
+            await deliver(sid, items)
+        except Exception as e:
+            logger.error(f"Error sending to client {sid}: {e}")
+
+
+async def deliver(sid, items):
+    """Send what ``sid``'s outbox collected, rendered from the latest published quotes."""
+    client = clients.get(sid)
+    if client is None:
+        return
+    symbols = []
+    for key, payload in items:
+        if isinstance(key, tuple):
+            await sio.emit(key[0], payload, room=sid)
+        elif key in client['subscriptions'] and key in published_quotes:
+            symbols.append(key)
+    if not symbols:
+        return
+
+    if client['batch']:
+        frame = wire_codec.pack_frame(market_batch(sid, symbols), BATCH_FIELDS, client['codec'])
+        await sio.emit('marketBatch', frame, room=sid)
+        batch_stats['frames'] += 1
+        batch_stats['rows'] += len(symbols)
+    elif client['delta']:
+        now = clock()
+        for symbol in symbols:
+            await emit_quote_delta(sid, client['delta'], symbol, now)
+    else:
+        # A lagging room member: its rooms skip it until it catches up.
+        for symbol in symbols:
+            data = published_quotes[symbol]
+            extra = indicator_registry.values_for(sid, symbol)
+            await sio.emit('marketDataUpdate', dict(data, indicators=extra) if extra else data, room=sid)
+            await sio.emit('chartUpdate', chart_update(symbol, data), room=sid)
+        outbound_stats['caught_up_updates'] += len(symbols)
+
+
+async def client_sender(sid, outbox):
+    """Drain ``sid``'s outbox whenever its transport has room; marks meanwhile are conflated."""
+    while sid in clients:
+        await outbox.wait()
+        if transport_backlog(sid) > OUTBOUND_HIGH_WATER:
+            outbox.stalls += 1
+            while sid in clients and transport_backlog(sid) > OUTBOUND_HIGH_WATER:
+                await asyncio.sleep(OUTBOUND_RETRY)
+        try:
+            await deliver(sid, outbox.take())
+        except Exception as e:
+            logger.error(f"Error sending to client {sid}: {e}")
+
+
+def outbound_report(limit=20):
+    """
+    Outbound queue depth and conflation per client, the furthest behind
+    first; delta-mode clients also report their encoder's sequence and
+    keyframe/delta counts.
+    """
+    rows = [dict(client['outbox'].stats(), sid=sid, backlog=transport_backlog(sid), lagging=sid in lagging_clients,
+                 delta=client['delta'].stats() if client['delta'] else None)
+            for sid, client in clients.items()]
+    rows.sort(key=lambda row: row['backlog'] + row['pending'], reverse=True)
+    return dict(outbound_stats, high_water=OUTBOUND_HIGH_WATER, lagging=len(lagging_clients), clients=rows[:limit])
+
+
+async def broadcast_quote(symbol):
+    """One broadcast per quote room; lagging members are skipped and get the symbol via their outbox."""
+    rooms = quote_rooms.get(symbol)
+    if not rooms:
+        return
+    data = published_quotes[symbol]
+    skipped = []
+    try:
+        # One broadcast per room: the packet is encoded once for all its viewers.
+        for room, (keys, members) in list(rooms.items()):
+            behind = [sid for sid in members if sid in lagging_clients] if lagging_clients else []
+            for sid in behind:
+                clients[sid]['outbox'].mark(symbol)
+            skipped.extend(behind)
+            if len(behind) == len(members):
+                continue
+            extra = indicator_registry.values(symbol, keys)
+            payload = dict(data, indicators=extra) if extra else data
+            await sio.emit('marketDataUpdate', payload, room=room, skip_sid=behind or None)
+
+        await sio.emit('chartUpdate', chart_update(symbol, data), room=chart_room(symbol), skip_sid=skipped or None)
+
+    except Exception as e:
+        logger.error(f"Error sending data for {symbol}: {e}")
+
 
-            cleanup_old_data()
+async def flush_pending():
+    """One micro-batch pass: store, publish and send every symbol that ticked since the last one."""
+    global dirty_symbols
+    flush_event.clear()
+    symbols, dirty_symbols = dirty_symbols, set()
 
-            for symbol in list(pending_data.keys()):
-                if symbol in pending_data:
-                    data = pending_data[symbol].copy()
+    flushed = []
+    bar_events = []
+    for symbol in symbols:
+        data = pending_data.get(symbol)
+        if data is not None:
+            bar_events.extend(store_historical_data(symbol, data))
+            flushed.append(symbol)
 
-                    if symbol in symbol_to_clients and symbol_to_clients[symbol]:
-                        if current_time - last_emit_time[symbol] >= REAL_TIME_INTERVAL:
-                            for sid in list(symbol_to_clients[symbol]):
-                                try:
-                                    await sio.emit('marketDataUpdate', data, room=sid)
+    publish_bar_events(bar_events)
+    emit_correlation_updates()
 
-                                    chart_update = {
-                                        'symbol': symbol,
-                                        'price': data['ltp'],
-                                        'timestamp': data['timestamp'],
-                                        'volume': data.get('volume', 0),
-                                        'change': data.get('change', 0),
-                                        'changePercent': data.get('changePercent', 0)
-                                    }
-                                    await sio.emit('chartUpdate', chart_update, room=sid)
+    # Publish every flushed quote before anything is sent, so senders
+    # never render a tick that has not been through this pass.
+    for symbol in flushed:
+        data = pending_data[symbol]
+        data.update(indicator_engine.get(symbol))
+        data.update(volume_tracker.get(symbol))
+        rank_symbol(symbol, data)
+        breadth_tracker.update(symbol, data)
+        published_quotes[symbol] = data
 
-                                except Exception as e:
-                                    logger.error(f"Error sending data to client {sid}: {e}")
+    refresh_lagging()
+    await send_modes(flushed)
+    for symbol in flushed:
+        await broadcast_quote(symbol)
 
-                            last_emit_time[symbol] = current_time
+    await emit_topk_deltas()
 
-                    store_historical_data(symbol, data)
 
-            await asyncio.sleep(CHART_UPDATE_INTERVAL)
+async def emit_real_time_data():
+    """Flush symbols that ticked since the last pass, once per micro-batch window."""
+    global running
+    while running:
+        try:
+            await flush_event.wait()
+            await asyncio.sleep(FLUSH_WINDOW)
+            await flush_pending()
 
         except Exception as e:
             logger.error(f"Error in real-time emission: {e}")
             await asyncio.sleep(0.1)
 
 
+async def cleanup_task():
+    global running
+    while running:
+        try:
+            await cleanup_old_data()
+        except Exception as e:
+            logger.error(f"Error in data cleanup: {e}")
+        await asyncio.sleep(RETENTION_SWEEP_INTERVAL)
+
+
+def process_tick_batch(latest_ticks):
+    """Runs on the event loop with the newest raw Fyers message per symbol."""
+    for symbol, message in latest_ticks.items():
+        try:
+            if symbol in snapshot_pending:
+                restore_symbol(symbol)
+            active_symbols.add(symbol)
+
+            simplified_data = {
+                'symbol': symbol,
+                'ltp': message.get('ltp'),
+                'change': message.get('ch'),
+                'changePercent': message.get('chp'),
+                'volume': message.get('vol_traded_today'),
+                'open': message.get('open_price'),
+                'high': message.get('high_price'),
+                'low': message.get('low_price'),
+                'close': message.get('prev_close_price'),
+                'bid': message.get('bid_price'),
+                'ask': message.get('ask_price'),
+                'timestamp': message.get('last_traded_time') or int(clock())
+            }
+
+            quantity, value = volume_tracker.update(
+                symbol, simplified_data['timestamp'], simplified_data['volume'], simplified_data['ltp']
+            )
+            if symbol in dirty_symbols:
+                # Not flushed yet: the candles still need the earlier quantity.
+                previous = pending_data[symbol]
+                quantity += previous['tradedVolume']
+                value += previous['tradedValue']
+            simplified_data['tradedVolume'] = quantity
+            simplified_data['tradedValue'] = value
+
+            pending_data[symbol] = simplified_data
+            dirty_symbols.add(symbol)
+        except Exception as e:
+            logger.error(f"Error processing tick for {symbol}: {e}")
+
+    if dirty_symbols:
+        flush_event.set()
+
+
+ingest_queue = TickIngestQueue(process_tick_batch)
+
+
 def onmessage(message):
-    """Handle WebSocket messages from Fyers"""
+    """Handle WebSocket messages from Fyers (runs on the SDK thread)."""
     if not isinstance(message, dict) or 'symbol' not in message:
         return
 
-    symbol = message['symbol']
-
     if message.get('type') == 'sub':
-        logger.info(f"Subscription confirmation: {symbol}")
+        logger.info(f"Subscription confirmation: {message['symbol']}")
         return
 
-    active_symbols.add(symbol)
-
-    simplified_data = {
-        'symbol': symbol,
-        'ltp': message.get('ltp'),
-        'change': message.get('ch'),
-        'changePercent': message.get('chp'),
-        'volume': message.get('vol_traded_today'),
-        'open': message.get('open_price'),
-        'high': message.get('high_price'),
-        'low': message.get('low_price'),
-        'close': message.get('prev_close_price'),
-        'bid': message.get('bid_price'),
-        'ask': message.get('ask_price'),
-        'timestamp': message.get('last_traded_time') or int(time.time())
-    }
-
-    indicators = calculate_indicators_optimized(symbol)
-    if indicators:
-        simplified_data.update(indicators)
-
-    pending_data[symbol] = simplified_data
+    ingest_queue.put(message['symbol'], message)
 
 
 def onerror(error):
@@ -1125,6 +1839,141 @@ def onopen():
             logger.error(f"Error subscribing to symbols: {e}")
 
 
+def load_snapshot_index():
+    """Read the snapshot manifest; symbol data is loaded lazily by restore_symbol."""
+    global snapshot_manifest
+    try:
+        snapshot_manifest = read_manifest(SNAPSHOT_DIR)
+    except Exception as e:
+        logger.error(f"❌ Could not read snapshot manifest: {e}")
+        snapshot_manifest = None
+
+    if not snapshot_manifest:
+        return
+
+    symbols = list(snapshot_manifest['symbols'])
+    snapshot_pending.update(symbols)
+    active_symbols.update(symbols)
+    age = time.time() - snapshot_manifest.get('saved_at', 0)
+    logger.info(f"📦 Snapshot with {len(symbols)} symbols found ({age:.0f}s old)")
+
+
+def restore_symbol(symbol):
+    """Load one symbol from the snapshot into the live stores (once)."""
+    if symbol not in snapshot_pending:
+        return
+    snapshot_pending.discard(symbol)
+
+    try:
+        arrays = load_symbol(SNAPSHOT_DIR, snapshot_manifest, symbol)
+    except Exception as e:
+        logger.error(f"Error restoring {symbol} from snapshot: {e}")
+        return
+
+    if len(arrays.get('ticks', ())) and not historical_data.get(symbol):
+        historical_data[symbol] = tick_buffer(MAX_HISTORY_POINTS)
+        historical_data[symbol].extend(arrays['ticks'])
+        backfill_pending[symbol] = int(historical_data[symbol].last()['timestamp'])
+
+    if len(arrays.get('chart', ())) and not chart_updates.get(symbol):
+        chart_updates[symbol] = chart_buffer(MAX_CHART_UPDATES)
+        chart_updates[symbol].extend(arrays['chart'])
+
+    if symbol not in ohlc_data:
+        ohlc_data[symbol] = CandleRollup(MAX_HISTORY_POINTS)
+        ohlc_data[symbol].restore(arrays)
+        seed_volume(symbol)
+
+    indicators = snapshot_manifest.get('indicators', {}).get(symbol)
+    if indicators and symbol not in indicator_engine:
+        seed_indicators([symbol], [indicators])
+
+
+async def save_snapshot():
+    """Write all per-symbol stores to SNAPSHOT_DIR without blocking the loop on disk I/O."""
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+
+    for symbol in list(snapshot_pending):
+        restore_symbol(symbol)
+
+    writer = SnapshotWriter(SNAPSHOT_DIR)
+    await loop.run_in_executor(executor, writer.begin)
+
+    symbols = list(historical_data.keys())
+    for symbol in symbols:
+        # Copy on the loop so the executor never sees a buffer mid-append.
+        arrays = {}
+        if symbol in historical_data:
+            arrays['ticks'] = historical_data[symbol].view().copy()
+        if symbol in chart_updates:
+            arrays['chart'] = chart_updates[symbol].view().copy()
+        if symbol in ohlc_data:
+            arrays.update(ohlc_data[symbol].snapshot())
+        await loop.run_in_executor(executor, writer.write_symbol, symbol, arrays)
+
+    indicators = {
+        symbol: indicator_engine.state(symbol)
+        for symbol in indicator_engine.symbols()
+        if symbol in historical_data
+    }
+    await loop.run_in_executor(executor, writer.commit, indicators)
+    logger.info(f"💾 Snapshot of {len(symbols)} symbols written in {time.perf_counter() - started:.2f}s")
+
+
+async def snapshot_task():
+    global running
+    while running:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        try:
+            await save_snapshot()
+        except Exception as e:
+            logger.error(f"❌ Snapshot error: {e}")
+
+
+async def restore_snapshot_task():
+    """Trickle the rest of the snapshot in after startup, one symbol per loop turn."""
+    for symbol in list(snapshot_pending):
+        restore_symbol(symbol)
+        await asyncio.sleep(0)
+
+
+LOOP_LAG_INTERVAL = 0.1
+loop_lag_stats = {'last_ms': 0.0, 'max_ms': 0.0}
+
+
+async def loop_lag_task():
+    """Measure how late the event loop wakes up; a busy loop delays every client."""
+    global running
+    while running:
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag_ms = max(0.0, (time.perf_counter() - started - LOOP_LAG_INTERVAL) * 1000)
+        loop_lag_stats['last_ms'] = round(lag_ms, 3)
+        loop_lag_stats['max_ms'] = max(loop_lag_stats['max_ms'], round(lag_ms, 3))
+
+
+async def breadth_task():
+    """
+    Broadcast the breadth aggregates every BREADTH_INTERVAL when they
+    changed. Lagging clients are skipped and get the latest aggregates
+    through their outbox.
+    """
+    published = None
+    while running:
+        try:
+            if breadth_tracker.version != published:
+                published = breadth_tracker.version
+                payload = dict(breadth_tracker.snapshot(), timestamp=clock())
+                behind = [sid for sid in lagging_clients if sid in clients]
+                for sid in behind:
+                    clients[sid]['outbox'].mark(('breadth',), payload)
+                await sio.emit('breadth', payload, skip_sid=behind or None)
+        except Exception as e:
+            logger.error(f"Error in breadth broadcast: {e}")
+        await asyncio.sleep(BREADTH_INTERVAL)
+
+
 async def heartbeat_task():
     global running
     while running:
@@ -1136,7 +1985,18 @@ async def heartbeat_task():
                 'active_symbols': list(active_symbols),
                 'total_cached_points': sum(len(data) for data in historical_data.values()),
                 'background_collection': True,
-                'auth_status': auth_initialized
+                'auth_status': auth_initialized,
+                'ingest': ingest_queue.stats(),
+                'retention': retention_stats,
+                'loop_lag': loop_lag_stats,
+                'indicator_registry': indicator_registry.stats(),
+                'volume': volume_tracker.stats(),
+                'topk': topk_engine.stats(),
+                'correlation': correlation_registry.stats(),
+                'indicator_cache': indicator_cache.stats(),
+                'batch': batch_stats,
+                'delta': delta_stats,
+                'outbound': dict(outbound_stats, lagging=len(lagging_clients))
             })
             await asyncio.sleep(10)
         except Exception as e:
@@ -1148,9 +2008,11 @@ async def startup_tasks():
     """Run all startup tasks"""
     global fyers, main_loop
     main_loop = asyncio.get_running_loop()
+    ingest_queue.attach(main_loop)
     
     # Create data directory
     os.makedirs('data', exist_ok=True)
+    load_snapshot_index()
     
     # Try initial authentication
     if initialize_fyers():
@@ -1166,7 +2028,12 @@ async def startup_tasks():
     # Start background tasks
     asyncio.create_task(auth_watcher())
     asyncio.create_task(heartbeat_task())
+    asyncio.create_task(loop_lag_task())
     asyncio.create_task(emit_real_time_data())
+    asyncio.create_task(breadth_task())
+    asyncio.create_task(cleanup_task())
+    asyncio.create_task(snapshot_task())
+    asyncio.create_task(restore_snapshot_task())
     
     logger.info("✅ All background tasks started")
 
@@ -1205,6 +2072,10 @@ async def main():
         traceback.print_exc()
     finally:
         running = False
+        try:
+            await save_snapshot()
+        except Exception as e:
+            logger.error(f"❌ Shutdown snapshot error: {e}")
         executor.shutdown(wait=True)  # ✅ Clean shutdown
 
 
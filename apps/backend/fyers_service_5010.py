@@ -16,6 +16,7 @@ from collections import deque
 from fyers_apiv3 import fyersModel
 from fyers_apiv3.FyersWebsocket import data_ws
 import pandas as pd
+from tick_journal import TickJournal
 
 # Enhanced logging configuration
 logging.basicConfig(
@@ -61,6 +62,8 @@ available_symbols = []
 last_tick = {}
 auth_initialized = False
 
+tick_journal = TickJournal(root='.', flush_interval=0.2, flush_records=500)
+
 MONITORED_FIELDS = [
     'ltp', 'vol_traded_today', 'last_traded_time', 'bid_size', 'ask_size',
     'bid_price', 'ask_price', 'low_price', 'high_price', 'open_price', 'prev_close_price'
@@ -722,20 +725,15 @@ def onmessage(message):
 
 
 def save_to_file(symbol, data):
-    """Save market data to daily files."""
+    """Queue market data for the daily files; the journal writer does the disk I/O."""
     try:
         exchange, company_code = safe_symbol_parse(symbol)
         
         if exchange and company_code:
             now = datetime.datetime.now(INDIA_TZ)
             folder = f"LD_{now.strftime('%d-%m-%Y')}"
-            os.makedirs(folder, exist_ok=True)
             file_name = f"{company_code}-{exchange}.json"
-            file_path = os.path.join(folder, file_name)
-            
-            with open(file_path, 'a') as f:
-                json.dump(data, f)
-                f.write('\n')
+            tick_journal.write(folder, file_name, data)
                 
     except Exception as e:
         logger.error(f"❌ Error saving to file: {e}")
@@ -779,7 +777,8 @@ def heartbeat_task():
                 'active_subscriptions': len(active_subscriptions),
                 'connected_clients': len(clients),
                 'server_status': 'healthy',
-                'auth_status': auth_initialized
+                'auth_status': auth_initialized,
+                'journal': tick_journal.stats()
             }
             sio.emit('heartbeat', heartbeat_data)
             time.sleep(30)  # Send heartbeat every 30 seconds
@@ -802,6 +801,9 @@ def main_process():
         # Create data directory
         os.makedirs('data', exist_ok=True)
         
+        # Start the tick journal writer
+        tick_journal.start()
+        
         # Try initial authentication
         if initialize_fyers():
             logger.info("✅ Initial authentication successful")
@@ -842,6 +844,8 @@ def main():
     except KeyboardInterrupt:
         logger.info("🛑 Shutting down...")
         running = False
+    finally:
+        tick_journal.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""
+Bounded LRU cache of computed indicator series.
+
+An entry holds one indicator's values for the closed bars of one series
+(a symbol's live candles at one resolution, or one fetched day) together
+with the indicator's state after the newest of those bars. Closed bars
+never change, so:
+
+- a request whose newest closed bar is the one the entry ends at is a hit;
+- once newer bars have closed, only those are run through the saved state
+  and appended (the old prefix is never recomputed);
+- the bar in progress is always previewed fresh and never cached.
+
+Requests for a suffix (``since``) are served as a slice of the cached
+arrays. Entries are evicted least recently used first once their estimated
+size exceeds ``max_bytes``.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from indicator_registry import INDICATORS, parse_spec
+
+STATE_BYTES = 1024   # rough allowance for an indicator's saved state
+
+
+class _Entry:
+    __slots__ = ('indicator', 'timestamps', 'columns', 'nbytes')
+
+    def __init__(self, indicator):
+        self.indicator = indicator
+        self.timestamps = np.empty(0, dtype='i8')
+        self.columns = {}
+        self.nbytes = STATE_BYTES
+
+    @property
+    def through(self):
+        return int(self.timestamps[-1]) if len(self.timestamps) else None
+
+    def extend(self, bars):
+        values = []
+        for bar in bars:
+            values.append(self.indicator.preview(bar))
+            self.indicator.commit(bar)
+        if not values:
+            return
+        self.timestamps = np.concatenate([self.timestamps, bars['timestamp'].astype('i8')])
+        for name in values[0]:
+            column = np.array([value[name] for value in values], dtype='f8')
+            self.columns[name] = np.concatenate([self.columns[name], column]) if name in self.columns else column
+        self.nbytes = STATE_BYTES + self.timestamps.nbytes + sum(c.nbytes for c in self.columns.values())
+
+
+class IndicatorCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()    # (symbol, source, key) -> _Entry
+        self.hits = 0
+        self.extended = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def records(self, symbol, source, spec, bars, since=None, last_open=True):
+        """
+        ``(key, [{'timestamp', ...values}])`` of indicator ``spec`` over the
+        OHLC ``bars`` of ``source`` (e.g. ``'1m'`` or a date), from ``since``
+        (default: the first bar) on. With ``last_open`` the newest bar is
+        the one in progress. Raises ValueError for a bad spec.
+        """
+        key, name, params = parse_spec(spec)
+        if not len(bars):
+            return key, []
+        closed = bars[:-1] if last_open else bars
+        entry = self._entry(symbol, source, key, name, params, closed)
+
+        start = since if since is not None else int(bars[0]['timestamp'])
+        lo = int(np.searchsorted(entry.timestamps, start, side='left'))
+        names = list(entry.columns)
+        columns = [entry.timestamps[lo:].tolist()] + [entry.columns[n][lo:].tolist() for n in names]
+        records = [dict(zip(['timestamp'] + names, values)) for values in zip(*columns)]
+
+        if last_open and int(bars[-1]['timestamp']) >= start:
+            records.append(dict(entry.indicator.preview(bars[-1]), timestamp=int(bars[-1]['timestamp'])))
+        return key, records
+
+    def _entry(self, symbol, source, key, name, params, closed):
+        cache_key = (symbol, source, key)
+        entry = self._entries.get(cache_key)
+        newest = int(closed[-1]['timestamp']) if len(closed) else None
+
+        if entry is not None and entry.through is not None and newest is not None:
+            if entry.through == newest:
+                self.hits += 1
+                self._entries.move_to_end(cache_key)
+                return entry
+            pos = int(np.searchsorted(closed['timestamp'], entry.through))
+            if entry.through < newest and pos < len(closed) and closed[pos]['timestamp'] == entry.through:
+                self.extended += 1
+                self._resize(cache_key, entry, closed[pos + 1:])
+                return entry
+
+        self.misses += 1
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+            del self._entries[cache_key]
+        entry = _Entry(INDICATORS[name](*params))
+        self._entries[cache_key] = entry
+        self.nbytes += entry.nbytes
+        self._resize(cache_key, entry, closed)
+        return entry
+
+    def _resize(self, cache_key, entry, bars):
+        self.nbytes -= entry.nbytes
+        entry.extend(bars)
+        self.nbytes += entry.nbytes
+        self._entries.move_to_end(cache_key)
+        # Never evict the entry being served.
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def discard(self, symbol):
+        """Drop every entry of ``symbol``."""
+        for cache_key in [k for k in self._entries if k[0] == symbol]:
+            self.nbytes -= self._entries.pop(cache_key).nbytes
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'extended': self.extended,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,259 @@
+"""
+Cross-symbol indicator state held in aligned NumPy arrays.
+
+Every active symbol gets a row id; SMA(20), EMA(9) and RSI(14) state for all
+symbols lives in one array per field. The server feeds the engine 1m bar
+events once per flush, so each step is a handful of vectorized array
+operations regardless of how many symbols ticked. Seeding from fetched
+candles (``seed_many``) is vectorized across symbols too.
+
+EMA and RSI state is committed only when a bar closes (``commit``); the bar
+in progress is evaluated from the committed state without changing it
+(``preview``). SMA and Bollinger bands come from an exact
+``rolling.RollingWindow`` over the last 20 1m closes, whose newest value is
+the bar in progress.
+"""
+import numpy as np
+
+from rolling import RollingExtrema, RollingWindow
+
+
+SMA_PERIOD = 20
+EMA_PERIOD = 9
+RSI_PERIOD = 14
+EMA_ALPHA = 2 / (EMA_PERIOD + 1)
+BOLLINGER_WIDTH = 2.0
+
+# State as of the last closed bar, and the values published for the open bar.
+COMMITTED_FIELDS = ('ema_9', 'avg_gain', 'avg_loss', 'prev_close')
+OUTPUT_FIELDS = ('sma_20', 'ema_9', 'rsi_14')
+
+
+def _pad_left(series):
+    """
+    Stack 1-D arrays into one preallocated matrix, right-aligned, padding each
+    row on the left with its own first value (which leaves an EMA seeded from
+    that value unchanged).
+    """
+    width = max(len(values) for values in series)
+    matrix = np.empty((len(series), width), dtype='f8')
+    for row, values in zip(matrix, series):
+        pad = width - len(values)
+        row[:pad] = values[0]
+        row[pad:] = values
+    return matrix
+
+
+def _decay_weights(width, alpha):
+    """Weights that fold a row through ``x = alpha * v + (1 - alpha) * x`` in one dot product."""
+    return alpha * (1 - alpha) ** np.arange(width - 1, -1, -1)
+
+
+def seed_states(closes, lengths):
+    """
+    Committed EMA/Wilder-RSI state for many symbols at once.
+
+    ``closes`` is a left-padded ``(symbols, width)`` matrix of closed-bar
+    closes and ``lengths`` the real length of each row. EMA-9 is seeded with
+    a row's first close; RSI-14 averages the first 14 changes, then applies
+    Wilder smoothing to the rest. Both recurrences are evaluated as weighted
+    sums, so there is no per-bar Python loop.
+    """
+    closes = np.asarray(closes, dtype='f8')
+    lengths = np.asarray(lengths, dtype=np.intp)
+    rows, width = closes.shape
+
+    ema_weights = _decay_weights(width, EMA_ALPHA)
+    ema_weights[0] = (1 - EMA_ALPHA) ** (width - 1)
+    ema = closes @ ema_weights
+
+    avg_gain = np.zeros(rows)
+    avg_loss = np.zeros(rows)
+    changes_width = width - 1
+    seeded = (lengths - 1 >= RSI_PERIOD) & (changes_width >= RSI_PERIOD)
+    if seeded.any():
+        changes = np.diff(closes[seeded], axis=1)
+        first = width - lengths[seeded]                 # first real change column
+        start = first + RSI_PERIOD                      # first Wilder-smoothed column
+        index = np.arange(len(first))
+        wilder = _decay_weights(changes_width, 1 / RSI_PERIOD)
+        smoothed = np.arange(changes_width)[None, :] >= start[:, None]
+        carry = (1 - 1 / RSI_PERIOD) ** (changes_width - start)
+
+        for moves, out in ((np.maximum(changes, 0), avg_gain), (np.maximum(-changes, 0), avg_loss)):
+            cumulative = np.concatenate([np.zeros((len(moves), 1)), np.cumsum(moves, axis=1)], axis=1)
+            initial = (cumulative[index, start] - cumulative[index, first]) / RSI_PERIOD
+            out[seeded] = initial * carry + np.where(smoothed, moves, 0.0) @ wilder
+
+    return {'ema_9': ema, 'avg_gain': avg_gain, 'avg_loss': avg_loss, 'prev_close': closes[:, -1]}
+
+
+def _rsi(avg_gain, avg_loss):
+    rs = np.divide(avg_gain, avg_loss, out=np.zeros_like(avg_gain), where=avg_loss != 0)
+    return np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + rs))
+
+
+class IndicatorEngine:
+    def __init__(self, capacity=256):
+        self._ids = {}
+        self._free = []
+        self._size = 0
+        self._committed = {field: np.zeros(capacity, dtype='f8') for field in COMMITTED_FIELDS}
+        self._output = {field: np.zeros(capacity, dtype='f8') for field in OUTPUT_FIELDS}
+        self._bar_time = np.zeros(capacity, dtype='i8')
+        self._window = RollingWindow(SMA_PERIOD, capacity)
+        self._extrema = [None] * capacity
+
+    def __contains__(self, symbol):
+        return symbol in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def symbols(self):
+        return list(self._ids)
+
+    def _grow(self, capacity):
+        for columns in (self._committed, self._output):
+            for field, values in columns.items():
+                grown = np.zeros(capacity, dtype='f8')
+                grown[:len(values)] = values
+                columns[field] = grown
+        bar_time = np.zeros(capacity, dtype='i8')
+        bar_time[:len(self._bar_time)] = self._bar_time
+        self._bar_time = bar_time
+        self._window.grow(capacity)
+        self._extrema.extend([None] * (capacity - len(self._extrema)))
+
+    def _slot(self, symbol):
+        slot = self._ids.get(symbol)
+        if slot is not None:
+            return slot
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._size
+            self._size += 1
+            if slot >= len(self._bar_time):
+                self._grow(len(self._bar_time) * 2)
+        self._ids[symbol] = slot
+        return slot
+
+    def _ids_of(self, symbols):
+        return np.fromiter((self._ids[s] for s in symbols), dtype=np.intp, count=len(symbols))
+
+    def seed_many(self, symbols, closes, bar_times, states=None):
+        """
+        (Re)initialise many symbols in one vectorized pass. ``closes[i]`` are
+        symbol i's 1m closes, the newest of which is the bar in progress
+        starting at ``bar_times[i]``. ``states[i]`` (e.g. from a snapshot)
+        overrides the committed EMA/RSI values.
+        """
+        if not symbols:
+            return
+        closes = [np.asarray(values, dtype='f8') for values in closes]
+        ids = np.array([self._slot(symbol) for symbol in symbols], dtype=np.intp)
+
+        committed = [values[:-1] if len(values) > 1 else values for values in closes]
+        seeded = seed_states(_pad_left(committed), [len(values) for values in committed])
+        for field in COMMITTED_FIELDS:
+            self._committed[field][ids] = seeded[field]
+        for slot, state in zip(ids.tolist(), states or ()):
+            for field in COMMITTED_FIELDS:
+                if state and field in state:
+                    self._committed[field][slot] = float(state[field])
+
+        self._bar_time[ids] = np.asarray(bar_times, dtype='i8')
+        full = np.array([len(values) >= SMA_PERIOD for values in closes])
+        if full.any():
+            self._window.fill(ids[full], np.stack([v[-SMA_PERIOD:] for v, f in zip(closes, full) if f]))
+        for slot, values, is_full in zip(ids.tolist(), closes, full.tolist()):
+            if not is_full:
+                self._window.reset(slot, values)
+            self._extrema[slot] = RollingExtrema(SMA_PERIOD, values[-SMA_PERIOD:])
+
+        self._publish(ids, np.array([values[-1] for values in closes]))
+
+    def remove(self, symbol):
+        slot = self._ids.pop(symbol, None)
+        if slot is not None:
+            self._extrema[slot] = None
+            self._free.append(slot)
+
+    def _observe(self, ids, closes, bar_times):
+        """Put each close into its symbol's window: a newer bar is pushed, the same bar replaced."""
+        new_bar = bar_times > self._bar_time[ids]
+        self._window.push(ids[new_bar], closes[new_bar])
+        self._window.replace_last(ids[~new_bar], closes[~new_bar])
+        self._bar_time[ids] = np.maximum(self._bar_time[ids], bar_times)
+
+        for slot, close, opened in zip(ids.tolist(), closes.tolist(), new_bar.tolist()):
+            if opened:
+                self._extrema[slot].push(close)
+            else:
+                self._extrema[slot].replace_last(close)
+
+    def _publish(self, ids, closes):
+        """Published values for bars closing at ``closes``, on top of the committed state."""
+        committed = self._committed
+        change = closes - committed['prev_close'][ids]
+        avg_gain = (committed['avg_gain'][ids] * (RSI_PERIOD - 1) + np.maximum(change, 0)) / RSI_PERIOD
+        avg_loss = (committed['avg_loss'][ids] * (RSI_PERIOD - 1) + np.maximum(-change, 0)) / RSI_PERIOD
+
+        self._output['sma_20'][ids] = self._window.mean(ids)
+        self._output['ema_9'][ids] = EMA_ALPHA * closes + (1 - EMA_ALPHA) * committed['ema_9'][ids]
+        self._output['rsi_14'][ids] = _rsi(avg_gain, avg_loss)
+        return avg_gain, avg_loss
+
+    def commit(self, symbols, closes, bar_times):
+        """Fold one closed 1m bar per symbol into the committed state, all at once."""
+        if not symbols:
+            return
+        ids = self._ids_of(symbols)
+        closes = np.asarray(closes, dtype='f8')
+        self._observe(ids, closes, np.asarray(bar_times, dtype='i8'))
+
+        avg_gain, avg_loss = self._publish(ids, closes)
+        committed = self._committed
+        committed['ema_9'][ids] = self._output['ema_9'][ids]
+        committed['avg_gain'][ids] = avg_gain
+        committed['avg_loss'][ids] = avg_loss
+        committed['prev_close'][ids] = closes
+
+    def preview(self, symbols, closes, bar_times):
+        """Evaluate the open 1m bar of each symbol without touching committed state."""
+        if not symbols:
+            return
+        ids = self._ids_of(symbols)
+        closes = np.asarray(closes, dtype='f8')
+        self._observe(ids, closes, np.asarray(bar_times, dtype='i8'))
+        self._publish(ids, closes)
+
+    def get(self, symbol):
+        """Published indicator values for one symbol, or ``{}`` if it has no state."""
+        slot = self._ids.get(symbol)
+        if slot is None:
+            return {}
+        sma = float(self._output['sma_20'][slot])
+        band = BOLLINGER_WIDTH * float(self._window.std([slot])[0])
+        extrema = self._extrema[slot]
+        return {
+            'sma_20': sma,
+            'ema_9': float(self._output['ema_9'][slot]),
+            'rsi_14': float(self._output['rsi_14'][slot]),
+            'bb_upper': sma + band,
+            'bb_lower': sma - band,
+            'min_20': extrema.min,
+            'max_20': extrema.max,
+        }
+
+    def state(self, symbol):
+        """Snapshot record: committed EMA/RSI state plus the published SMA/RSI."""
+        slot = self._ids.get(symbol)
+        if slot is None:
+            return None
+        state = {field: float(self._committed[field][slot]) for field in COMMITTED_FIELDS}
+        state['sma_20'] = float(self._output['sma_20'][slot])
+        state['rsi_14'] = float(self._output['rsi_14'][slot])
+        return state
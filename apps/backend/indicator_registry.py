@@ -0,0 +1,354 @@
+"""
+On-demand indicators requested per subscription.
+
+A client names the indicators it wants when it subscribes, e.g.
+
+    {'symbol': 'NSE:SBIN-EQ',
+     'indicators': ['vwap', {'name': 'macd', 'params': {'fast': 8}}, 'supertrend:7,2']}
+
+Each distinct (symbol, indicator, params) is computed once, however many
+clients asked for it, and only while at least one client is watching; the
+state is dropped when the last one unwatches or disconnects.
+
+Indicators run on 1m bars. A bar is committed to an indicator's state once
+a newer bar exists; the bar in progress is evaluated as a preview that
+never touches committed state.
+"""
+import math
+
+import numpy as np
+
+from candles import session_open
+from rolling import RollingWindow
+
+
+class MACD:
+    name = 'macd'
+    params = (('fast', 12), ('slow', 26), ('signal', 9))
+
+    def __init__(self, fast, slow, signal):
+        self.alphas = (2 / (fast + 1), 2 / (slow + 1), 2 / (signal + 1))
+        self.state = None
+
+    def _step(self, state, bar):
+        close = float(bar['close'])
+        if state is None:
+            return (close, close, 0.0)
+        fast_a, slow_a, signal_a = self.alphas
+        fast, slow, signal = state
+        fast = fast_a * close + (1 - fast_a) * fast
+        slow = slow_a * close + (1 - slow_a) * slow
+        signal = signal_a * (fast - slow) + (1 - signal_a) * signal
+        return (fast, slow, signal)
+
+    def commit(self, bar):
+        self.state = self._step(self.state, bar)
+
+    def preview(self, bar):
+        fast, slow, signal = self._step(self.state, bar)
+        return {'macd': fast - slow, 'signal': signal, 'histogram': fast - slow - signal}
+
+
+class Bollinger:
+    name = 'bollinger'
+    params = (('period', 20), ('width', 2))
+
+    def __init__(self, period, width):
+        self.width = width
+        self.window = RollingWindow(int(period), capacity=1)
+        self._live = False
+
+    def _put(self, close):
+        # The previewed bar already sits in the window as its newest value.
+        if self._live:
+            self.window.replace_last([0], [close])
+        else:
+            self.window.push([0], [close])
+
+    def commit(self, bar):
+        self._put(float(bar['close']))
+        self._live = False
+
+    def preview(self, bar):
+        self._put(float(bar['close']))
+        self._live = True
+        middle = float(self.window.mean([0])[0])
+        band = self.width * float(self.window.std([0])[0])
+        return {'middle': middle, 'upper': middle + band, 'lower': middle - band}
+
+
+class VWAP:
+    """Session VWAP from bar turnover, reset at each 09:15 IST open."""
+
+    name = 'vwap'
+    params = ()
+
+    def __init__(self):
+        self.state = None
+
+    def _step(self, state, bar):
+        session = session_open(int(bar['timestamp']))
+        if state is None or state[0] != session:
+            state = (session, 0.0, 0.0)
+        return (session, state[1] + float(bar['turnover']), state[2] + float(bar['volume']))
+
+    def commit(self, bar):
+        self.state = self._step(self.state, bar)
+
+    def preview(self, bar):
+        _, value, volume = self._step(self.state, bar)
+        return {'vwap': value / volume if volume else float(bar['close'])}
+
+
+def _true_range(bar, prev_close):
+    high, low = float(bar['high']), float(bar['low'])
+    if prev_close is None:
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+def _wilder(atr, count, tr, period):
+    """Average of the first ``period`` true ranges, then Wilder smoothing."""
+    if count < period:
+        return (atr * count + tr) / (count + 1), count + 1
+    return (atr * (period - 1) + tr) / period, count
+
+
+class ATR:
+    name = 'atr'
+    params = (('period', 14),)
+
+    def __init__(self, period):
+        self.period = int(period)
+        self.state = (0.0, 0, None)   # atr, bars seen (capped at period), prev close
+
+    def _step(self, state, bar):
+        atr, count, prev_close = state
+        atr, count = _wilder(atr, count, _true_range(bar, prev_close), self.period)
+        return (atr, count, float(bar['close']))
+
+    def commit(self, bar):
+        self.state = self._step(self.state, bar)
+
+    def preview(self, bar):
+        return {'atr': self._step(self.state, bar)[0]}
+
+
+class Supertrend:
+    name = 'supertrend'
+    params = (('period', 10), ('multiplier', 3))
+
+    def __init__(self, period, multiplier):
+        self.period = int(period)
+        self.multiplier = multiplier
+        # atr, count, prev close, final upper, final lower, direction (+1 up / -1 down)
+        self.state = (0.0, 0, None, math.inf, -math.inf, 1)
+
+    def _step(self, state, bar):
+        atr, count, prev_close, upper, lower, direction = state
+        atr, count = _wilder(atr, count, _true_range(bar, prev_close), self.period)
+
+        close = float(bar['close'])
+        mid = (float(bar['high']) + float(bar['low'])) / 2
+        basic_upper = mid + self.multiplier * atr
+        basic_lower = mid - self.multiplier * atr
+        if prev_close is None or basic_upper < upper or prev_close > upper:
+            upper = basic_upper
+        if prev_close is None or basic_lower > lower or prev_close < lower:
+            lower = basic_lower
+
+        if direction > 0 and close < lower:
+            direction = -1
+        elif direction < 0 and close > upper:
+            direction = 1
+        return (atr, count, close, upper, lower, direction)
+
+    def commit(self, bar):
+        self.state = self._step(self.state, bar)
+
+    def preview(self, bar):
+        state = self._step(self.state, bar)
+        direction = state[5]
+        return {'supertrend': state[4] if direction > 0 else state[3], 'direction': direction}
+
+
+INDICATORS = {cls.name: cls for cls in (MACD, Bollinger, VWAP, ATR, Supertrend)}
+
+
+def parse_spec(spec):
+    """
+    Normalise one requested indicator to ``(key, name, params)``.
+
+    Accepts ``'macd'``, ``'macd:12,26,9'`` or ``{'name': 'macd', 'params': {...}}``;
+    raises ValueError for unknown names or bad parameters.
+    """
+    overrides = {}
+    if isinstance(spec, dict):
+        name = str(spec.get('name', '')).lower()
+        overrides = dict(spec.get('params') or {})
+    else:
+        name, _, positional = str(spec).partition(':')
+        name = name.strip().lower()
+        cls = INDICATORS.get(name)
+        if cls and positional:
+            values = [v.strip() for v in positional.split(',')]
+            if len(values) > len(cls.params):
+                raise ValueError(f"Too many parameters for {name}")
+            overrides = {param: value for (param, _), value in zip(cls.params, values)}
+
+    cls = INDICATORS.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown indicator '{name}'; available: {', '.join(sorted(INDICATORS))}")
+
+    unknown = set(overrides) - {param for param, _ in cls.params}
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {', '.join(sorted(unknown))}")
+
+    params = []
+    for param, default in cls.params:
+        try:
+            value = float(overrides.get(param, default))
+        except (TypeError, ValueError):
+            raise ValueError(f"{name}.{param} must be a number")
+        if not value > 0:
+            raise ValueError(f"{name}.{param} must be positive")
+        params.append(int(value) if value.is_integer() else value)
+
+    key = f"{name}({','.join(str(p) for p in params)})" if params else name
+    return key, name, tuple(params)
+
+
+class _Tracker:
+    def __init__(self, indicator):
+        self.indicator = indicator
+        self.committed_through = None
+        self.value = None
+
+
+class IndicatorRegistry:
+    def __init__(self, candles_for):
+        # symbol -> 1m candle RingBuffer (or None)
+        self._candles_for = candles_for
+        self._watchers = {}          # (symbol, key) -> set of sids
+        self._trackers = {}          # (symbol, key) -> _Tracker
+        self._symbol_keys = {}       # symbol -> set of keys being computed
+        self._client_keys = {}       # sid -> {symbol: tuple of keys}
+
+    def watch(self, sid, symbol, specs):
+        """Set the indicators ``sid`` wants for ``symbol``; returns their keys."""
+        if isinstance(specs, (str, dict)):
+            specs = [specs]
+        parsed = [parse_spec(spec) for spec in specs]
+        self.unwatch(sid, symbol)
+
+        keys = []
+        for key, name, params in parsed:
+            if key in keys:
+                continue
+            keys.append(key)
+            self._watchers.setdefault((symbol, key), set()).add(sid)
+            if (symbol, key) not in self._trackers:
+                self._trackers[(symbol, key)] = _Tracker(INDICATORS[name](*params))
+                self._symbol_keys.setdefault(symbol, set()).add(key)
+
+        if keys:
+            self._client_keys.setdefault(sid, {})[symbol] = tuple(keys)
+            self.update([symbol])
+        return keys
+
+    def unwatch(self, sid, symbol=None):
+        """Forget one symbol (or everything) for ``sid``; drops state nobody watches."""
+        per_symbol = self._client_keys.get(sid)
+        if not per_symbol:
+            return
+        symbols = [symbol] if symbol is not None else list(per_symbol)
+        for sym in symbols:
+            for key in per_symbol.pop(sym, ()):
+                watchers = self._watchers.get((sym, key))
+                if watchers is None:
+                    continue
+                watchers.discard(sid)
+                if not watchers:
+                    del self._watchers[(sym, key)]
+                    del self._trackers[(sym, key)]
+                    self._symbol_keys[sym].discard(key)
+                    if not self._symbol_keys[sym]:
+                        del self._symbol_keys[sym]
+        if not per_symbol:
+            del self._client_keys[sid]
+
+    def update(self, symbols):
+        """Commit closed bars and preview the open bar for every watched symbol in ``symbols``."""
+        for symbol in symbols:
+            keys = self._symbol_keys.get(symbol)
+            if not keys:
+                continue
+            candles = self._candles_for(symbol)
+            if not candles:
+                continue
+            for key in keys:
+                self._advance(self._trackers[(symbol, key)], candles)
+
+    def on_bars(self, events):
+        """Bar-event listener: ``events`` are ``(symbol, kind, candle)`` for 1m candles."""
+        self.update({symbol for symbol, _, _ in events})
+
+    def _advance(self, tracker, candles):
+        if tracker.committed_through is None:
+            bars = candles.view()
+        else:
+            bars = candles.since(tracker.committed_through + 1)
+        if not len(bars):
+            return
+
+        indicator = tracker.indicator
+        for bar in bars[:-1]:
+            indicator.commit(bar)
+        if len(bars) > 1:
+            tracker.committed_through = int(bars[-2]['timestamp'])
+        elif tracker.committed_through is None:
+            tracker.committed_through = int(bars[-1]['timestamp']) - 1
+        tracker.value = indicator.preview(bars[-1])
+
+    def keys_for(self, sid, symbol):
+        """Keys ``sid`` watches on ``symbol``, in the order it asked for them."""
+        return self._client_keys.get(sid, {}).get(symbol, ())
+
+    def values_for(self, sid, symbol):
+        """``{key: values}`` of the indicators ``sid`` watches on ``symbol``."""
+        return self.values(symbol, self.keys_for(sid, symbol))
+
+    def values(self, symbol, keys):
+        """``{key: values}`` of the given indicator keys on ``symbol``, or ``None``."""
+        if not keys:
+            return None
+        values = {}
+        for key in keys:
+            tracker = self._trackers.get((symbol, key))
+            if tracker is not None and tracker.value is not None:
+                values[key] = tracker.value
+        return values or None
+
+    def stats(self):
+        return {
+            'computed': len(self._trackers),
+            'symbols': len(self._symbol_keys),
+            'clients': len(self._client_keys),
+        }
+
+
+def compute_series(bars, specs):
+    """
+    Evaluate indicators over a full OHLCV bar array (oldest first), e.g. for
+    historical queries. Returns ``{key: [values per bar]}``.
+    """
+    bars = np.asarray(bars)
+    results = {}
+    for key, name, params in (parse_spec(spec) for spec in specs):
+        indicator = INDICATORS[name](*params)
+        values = []
+        for bar in bars:
+            values.append(indicator.preview(bar))
+            indicator.commit(bar)
+        results[key] = values
+    return results
@@ -0,0 +1,100 @@
+"""
+Hand-off of raw ticks from the Fyers SDK thread to the asyncio event loop.
+
+``FyersDataSocket`` invokes ``on_message`` on its own thread. Instead of
+touching server state there, the callback appends the raw message to a
+bounded buffer guarded by a single lock. The first tick after a drain
+schedules one ``call_soon_threadsafe`` wake-up; the loop then swaps the
+buffer out in one step and hands the consumer the newest tick per symbol.
+All shared state is therefore only ever mutated on the loop thread.
+"""
+import threading
+import time
+from collections import deque
+
+
+class TickIngestQueue:
+    """
+    Bounded single-producer/single-consumer tick buffer with counters.
+
+    ``consumer`` is called on the loop with ``{symbol: message}`` holding the
+    latest message per symbol in the drained batch. When the buffer is full
+    the oldest tick is discarded and counted in ``dropped``.
+    """
+
+    def __init__(self, consumer, max_pending=100000):
+        self._consumer = consumer
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=max_pending)
+        self._scheduled = False
+        self._loop = None
+
+        self.received = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def attach(self, loop):
+        """Bind the consuming event loop; flushes anything buffered before startup."""
+        with self._lock:
+            self._loop = loop
+            schedule = bool(self._buffer) and not self._scheduled
+            if schedule:
+                self._scheduled = True
+        if schedule:
+            loop.call_soon_threadsafe(self._drain)
+
+    def put(self, symbol, message):
+        """Producer side; safe to call from any thread and never blocks on the loop."""
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append((time.monotonic(), symbol, message))
+            self.received += 1
+            if self._scheduled or self._loop is None:
+                return
+            self._scheduled = True
+            loop = self._loop
+        try:
+            loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            # Loop already closed during shutdown.
+            with self._lock:
+                self._scheduled = False
+
+    def _drain(self):
+        with self._lock:
+            batch = self._buffer
+            self._buffer = deque(maxlen=batch.maxlen)
+            self._scheduled = False
+
+        if not batch:
+            return
+
+        lag_ms = (time.monotonic() - batch[0][0]) * 1000
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.batches += 1
+        self.last_batch_size = len(batch)
+
+        latest = {}
+        for _, symbol, message in batch:
+            latest[symbol] = message
+        self.coalesced += len(batch) - len(latest)
+
+        self._consumer(latest)
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'batches': self.batches,
+            'pending': len(self._buffer),
+            'last_batch_size': self.last_batch_size,
+            'last_lag_ms': round(self.last_lag_ms, 3),
+            'max_lag_ms': round(self.max_lag_ms, 3),
+        }
@@ -0,0 +1,267 @@
+"""
+Replay recorded trading days through the live server's real tick path.
+
+Recorded day files (``recorded_data/<date>/*.json``, ``LD_dd-mm-yyyy/*.json``
+or ``.ticks`` archives) are merged across symbols by timestamp and fed to
+``fyers_new_5001.onmessage`` from a separate thread, exactly like the
+``FyersDataSocket`` callback. From there ticks flow through the ingest
+queue, the emitter, the stores and Socket.IO as they would in production.
+
+The server's ``clock`` is replaced by a virtual clock that always reads the
+timestamp of the tick being replayed, so stored data and retention do not
+depend on when the replay runs.
+
+At ``--speed max`` a feeder thread would outrun the wall-clock flush window
+and most ticks would be coalesced, depending on thread timing. Instead the
+ticks are cut into flush windows of virtual time; each window's newest tick
+per symbol goes through ``process_tick_batch`` and one ``flush_pending``
+pass on the event loop, so every run of the same files stores the same
+points.
+
+Usage:
+    python replay.py ../frontend/public/recorded_data/2025-06-10 --speed 10
+    python replay.py LD_10-06-2025 --speed max --serve 5001
+"""
+import argparse
+import asyncio
+import glob
+import heapq
+import logging
+import os
+import threading
+import time
+
+import fyers_new_5001 as server
+from tick_archive import ARCHIVE_SUFFIX, open_day_file
+
+
+logger = logging.getLogger("Replay")
+
+# fyers_service_5010 records its simplified payload; map it back to Fyers keys.
+SIMPLIFIED_TO_FYERS = {
+    'change': 'ch',
+    'changePercent': 'chp',
+    'volume': 'vol_traded_today',
+    'open': 'open_price',
+    'high': 'high_price',
+    'low': 'low_price',
+    'close': 'prev_close_price',
+    'bid': 'bid_price',
+    'ask': 'ask_price',
+}
+
+
+class ReplayClock:
+    """Virtual wall clock that reads the timestamp of the tick being replayed."""
+
+    def __init__(self, start=0):
+        self._now = start
+
+    def now(self):
+        return self._now
+
+    def advance(self, timestamp):
+        if timestamp > self._now:
+            self._now = timestamp
+
+
+def to_fyers_message(record):
+    """Normalise a recorded tick (raw Fyers or simplified) into a Fyers SymbolUpdate."""
+    if 'vol_traded_today' in record or 'ltp' not in record:
+        message = dict(record)
+    else:
+        message = {SIMPLIFIED_TO_FYERS.get(key, key): value for key, value in record.items()}
+    message.setdefault('last_traded_time', record.get('timestamp'))
+    return message
+
+
+def find_day_files(paths, symbols=None):
+    """Expand directories to day files, preferring ``.ticks`` archives over JSONL."""
+    files = {}
+    for path in paths:
+        candidates = [path]
+        if os.path.isdir(path):
+            candidates = glob.glob(os.path.join(path, '*.json')) + glob.glob(os.path.join(path, f'*{ARCHIVE_SUFFIX}'))
+        for candidate in candidates:
+            stem = os.path.splitext(candidate)[0]
+            if stem not in files or candidate.endswith(ARCHIVE_SUFFIX):
+                files[stem] = candidate
+
+    selected = sorted(files.values())
+    if symbols:
+        wanted = {symbol.split(':')[-1].split('-')[0] for symbol in symbols}
+        selected = [f for f in selected if os.path.basename(f).split('-')[0] in wanted]
+    return selected
+
+
+def merged_ticks(files):
+    """Yield Fyers messages from all files in timestamp order (stable per file)."""
+    def keyed(index, path):
+        for seq, record in enumerate(open_day_file(path)):
+            yield (record.get('timestamp') or 0, index, seq, record)
+
+    streams = [keyed(i, path) for i, path in enumerate(files)]
+    for _, _, _, record in heapq.merge(*streams):
+        yield to_fyers_message(record)
+
+
+class ReplayDriver:
+    """Feeds ticks to ``on_message`` at ``speed`` x real time, or in virtual flush windows (``run_windows``)."""
+
+    def __init__(self, files, on_message, clock, speed=1.0):
+        self.files = files
+        self.on_message = on_message
+        self.clock = clock
+        self.speed = speed
+        self.ticks = 0
+        self.processed = 0     # ticks that reached process_tick_batch (run_windows)
+        self.coalesced = 0     # superseded by a newer tick of the symbol in the same window
+        self.windows = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.wall_seconds = 0.0
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        started = time.monotonic()
+        for message in merged_ticks(self.files):
+            if self._stop.is_set():
+                break
+
+            ts = message.get('timestamp') or message.get('last_traded_time') or 0
+            if self.first_ts is None:
+                self.first_ts = ts
+                self.clock.advance(ts)
+
+            if self.speed:
+                delay = started + (ts - self.first_ts) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            self.clock.advance(ts)
+            self.on_message(message)
+            self.ticks += 1
+            self.last_ts = ts
+
+        self.wall_seconds = time.monotonic() - started
+
+    async def run_windows(self, window, consumer, flush):
+        """
+        Replay as fast as possible in virtual time: ticks within ``window``
+        seconds of a window's first tick are one batch; ``consumer`` gets the
+        newest tick per symbol, then ``flush`` runs once.
+        """
+        started = time.monotonic()
+        batch, window_end = {}, None
+        for message in merged_ticks(self.files):
+            if self._stop.is_set():
+                break
+            if 'symbol' not in message or message.get('type') == 'sub':
+                continue
+
+            ts = message.get('timestamp') or message.get('last_traded_time') or 0
+            if self.first_ts is None:
+                self.first_ts = ts
+            if batch and ts >= window_end:
+                await self._release(batch, consumer, flush)
+                batch = {}
+            if not batch:
+                window_end = ts + window
+
+            self.clock.advance(ts)
+            if message['symbol'] in batch:
+                self.coalesced += 1
+            batch[message['symbol']] = message
+            self.ticks += 1
+            self.last_ts = ts
+
+        if batch:
+            await self._release(batch, consumer, flush)
+        self.wall_seconds = time.monotonic() - started
+
+    async def _release(self, batch, consumer, flush):
+        consumer(batch)
+        self.processed += len(batch)
+        self.windows += 1
+        await flush()
+
+
+async def run_replay(files, speed, serve_port=None):
+    clock = ReplayClock()
+    loop = asyncio.get_running_loop()
+
+    server.clock = clock.now
+    server.main_loop = loop
+    server.auth_initialized = True   # subscriptions work; history fetches return nothing without fyers_client
+    tasks = []
+    if speed:
+        server.ingest_queue.attach(loop)
+        tasks.append(asyncio.create_task(server.emit_real_time_data()))
+
+    if serve_port:
+        import uvicorn
+        config = uvicorn.Config(app=server.app, host='0.0.0.0', port=serve_port,
+                                log_level='warning', loop='asyncio', ws='websockets')
+        tasks.append(asyncio.create_task(uvicorn.Server(config).serve()))
+        logger.info(f"Serving Socket.IO on port {serve_port} during replay")
+
+    driver = ReplayDriver(files, server.onmessage, clock, speed)
+    if speed:
+        feeder = threading.Thread(target=driver.run, name="ReplayFeeder", daemon=True)
+        feeder.start()
+        try:
+            while feeder.is_alive():
+                await asyncio.sleep(0.1)
+        finally:
+            driver.stop()
+
+        # Let the last micro-batch flush before reporting.
+        await asyncio.sleep(server.FLUSH_WINDOW * 4 + 0.1)
+    else:
+        await driver.run_windows(server.FLUSH_WINDOW, server.process_tick_batch, server.flush_pending)
+    server.running = False
+    for task in tasks:
+        task.cancel()
+
+    span = (driver.last_ts or 0) - (driver.first_ts or 0)
+    logger.info(f"Replayed {driver.ticks} ticks from {len(files)} files covering {span}s "
+                f"in {driver.wall_seconds:.2f}s wall ({span / max(driver.wall_seconds, 1e-9):.1f}x real time, "
+                f"{driver.ticks / max(driver.wall_seconds, 1e-9):.0f} ticks/s)")
+    if speed:
+        logger.info(f"Ingest: {server.ingest_queue.stats()}")
+    else:
+        logger.info(f"Ticks: {driver.processed} processed, {driver.coalesced} coalesced "
+                    f"in {driver.windows} virtual windows of {server.FLUSH_WINDOW}s")
+    logger.info(f"Stored points: {sum(len(buf) for buf in server.historical_data.values())} "
+                f"across {len(server.historical_data)} symbols")
+    return driver
+
+
+def parse_speed(value):
+    return None if value == 'max' else float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded ticks through fyers_new_5001.')
+    parser.add_argument('paths', nargs='+', help='Day directories or individual day files')
+    parser.add_argument('--speed', type=parse_speed, default=1.0, help='Replay speed multiplier, or "max"')
+    parser.add_argument('--symbols', type=str, default='', help='Comma-separated symbols or company codes to replay')
+    parser.add_argument('--serve', type=int, default=None, help='Also serve Socket.IO on this port')
+    args = parser.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    files = find_day_files(args.paths, symbols)
+    if not files:
+        logger.error("No recorded day files found")
+        return
+
+    speed_label = 'max speed' if args.speed is None else f"{args.speed}x"
+    logger.info(f"Replaying {len(files)} files at {speed_label}")
+    asyncio.run(run_replay(files, args.speed, args.serve))
+
+
+if __name__ == '__main__':
+    main()
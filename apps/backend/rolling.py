@@ -0,0 +1,179 @@
+"""
+Exact streaming window kernels, O(1) per update.
+
+``RollingWindow`` keeps the last ``period`` values for many rows (one row
+per symbol slot) in a preallocated ``(rows, period)`` array and maintains a
+ring sum and Welford mean/M2 alongside, so SMA, variance and standard
+deviation are exact without rescanning the window. Updates are vectorized
+over any set of rows.
+
+``RollingExtrema`` is a per-row monotonic-deque min/max.
+
+Both support ``replace_last`` as well as ``push``: the newest value of a
+window can be revised in place, which is how an in-progress candle's close
+is tracked between bar opens.
+"""
+from collections import deque
+
+import numpy as np
+
+
+class RollingWindow:
+    def __init__(self, period, capacity=256):
+        self.period = period
+        self.values = np.zeros((capacity, period), dtype='f8')
+        self.pos = np.zeros(capacity, dtype=np.intp)
+        self.count = np.zeros(capacity, dtype=np.intp)
+        self.sum = np.zeros(capacity, dtype='f8')
+        self._mean = np.zeros(capacity, dtype='f8')
+        self._m2 = np.zeros(capacity, dtype='f8')
+
+    def __len__(self):
+        return len(self.pos)
+
+    def grow(self, capacity):
+        """Make room for at least ``capacity`` rows, keeping existing ones."""
+        old = len(self.pos)
+        if capacity <= old:
+            return
+        values = np.zeros((capacity, self.period), dtype='f8')
+        values[:old] = self.values
+        self.values = values
+        for name in ('pos', 'count', 'sum', '_mean', '_m2'):
+            current = getattr(self, name)
+            grown = np.zeros(capacity, dtype=current.dtype)
+            grown[:old] = current
+            setattr(self, name, grown)
+
+    def reset(self, row, values=()):
+        """Fill one row from ``values`` (oldest first); only the last ``period`` are kept."""
+        tail = np.asarray(values, dtype='f8')[-self.period:]
+        n = len(tail)
+        self.values[row] = 0
+        self.values[row, :n] = tail
+        self.pos[row] = n % self.period
+        self.count[row] = n
+        self.sum[row] = tail.sum() if n else 0.0
+        self._mean[row] = tail.mean() if n else 0.0
+        self._m2[row] = ((tail - self._mean[row]) ** 2).sum() if n else 0.0
+
+    def fill(self, rows, matrix):
+        """Set full windows for many rows at once from a ``(len(rows), period)`` matrix."""
+        rows = np.asarray(rows, dtype=np.intp)
+        matrix = np.asarray(matrix, dtype='f8')
+        self.values[rows] = matrix
+        self.pos[rows] = 0
+        self.count[rows] = self.period
+        self.sum[rows] = matrix.sum(axis=1)
+        mean = matrix.mean(axis=1)
+        self._mean[rows] = mean
+        self._m2[rows] = ((matrix - mean[:, None]) ** 2).sum(axis=1)
+
+    def push(self, rows, x):
+        """Append one value per row, dropping the oldest once a window is full."""
+        rows = np.asarray(rows, dtype=np.intp)
+        x = np.asarray(x, dtype='f8')
+        if not len(rows):
+            return
+        pos = self.pos[rows]
+        n = self.count[rows]
+        full = n == self.period
+        old = np.where(full, self.values[rows, pos], 0.0)
+
+        self.values[rows, pos] = x
+        self.pos[rows] = (pos + 1) % self.period
+        self.sum[rows] += x - old
+
+        mean = self._mean[rows]
+        m2 = self._m2[rows]
+        # Window full: swap old for x at fixed n. Otherwise: Welford add with n + 1.
+        n_new = np.where(full, n, n + 1)
+        delta = np.where(full, x - old, x - mean)
+        new_mean = mean + delta / n_new
+        m2 += np.where(full, (x - old) * (x - new_mean + old - mean), delta * (x - new_mean))
+        self._mean[rows] = new_mean
+        self._m2[rows] = np.maximum(m2, 0.0)
+        self.count[rows] = n_new
+
+    def replace_last(self, rows, x):
+        """Overwrite the newest value of each row (rows must be non-empty)."""
+        rows = np.asarray(rows, dtype=np.intp)
+        x = np.asarray(x, dtype='f8')
+        if not len(rows):
+            return
+        last = (self.pos[rows] - 1) % self.period
+        old = self.values[rows, last]
+        n = self.count[rows]
+
+        self.values[rows, last] = x
+        self.sum[rows] += x - old
+        mean = self._mean[rows]
+        new_mean = mean + (x - old) / n
+        self._m2[rows] = np.maximum(self._m2[rows] + (x - old) * (x - new_mean + old - mean), 0.0)
+        self._mean[rows] = new_mean
+
+    def mean(self, rows):
+        n = self.count[rows]
+        return np.divide(self.sum[rows], n, out=np.zeros(len(n)), where=n > 0)
+
+    def var(self, rows):
+        """Population variance of each row's window."""
+        n = self.count[rows]
+        return np.divide(self._m2[rows], n, out=np.zeros(len(n)), where=n > 0)
+
+    def std(self, rows):
+        return np.sqrt(self.var(rows))
+
+
+class RollingExtrema:
+    """Min and max of the last ``period`` values for one series."""
+
+    def __init__(self, period, values=()):
+        self.period = period
+        self._mins = deque()
+        self._maxs = deque()
+        self._index = -1
+        self._last = None
+        for value in list(values)[-period:]:
+            self.push(value)
+
+    def _commit(self):
+        # The newest value becomes final once the next one is pushed.
+        index, value = self._index, self._last
+        while self._mins and self._mins[-1][1] >= value:
+            self._mins.pop()
+        self._mins.append((index, value))
+        while self._maxs and self._maxs[-1][1] <= value:
+            self._maxs.pop()
+        self._maxs.append((index, value))
+
+    def push(self, value):
+        if self._last is not None:
+            self._commit()
+        self._index += 1
+        self._last = float(value)
+
+        # Committed values cover the window minus the newest slot.
+        oldest = self._index - self.period + 1
+        while self._mins and self._mins[0][0] < oldest:
+            self._mins.popleft()
+        while self._maxs and self._maxs[0][0] < oldest:
+            self._maxs.popleft()
+
+    def replace_last(self, value):
+        if self._last is None:
+            self.push(value)
+        else:
+            self._last = float(value)
+
+    @property
+    def min(self):
+        if self._last is None:
+            return None
+        return min(self._mins[0][1], self._last) if self._mins else self._last
+
+    @property
+    def max(self):
+        if self._last is None:
+            return None
+        return max(self._maxs[0][1], self._last) if self._maxs else self._last
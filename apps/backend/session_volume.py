@@ -0,0 +1,127 @@
+"""
+Per-tick traded volume and running session VWAP from cumulative feed volume.
+
+Fyers sends ``vol_traded_today``, the exchange's running total for the
+session. ``SessionVolume`` differences consecutive totals into the quantity
+traded since the previous tick and keeps the session's traded volume and
+turnover (price x quantity), so VWAP and dollar volume are O(1) per tick.
+
+Ticks are attributed at the price they carry; when the feed is conflated the
+quantity traded between two observed ticks is booked at the later price.
+
+- A tick older than the last one seen is out of order: it trades nothing and
+  leaves the state alone.
+- A total lower than the previous one within the same session means the feed
+  reset its counter (e.g. after a reconnect): the new total becomes the
+  baseline and nothing is booked.
+- A tick in a new session starts the session over. The first total of the
+  new session is booked in full when the previous session was followed;
+  the very first total ever seen for a symbol is only a baseline, unless the
+  session was seeded from fetched candles.
+"""
+from candles import session_open
+
+
+class SessionVolume:
+    """Volume differencer and VWAP state for one symbol."""
+
+    __slots__ = ('session', 'cumulative', 'last_time', 'volume', 'turnover')
+
+    def __init__(self):
+        self.session = None
+        self.cumulative = None    # last cumulative total seen from the feed
+        self.last_time = None
+        self.volume = 0           # traded this session
+        self.turnover = 0.0       # sum of price x quantity this session
+
+    def seed(self, timestamp, volume, turnover):
+        """Start from known session totals, e.g. the daily candle built from fetched bars."""
+        self.session = session_open(int(timestamp))
+        self.cumulative = int(volume)
+        self.volume = int(volume)
+        self.turnover = float(turnover)
+
+    def backfill(self, timestamp, volume, turnover):
+        """Add trading from before the first tick followed (e.g. bars fetched after ticks started)."""
+        if self.session == session_open(int(timestamp)):
+            self.volume += int(volume)
+            self.turnover += float(turnover)
+
+    def update(self, timestamp, cumulative, price):
+        """Fold one tick in; returns ``(quantity, value)`` traded since the previous tick."""
+        if cumulative is None or price is None:
+            return 0, 0.0
+        cumulative = int(cumulative)
+
+        if self.last_time is not None and timestamp < self.last_time:
+            return 0, 0.0
+        self.last_time = timestamp
+
+        session = session_open(int(timestamp))
+        if session != self.session:
+            followed = self.session is not None
+            self.session = session
+            self.volume = 0
+            self.turnover = 0.0
+            self.cumulative = 0 if followed else cumulative
+
+        quantity = cumulative - self.cumulative
+        self.cumulative = cumulative
+        if quantity <= 0:
+            return 0, 0.0
+
+        value = quantity * float(price)
+        self.volume += quantity
+        self.turnover += value
+        return quantity, value
+
+    @property
+    def vwap(self):
+        return self.turnover / self.volume if self.volume else None
+
+
+class VolumeTracker:
+    """``SessionVolume`` for every symbol, plus counters for the stats endpoints."""
+
+    def __init__(self):
+        self._symbols = {}
+        self.out_of_order = 0
+        self.resets = 0
+
+    def __contains__(self, symbol):
+        return symbol in self._symbols
+
+    def seed(self, symbol, timestamp, volume, turnover):
+        state = self._symbols.setdefault(symbol, SessionVolume())
+        state.seed(timestamp, volume, turnover)
+
+    def backfill(self, symbol, timestamp, volume, turnover):
+        state = self._symbols.get(symbol)
+        if state is not None:
+            state.backfill(timestamp, volume, turnover)
+
+    def update(self, symbol, timestamp, cumulative, price):
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = SessionVolume()
+
+        if state.last_time is not None and timestamp < state.last_time:
+            self.out_of_order += 1
+        elif (cumulative is not None and state.cumulative is not None
+              and int(cumulative) < state.cumulative
+              and session_open(int(timestamp)) == state.session):
+            self.resets += 1
+        return state.update(timestamp, cumulative, price)
+
+    def get(self, symbol):
+        """``{'vwap', 'dollarVolume'}`` for the symbol's session, or ``{}``."""
+        state = self._symbols.get(symbol)
+        if state is None or not state.volume:
+            return {}
+        return {'vwap': state.vwap, 'dollarVolume': state.turnover}
+
+    def remove(self, symbol):
+        self._symbols.pop(symbol, None)
+
+    def stats(self):
+        return {'symbols': len(self._symbols), 'out_of_order': self.out_of_order, 'resets': self.resets}
@@ -0,0 +1,83 @@
+"""
+On-disk snapshots of the live per-symbol stores.
+
+A snapshot is a directory with one ``.npy`` file per (symbol, store) and a
+``manifest.json`` listing symbols, file stems and cached indicator state.
+``.npy`` files can be opened memory-mapped, so a restart only pays for the
+symbols it actually touches. Snapshots are written to a temporary directory
+and swapped in when complete, so a crash mid-write leaves the previous
+snapshot intact.
+"""
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def file_stem(symbol):
+    """File-system safe name for a symbol such as ``NSE:SBIN-EQ``."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', symbol)
+
+
+class SnapshotWriter:
+    """Writes one snapshot symbol by symbol; nothing is visible until ``commit``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._tmp = f"{directory}.tmp"
+        self._symbols = {}
+
+    def begin(self):
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp, exist_ok=True)
+
+    def write_symbol(self, symbol, arrays):
+        """Save ``{store_name: structured array}`` for one symbol."""
+        stem = file_stem(symbol)
+        for name, rows in arrays.items():
+            np.save(os.path.join(self._tmp, f"{stem}.{name}.npy"), rows, allow_pickle=False)
+        self._symbols[symbol] = {'stem': stem, 'stores': sorted(arrays)}
+
+    def commit(self, indicators=None):
+        manifest = {
+            'saved_at': time.time(),
+            'symbols': self._symbols,
+            'indicators': indicators or {}
+        }
+        with open(os.path.join(self._tmp, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f)
+
+        old = f"{self.directory}.old"
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(self.directory):
+            os.replace(self.directory, old)
+        os.replace(self._tmp, self.directory)
+        shutil.rmtree(old, ignore_errors=True)
+        return manifest
+
+
+def read_manifest(directory):
+    """Return the manifest of the snapshot in ``directory``, or ``None``."""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def load_symbol(directory, manifest, symbol, mmap=True):
+    """Open the stored arrays of one symbol, memory-mapped by default."""
+    entry = manifest['symbols'].get(symbol)
+    if not entry:
+        return {}
+    mode = 'r' if mmap else None
+    return {
+        name: np.load(os.path.join(directory, f"{entry['stem']}.{name}.npy"), mmap_mode=mode)
+        for name in entry['stores']
+    }
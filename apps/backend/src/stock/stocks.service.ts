@@ -172,7 +172,7 @@ export class StockService {
       command += ' --validate_data=true';
 
       if (params.indicators && params.indicators.length > 0) {
-        command += ` --indicators="${params.indicators.join(',')}"`;
+        command += ` --indicators="${params.indicators.join(';')}"`;
       }
 
       this.logger.debug(`Executing optimized command: ${command}`);
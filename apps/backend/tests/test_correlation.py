@@ -0,0 +1,55 @@
+"""Streaming correlation and beta agree with numpy over the same window of returns."""
+import numpy as np
+import pytest
+
+from correlation import CorrelationBasket, RollingCovariance
+from tick_store import ohlc_buffer
+
+WINDOW = 20
+
+
+def returns(bars=60, size=3, seed=5):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(scale=0.002, size=bars)
+    return market[:, None] * np.array([1.0, 0.8, -0.5])[:size] + rng.normal(scale=0.001, size=(bars, size))
+
+
+def test_windowed_correlation_matches_corrcoef():
+    data = returns()
+    stats = RollingCovariance(3, window=WINDOW)
+    for i, x in enumerate(data):
+        stats.push(x)
+        window = data[max(0, i + 1 - WINDOW):i + 1]
+        if len(window) >= 2:
+            np.testing.assert_allclose(stats.correlation(), np.corrcoef(window, rowvar=False), atol=1e-9)
+
+    cov = np.cov(data[-WINDOW:], rowvar=False)
+    np.testing.assert_allclose(stats.beta(), cov / np.diag(cov)[None, :], atol=1e-9)
+
+
+def test_seeded_window_keeps_sliding():
+    data = returns()
+    stats = RollingCovariance(3, window=WINDOW)
+    stats.seed(data[:45])
+    for x in data[45:]:
+        stats.push(x)
+    np.testing.assert_allclose(stats.correlation(), np.corrcoef(data[-WINDOW:], rowvar=False), atol=1e-9)
+
+
+def test_basket_seeded_from_candles_uses_log_returns_of_closed_bars():
+    t0 = 1749527100
+    closes = 100 * np.exp(np.cumsum(returns(bars=30, size=2), axis=0))
+    candles = {}
+    for column, symbol in enumerate(('NSE:A-EQ', 'NSE:B-EQ')):
+        buffer = ohlc_buffer(100)
+        for i, close in enumerate(closes[:, column]):
+            buffer.append_dict({'timestamp': t0 + 60 * i, 'close': close})
+        candles[symbol] = buffer.view()
+
+    basket = CorrelationBasket(list(candles), window=WINDOW)
+    basket.seed(candles)
+
+    expected = np.corrcoef(np.diff(np.log(closes[:-1]), axis=0)[-WINDOW:], rowvar=False)
+    payload = basket.payload()
+    assert payload['bars'] == WINDOW and payload['timestamp'] == t0 + 60 * 28
+    assert np.asarray(payload['correlation']) == pytest.approx(expected, abs=1e-9)
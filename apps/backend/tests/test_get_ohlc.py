@@ -0,0 +1,35 @@
+"""get_ohlc argument validation."""
+import asyncio
+
+import pytest
+
+import fyers_new_5001 as server
+
+SYMBOL = 'NSE:OHLC-EQ'
+T0 = 1749457800   # 14:00 IST, 2025-06-09
+
+
+@pytest.fixture(autouse=True)
+def candles():
+    for minute in range(3):
+        server.store_historical_data(SYMBOL, {'symbol': SYMBOL, 'ltp': 100.0 + minute, 'timestamp': T0 + 60 * minute})
+    yield
+    for store in (server.historical_data, server.ohlc_data, server.chart_updates):
+        store.pop(SYMBOL, None)
+
+
+def get_ohlc(**data):
+    return asyncio.run(server.get_ohlc('sid-ohlc', dict(symbol=SYMBOL, **data)))
+
+
+@pytest.mark.parametrize('since', ['abc', '', [T0], {'t': T0}])
+def test_invalid_since_is_an_error(since):
+    response = get_ohlc(since=since)
+    assert response['success'] is False
+    assert 'since' in response['error']
+
+
+def test_numeric_since_filters_candles():
+    assert [row['close'] for row in get_ohlc(since=T0 + 60)['data']] == [101.0, 102.0]
+    assert len(get_ohlc(since=str(T0 + 120))['data']) == 1
+    assert len(get_ohlc()['data']) == 3
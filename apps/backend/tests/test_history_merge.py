@@ -0,0 +1,99 @@
+"""History fetched after live ticks started is merged in front of them."""
+import asyncio
+
+import numpy as np
+import pytest
+
+import fyers_new_5001 as server
+from candles import session_open
+
+SYMBOL = 'NSE:TEST-EQ'
+OPEN = session_open(1749470400)          # 09:15 IST, 2025-06-09
+LIVE_AT = OPEN + 105 * 60 + 30           # 11:00:30, the first live tick
+
+
+def morning_bars(minutes=105):
+    """1m bars from 09:15 to 10:59 (the fetch returns epoch seconds)."""
+    bars = np.zeros((minutes, 6))
+    bars[:, 0] = OPEN + 60 * np.arange(minutes)
+    bars[:, 1] = 100 + np.arange(minutes) * 0.1
+    bars[:, 2] = bars[:, 1] + 0.5
+    bars[:, 3] = bars[:, 1] - 0.5
+    bars[:, 4] = bars[:, 1] + 0.05
+    bars[:, 5] = 1000
+    return bars
+
+
+def live_tick(timestamp, ltp, cumulative):
+    server.process_tick_batch({SYMBOL: {
+        'symbol': SYMBOL, 'ltp': ltp, 'vol_traded_today': cumulative, 'last_traded_time': timestamp,
+    }})
+    server.dirty_symbols.discard(SYMBOL)
+    server.store_historical_data(SYMBOL, server.pending_data.pop(SYMBOL))
+
+
+@pytest.fixture(autouse=True)
+def fresh_symbol(monkeypatch):
+    monkeypatch.setattr(server, 'clock', lambda: LIVE_AT + 60)
+    yield
+    for store in (server.historical_data, server.ohlc_data, server.chart_updates, server.history_loaded):
+        store.pop(SYMBOL, None)
+    server.volume_tracker.remove(SYMBOL)
+    server.indicator_engine.remove(SYMBOL)
+    server.active_symbols.discard(SYMBOL)
+
+
+def test_history_goes_in_front_of_an_earlier_live_tick():
+    live_tick(LIVE_AT - 1, 110.0, 105000)     # baseline total
+    live_tick(LIVE_AT, 110.5, 105200)         # 200 shares traded live
+    bars = morning_bars()
+
+    server.apply_history({SYMBOL: bars})
+
+    ticks = server.historical_data[SYMBOL].view()
+    assert len(ticks) == len(bars) + 2
+    assert ticks['timestamp'][0] == OPEN
+    assert np.all(np.diff(ticks['timestamp']) >= 0)
+    assert ticks['ltp'][-1] == 110.5
+
+    rollup = server.ohlc_data[SYMBOL]
+    minutes = rollup['1m'].view()
+    assert minutes['timestamp'][0] == OPEN and minutes['timestamp'][-1] == OPEN + 105 * 60
+    assert len(minutes) == 106
+
+    day = rollup['1D'].last()
+    assert day['open'] == bars[0, 1]
+    assert day['close'] == 110.5
+    assert day['volume'] == bars[:, 5].sum() + 200
+
+    # The 11:00 five-minute candle holds only live trading; the 10:55 one is all history.
+    five = rollup['5m'].view()
+    assert five['timestamp'][0] == OPEN and len(five) == 22
+    assert five[-2]['volume'] == 5 * 1000 and five[-1]['volume'] == 200
+
+    vwap = server.volume_tracker.get(SYMBOL)
+    typical = (bars[:, 2] + bars[:, 3] + bars[:, 4]) / 3
+    expected = ((typical * bars[:, 5]).sum() + 200 * 110.5) / (bars[:, 5].sum() + 200)
+    assert vwap['vwap'] == pytest.approx(expected)
+
+    assert SYMBOL in server.indicator_engine
+
+
+def test_refetch_does_not_duplicate():
+    live_tick(LIVE_AT, 110.5, 105200)
+    server.apply_history({SYMBOL: morning_bars()})
+    server.apply_history({SYMBOL: morning_bars()})
+
+    assert len(server.historical_data[SYMBOL]) == 106
+    assert len(server.ohlc_data[SYMBOL]['1m']) == 106
+    assert server.ohlc_data[SYMBOL]['1D'].last()['volume'] == 105 * 1000
+
+
+def test_warm_start_fetches_for_a_symbol_that_already_ticked(monkeypatch):
+    monkeypatch.setattr(server, 'fetch_intraday_candles', lambda symbol, date=None, since=None: morning_bars())
+    live_tick(LIVE_AT, 110.5, 105200)
+
+    asyncio.run(server.warm_start([SYMBOL]))
+
+    assert server.historical_data[SYMBOL].view()['timestamp'][0] == OPEN
+    assert server.history_loaded[SYMBOL] == OPEN
@@ -0,0 +1,103 @@
+"""Only lagging clients are routed through their outbox; the others are sent to directly."""
+import asyncio
+from collections import defaultdict
+
+import pytest
+
+import fyers_new_5001 as server
+from client_outbox import ClientOutbox
+from quote_delta import DeltaEncoder
+from topk import TopKEngine
+
+FAST, SLOW = 'sid-fast', 'sid-slow'
+BOARD = 'changePercent:top'
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    emitted = []
+
+    async def emit(event, data=None, room=None, skip_sid=None, **kwargs):
+        emitted.append((event, data, room, skip_sid))
+
+    monkeypatch.setattr(server.sio, 'emit', emit)
+    monkeypatch.setattr(server, 'topk_engine', TopKEngine(3, ['changePercent']))
+    monkeypatch.setattr(server, 'topk_clients', defaultdict(set, {BOARD: {FAST, SLOW}}))
+    monkeypatch.setattr(server, 'lagging_clients', {SLOW})
+    for sid in (FAST, SLOW):
+        monkeypatch.setitem(server.clients, sid, {'outbox': ClientOutbox()})
+    return emitted
+
+
+def rank(values):
+    for symbol, change in values.items():
+        server.topk_engine.update(symbol, {'changePercent': change})
+    asyncio.run(server.emit_topk_deltas())
+
+
+def test_lagging_follower_gets_a_conflated_board_snapshot(sent):
+    rank({'A': 1.0, 'B': 2.0})
+    rank({'C': 3.0})
+
+    assert [room for event, _, room, _ in sent] == [FAST, FAST]
+    assert sent[1][1]['boards'][BOARD]['changed'][0]['symbol'] == 'C'
+
+    outbox = server.clients[SLOW]['outbox']
+    [(key, payload)] = outbox.take()
+    assert key == ('topkUpdate',) and payload['snapshot'] is True
+    assert [row['symbol'] for row in payload['boards'][BOARD]] == ['C', 'B', 'A']
+    assert outbox.conflated == 1
+
+
+def test_breadth_skips_lagging_clients(sent, monkeypatch):
+    class Breadth:
+        version = 1
+
+        def snapshot(self):
+            return {'advancers': 2, 'decliners': 1}
+
+    monkeypatch.setattr(server, 'breadth_tracker', Breadth())
+    monkeypatch.setattr(server, 'BREADTH_INTERVAL', 0.01)
+
+    async def one_pass():
+        task = asyncio.create_task(server.breadth_task())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(one_pass())
+
+    [(event, payload, room, skip)] = sent
+    assert event == 'breadth' and room is None and skip == [SLOW]
+    [(key, queued)] = server.clients[SLOW]['outbox'].take()
+    assert key == ('breadth',) and queued is payload
+    assert not server.clients[FAST]['outbox']
+
+
+def test_outbound_report_includes_delta_encoder_counts(monkeypatch):
+    encoder = DeltaEncoder(keyframe_interval=60)
+    encoder.encode('NSE:SBIN-EQ', {'ltp': 800.0, 'volume': 10}, now=0)
+    encoder.encode('NSE:SBIN-EQ', {'ltp': 800.5, 'volume': 10}, now=1)
+    monkeypatch.setattr(server, 'clients', {
+        FAST: {'outbox': ClientOutbox(), 'delta': None},
+        SLOW: {'outbox': ClientOutbox(), 'delta': encoder},
+    })
+
+    rows = {row['sid']: row for row in server.outbound_report()['clients']}
+
+    assert rows[FAST]['delta'] is None
+    assert rows[SLOW]['delta'] == {'seq': 2, 'keyframes': 1, 'deltas': 1}
+
+
+def test_only_lagging_delta_clients_are_conflated(sent, monkeypatch):
+    symbol = 'NSE:SBIN-EQ'
+    for sid in (FAST, SLOW):
+        server.clients[sid].update(subscriptions={symbol}, batch=False, codec='json',
+                                   delta=DeltaEncoder(keyframe_interval=60))
+    monkeypatch.setattr(server, 'symbol_to_clients', {symbol: {FAST, SLOW}})
+    monkeypatch.setitem(server.published_quotes, symbol, {'ltp': 800.0, 'volume': 10})
+
+    asyncio.run(server.send_modes([symbol]))
+
+    assert [(event, room) for event, _, room, _ in sent] == [('quoteDelta', FAST)]
+    assert not server.clients[FAST]['outbox']
+    assert server.clients[SLOW]['outbox'].take() == [(symbol, None)]
@@ -0,0 +1,71 @@
+"""The streaming window kernels agree with a naive recomputation over the window."""
+import numpy as np
+import pytest
+
+from rolling import RollingExtrema, RollingWindow
+
+PERIOD = 5
+
+
+def naive(values):
+    window = np.asarray(values[-PERIOD:])
+    return window.mean(), window.std()
+
+
+def test_window_mean_and_std_match_numpy_after_push_and_replace_last():
+    rng = np.random.default_rng(7)
+    series = [[], []]
+    window = RollingWindow(PERIOD, capacity=2)
+    rows = np.array([0, 1])
+
+    for step in range(40):
+        x = 100 + rng.normal(scale=5, size=2)
+        if step % 3 == 2:
+            window.replace_last(rows, x)          # the open candle's close moved
+            for values, value in zip(series, x):
+                values[-1] = value
+        else:
+            window.push(rows, x)
+            for values, value in zip(series, x):
+                values.append(value)
+
+        for row, values in enumerate(series):
+            mean, std = naive(values)
+            assert window.mean([row])[0] == pytest.approx(mean, rel=1e-12)
+            assert window.std([row])[0] == pytest.approx(std, rel=1e-9, abs=1e-9)
+
+
+def test_window_reset_and_fill_seed_the_running_moments():
+    window = RollingWindow(PERIOD, capacity=2)
+    window.reset(0, [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0])
+    window.fill([1], [[2.0, 4.0, 4.0, 4.0, 5.0]])
+    window.push([0, 1], [8.0, 7.0])
+
+    assert window.mean([0, 1]).tolist() == pytest.approx([6.0, 4.8])
+    assert window.std([0, 1]).tolist() == pytest.approx([np.std([4, 5, 6, 7, 8]), np.std([4, 4, 4, 5, 7])])
+
+
+def test_extrema_match_numpy_after_push_and_replace_last():
+    rng = np.random.default_rng(11)
+    values = []
+    extrema = RollingExtrema(PERIOD)
+
+    for step in range(60):
+        x = float(rng.integers(90, 110))
+        if step % 4 == 3:
+            extrema.replace_last(x)
+            values[-1] = x
+        else:
+            extrema.push(x)
+            values.append(x)
+
+        window = values[-PERIOD:]
+        assert (extrema.min, extrema.max) == (min(window), max(window))
+
+
+def test_extrema_replace_last_can_undo_a_new_high():
+    extrema = RollingExtrema(3, [5.0, 1.0, 4.0])
+    extrema.replace_last(9.0)
+    assert extrema.max == 9.0
+    extrema.replace_last(2.0)
+    assert (extrema.min, extrema.max) == (1.0, 5.0)
@@ -0,0 +1,60 @@
+"""The live stores stay time-ordered when the feed delivers a tick late."""
+import pytest
+
+import fyers_new_5001 as server
+from tick_store import tick_buffer
+
+SYMBOL = 'NSE:ORDER-EQ'
+T0 = 1749457800   # 14:00 IST, 2025-06-09
+
+
+@pytest.fixture(autouse=True)
+def fresh_symbol():
+    yield
+    for store in (server.historical_data, server.ohlc_data, server.chart_updates):
+        store.pop(SYMBOL, None)
+
+
+def store(timestamp, ltp):
+    return server.store_historical_data(SYMBOL, {'symbol': SYMBOL, 'ltp': ltp, 'timestamp': timestamp})
+
+
+def test_late_tick_is_not_stored():
+    store(T0, 100.0)
+    store(T0 + 120, 101.0)
+    assert store(T0 + 60, 99.0) == []     # arrives after T0 + 120
+    store(T0 + 180, 102.0)
+
+    ticks = server.historical_data[SYMBOL]
+    assert ticks.view()['timestamp'].tolist() == [T0, T0 + 120, T0 + 180]
+    assert server.chart_updates[SYMBOL].view()['price'].tolist() == [100.0, 101.0, 102.0]
+    assert server.ohlc_data[SYMBOL]['1m'].view()['close'].tolist() == [100.0, 101.0, 102.0]
+
+    # Range queries and eviction cut at the right rows.
+    assert ticks.between(T0 + 60, T0 + 150)['ltp'].tolist() == [101.0]
+    assert ticks.discard_before(T0 + 100) == 1
+    assert ticks.view()['timestamp'].tolist() == [T0 + 120, T0 + 180]
+
+
+def test_same_second_ticks_are_kept():
+    store(T0, 100.0)
+    store(T0, 100.5)
+    assert len(server.historical_data[SYMBOL]) == 2
+
+
+def test_missing_fields_are_no_data_not_zero():
+    buffer = tick_buffer(4)
+    buffer.append_dict({'timestamp': T0, 'ltp': 101.0, 'bid': 0.0, 'ask': None})
+
+    [record] = buffer.to_records()
+    assert record['ltp'] == 101.0
+    assert record['bid'] == 0.0                       # a real zero stays a zero
+    assert record['ask'] is None and record['open'] is None
+    assert record['volume'] == 0                      # integer column
+
+
+def test_tick_without_price_is_not_stored():
+    store(T0, 100.0)
+    assert store(T0 + 60, None) == []
+    assert server.historical_data[SYMBOL].view()['ltp'].tolist() == [100.0]
+    assert server.ohlc_data[SYMBOL]['1m'].view()['close'].tolist() == [100.0]
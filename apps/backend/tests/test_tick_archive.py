@@ -0,0 +1,50 @@
+"""Recorded days survive the archive round trip, and time seeks land on the right rows."""
+import json
+
+import pytest
+
+from tick_archive import TickArchive, convert, open_day_file, write_archive
+
+SYMBOL = 'NSE:GPIL-EQ'
+T0 = 1749527100   # 09:15 IST, 2025-06-10
+
+
+def recorded_day(rows=1000):
+    return [{
+        'symbol': SYMBOL,
+        'timestamp': T0 + i // 3,                  # several ticks per second
+        'ltp': round(210.05 + (i % 17) * 0.05, 2),
+        'volume': 1000 + i * 7,
+        'changePercent': round((i % 13 - 6) * 0.0125, 4),
+        'vwap': 210.0 + i / 3.0,                   # not fixed-point: stored as raw floats
+    } for i in range(rows)]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / 'GPIL-NSE.json'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in recorded_day()))
+    out_path, footer = convert(str(path))
+    return TickArchive(out_path), footer
+
+
+def test_round_trip_is_lossless(archive):
+    reader, footer = archive
+    assert len(reader) == footer['rows'] == 1000
+    assert {spec['name']: spec['kind'] for spec in footer['columns']} == {
+        'timestamp': 'int', 'ltp': 'fixed', 'volume': 'int', 'changePercent': 'fixed', 'vwap': 'float',
+    }
+    assert list(open_day_file(reader.path)) == recorded_day()
+
+
+def test_seek_by_time_spans_chunks(tmp_path):
+    path = str(tmp_path / 'GPIL-NSE.ticks')
+    write_archive(recorded_day(), path, chunk_rows=64)
+    reader = TickArchive(path)
+    start, end = T0 + 50, T0 + 120
+
+    expected = [r for r in recorded_day() if start <= r['timestamp'] <= end]
+    assert list(reader.iter_records(start, end)) == expected
+    assert reader.read(start, end)['volume'].tolist() == [r['volume'] for r in expected]
+    assert (reader.start_time, reader.end_time) == (T0, T0 + 333)
+    assert len(reader.read(T0 + 1000, None)['timestamp']) == 0
@@ -0,0 +1,96 @@
+"""TickJournal under eventlet.monkey_patch(), as fyers_service_5010 runs it."""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = textwrap.dedent('''
+    import eventlet
+    eventlet.monkey_patch()
+
+    import json
+    import sys
+    import time
+
+    from eventlet.patcher import original
+    from tick_journal import TickJournal
+
+    real_sleep = original('time').sleep
+
+    class SlowDiskJournal(TickJournal):
+        def _write_lines(self, lines):
+            real_sleep(0.5)          # a disk stall that blocks the calling OS thread
+            super()._write_lines(lines)
+
+    journal = SlowDiskJournal(root=sys.argv[1], flush_interval=0.05, flush_records=10)
+    journal.start()
+    for i in range(20):
+        journal.write('LD_01-01-2025', 'SBIN-NSE.json', {'ltp': i})
+
+    # Keep the hub busy while the writer is stuck on the disk.
+    ticks = 0
+    deadline = time.monotonic() + 0.8
+    while time.monotonic() < deadline:
+        eventlet.sleep(0.01)
+        ticks += 1
+    journal.stop()
+    print(json.dumps({'ticks': ticks, 'stats': journal.stats()}))
+''')
+
+
+def test_writer_does_not_block_the_eventlet_hub(tmp_path):
+    pytest.importorskip('eventlet')
+    result = subprocess.run(
+        [sys.executable, '-c', SCRIPT, str(tmp_path)],
+        cwd=BACKEND, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # A green writer would hold the hub for each 0.5 s write: at most a
+    # handful of 10 ms sleeps could complete in 0.8 s.
+    assert report['ticks'] > 30
+    assert report['stats']['written'] == 20
+    assert report['stats']['dropped'] == 0
+    lines = (tmp_path / 'LD_01-01-2025' / 'SBIN-NSE.json').read_text().splitlines()
+    assert [json.loads(line)['ltp'] for line in lines] == list(range(20))
+
+
+def test_stop_leaves_open_files_to_a_busy_writer(tmp_path):
+    from tick_journal import TickJournal
+
+    class SlowDiskJournal(TickJournal):
+        writing = False
+        closed_while_writing = False
+
+        def _write_lines(self, lines):
+            self.writing = True
+            time.sleep(0.3)
+            super()._write_lines(lines)
+            self.writing = False
+
+        def _close_all(self):
+            self.closed_while_writing |= self.writing
+            super()._close_all()
+
+    journal = SlowDiskJournal(root=str(tmp_path), flush_interval=0.01, flush_records=5)
+    journal.start()
+    for i in range(10):
+        journal.write('LD_01-01-2025', 'SBIN-NSE.json', {'ltp': i})
+    time.sleep(0.05)                      # the writer is inside its first write
+
+    journal.stop(timeout=0.1)
+    assert journal._thread.is_alive()
+
+    journal._thread.join(5)
+    assert not journal._thread.is_alive()
+    assert not journal.closed_while_writing
+    assert journal.stats()['written'] == 10 and not journal._handles
+    lines = (tmp_path / 'LD_01-01-2025' / 'SBIN-NSE.json').read_text().splitlines()
+    assert [json.loads(line)['ltp'] for line in lines] == list(range(10))
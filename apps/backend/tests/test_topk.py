@@ -0,0 +1,52 @@
+"""Top-K boards stay in exact order as symbols move, leave, and come back."""
+import numpy as np
+
+from topk import TopKEngine
+
+K = 3
+
+
+def check(engine, board_id, values, reverse):
+    """Same values as a full sort (ties may be held by either symbol), each one the symbol's own."""
+    rows = engine.board(board_id)
+    assert [row['value'] for row in rows] == sorted(values.values(), reverse=reverse)[:K]
+    assert all(values[row['symbol']] == row['value'] for row in rows)
+    assert [row['rank'] for row in rows] == list(range(1, len(rows) + 1))
+
+
+def test_boards_match_a_full_sort_after_updates_and_removals():
+    rng = np.random.default_rng(3)
+    engine = TopKEngine(K, ['changePercent'])
+    values = {}
+
+    for step in range(300):
+        symbol = f"S{rng.integers(12)}"
+        if step % 7 == 6:
+            engine.remove(symbol)
+            values.pop(symbol, None)
+        elif step % 11 == 10:
+            engine.update(symbol, {'changePercent': float('nan')})   # no value: off the board
+            values.pop(symbol, None)
+        else:
+            values[symbol] = float(rng.integers(-50, 50)) / 10
+            engine.update(symbol, {'changePercent': values[symbol]})
+
+        check(engine, 'changePercent:top', values, reverse=True)
+        check(engine, 'changePercent:bottom', values, reverse=False)
+
+
+def test_deltas_carry_only_rank_changes():
+    engine = TopKEngine(K, ['changePercent'])
+    for symbol, change in {'A': 1.0, 'B': 2.0, 'C': 3.0, 'D': -1.0}.items():
+        engine.update(symbol, {'changePercent': change})
+    engine.deltas()
+
+    engine.update('D', {'changePercent': 2.5})      # D takes rank 2, A drops out
+    delta = engine.deltas()['changePercent:top']
+    assert [(row['symbol'], row['rank']) for row in delta['changed']] == [('D', 2), ('B', 3)]
+    assert delta['removed'] == ['A']
+
+    engine.remove('C')
+    delta = engine.deltas()['changePercent:top']
+    assert [row['symbol'] for row in engine.board('changePercent:top')] == ['D', 'B', 'A']
+    assert delta['removed'] == ['C']
@@ -0,0 +1,98 @@
+"""msgpack round trips for the historicalData/ohlcData and marketBatch encodings."""
+import asyncio
+
+import numpy as np
+import pytest
+from socketio import packet
+
+import fyers_new_5001 as server
+import wire_codec
+from tick_store import TICK_DTYPE, tick_buffer
+
+msgpack = pytest.importorskip('msgpack')
+
+SYMBOL = 'NSE:SBIN-EQ'
+
+
+def history(points=50):
+    rows = np.zeros(points, dtype=TICK_DTYPE)
+    rows['timestamp'] = 1749443100 + np.arange(points)
+    rows['ltp'] = 800 + np.arange(points) * 0.05
+    rows['volume'] = np.arange(points) * 100
+    buffer = tick_buffer(points)
+    buffer.extend(rows)
+    return buffer
+
+
+def over_the_wire(event, payload):
+    """Encode a Socket.IO event as the server would and decode it as a client would."""
+    encoded = packet.Packet(packet.EVENT, data=[event, payload], namespace='/').encode()
+    parts = encoded if isinstance(encoded, list) else [encoded]
+    pkt = packet.Packet(encoded_packet=parts[0])
+    for attachment in parts[1:]:
+        pkt.add_attachment(attachment)
+    return pkt.data[1]
+
+
+def test_msgpack_is_available():
+    assert 'msgpack' in wire_codec.available()
+    assert wire_codec.negotiate({'QUERY_STRING': 'codec=msgpack'}) == ('msgpack', 'msgpack')
+
+
+def test_rows_event_round_trip(monkeypatch):
+    monkeypatch.setitem(server.clients, 'sid-1', {'codec': 'msgpack'})
+    buffer = history()
+
+    event = asyncio.run(server.rows_event('sid-1', SYMBOL, buffer, tag_records=True))
+    received = over_the_wire('historicalData', event)
+
+    assert received['encoding'] == 'msgpack' and received['symbol'] == SYMBOL
+    assert isinstance(received['data'], bytes)
+    assert msgpack.unpackb(received['data']) == buffer.to_records(symbol=SYMBOL)
+
+
+def test_pack_frame_round_trip():
+    payload = {
+        'symbols': [SYMBOL, 'NSE:TCS-EQ'],
+        'ltp': [np.float64(812.5), 3410.0],
+        'volume': [np.int64(120000), None],
+        'indicators': {'sma_20': [811.2, None]},
+    }
+
+    frame = wire_codec.pack_frame(payload, ('ltp', 'volume'), 'msgpack')
+    received = over_the_wire('marketBatch', frame)
+
+    assert received['encoding'] == 'msgpack'
+    assert msgpack.unpackb(received['data']) == {
+        'symbols': [SYMBOL, 'NSE:TCS-EQ'],
+        'ltp': [812.5, 3410.0],
+        'volume': [120000, None],
+        'indicators': {'sma_20': [811.2, None]},
+    }
+
+
+def test_rows_event_packs_off_the_event_loop():
+    buffer = history(50000)
+
+    async def run():
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not stop.is_set():
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        started = asyncio.get_running_loop().time()
+        event = await server.rows_event('sid-none', SYMBOL, buffer, tag_records=True)
+        elapsed = asyncio.get_running_loop().time() - started
+        stop.set()
+        await task
+        return event, ticks, elapsed
+
+    event, ticks, elapsed = asyncio.run(run())
+    assert len(event['data']) == 50000
+    # The loop kept turning while 50k records were built (one tick per ~5 ms GIL switch at worst).
+    assert ticks >= elapsed / 0.02
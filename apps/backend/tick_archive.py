@@ -0,0 +1,271 @@
+"""
+Compact columnar archive for recorded tick days.
+
+Recorded days are JSON lines (``LD_dd-mm-yyyy/<CODE>-NSE.json`` and
+``recorded_data/<date>/<CODE>-NSE.json``). This module converts them to a
+binary file that is usually 10x+ smaller and supports O(log n) time seeks:
+
+    MAGIC | chunk 0 | chunk 1 | ... | footer JSON | footer length (u8) | MAGIC
+
+Rows are sorted by ``timestamp`` and split into chunks of ``CHUNK_ROWS``.
+Each column is stored as int64 deltas (prices as fixed-point integers), and
+a chunk is the zlib-compressed concatenation of its column deltas. Repeated
+ticks therefore compress to almost nothing. The footer carries the symbol,
+column specs and a chunk index (first/last timestamp, rows, offset, size).
+
+Usage:
+    python tick_archive.py convert recorded_data/2025-06-10/*.json
+    python tick_archive.py info recorded_data/2025-06-10/GPIL-NSE.ticks
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+
+logger = logging.getLogger("TickArchive")
+
+MAGIC = b'APMTICK1'
+FOOTER_LEN = struct.Struct('<Q')
+CHUNK_ROWS = 4096
+TIME_COLUMN = 'timestamp'
+FIXED_POINT_SCALES = (100, 10000)
+ARCHIVE_SUFFIX = '.ticks'
+
+
+def read_jsonl(path):
+    """Read a recorded JSON-lines day file, skipping blank or truncated lines."""
+    records = []
+    with open(path, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed line {line_no} in {path}")
+    return records
+
+
+def _column_spec(name, values):
+    """Pick the narrowest lossless encoding for one column."""
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return {'name': name, 'kind': 'int', 'scale': 1}
+
+    floats = np.asarray(values, dtype='f8')
+    for scale in FIXED_POINT_SCALES:
+        scaled = np.round(floats * scale)
+        if np.all(np.abs(scaled / scale - floats) <= 1e-9 * np.maximum(1.0, np.abs(floats))):
+            return {'name': name, 'kind': 'fixed', 'scale': scale}
+    return {'name': name, 'kind': 'float', 'scale': 1}
+
+
+def _encode_column(spec, values):
+    if spec['kind'] == 'float':
+        # Raw IEEE bits; deltas would not help here.
+        return np.asarray(values, dtype='f8').view('i8')
+    if spec['kind'] == 'fixed':
+        ints = np.round(np.asarray(values, dtype='f8') * spec['scale']).astype('i8')
+    else:
+        ints = np.asarray(values, dtype='i8')
+    return np.diff(ints, prepend=0)
+
+
+def _decode_column(spec, raw):
+    if spec['kind'] == 'float':
+        return raw.view('f8')
+    ints = np.cumsum(raw)
+    if spec['kind'] == 'fixed':
+        return ints / spec['scale']
+    return ints
+
+
+def write_archive(records, out_path, symbol=None, chunk_rows=CHUNK_ROWS):
+    """Write tick dicts to ``out_path``; returns the footer that was written."""
+    if not records:
+        raise ValueError("No records to archive")
+
+    symbol = symbol or records[0].get('symbol', '')
+    names = []
+    for record in records:
+        for key, value in record.items():
+            if key not in names and isinstance(value, (int, float)) and not isinstance(value, bool):
+                names.append(key)
+    if TIME_COLUMN not in names:
+        raise ValueError(f"Records have no '{TIME_COLUMN}' field")
+
+    columns = {name: [r.get(name) or 0 for r in records] for name in names}
+    order = np.argsort(np.asarray(columns[TIME_COLUMN], dtype='i8'), kind='stable')
+    columns = {name: [values[i] for i in order] for name, values in columns.items()}
+    specs = [_column_spec(name, columns[name]) for name in names]
+
+    chunks = []
+    with open(out_path, 'wb') as f:
+        f.write(MAGIC)
+        total = len(records)
+        for start in range(0, total, chunk_rows):
+            stop = min(start + chunk_rows, total)
+            encoded = np.concatenate([
+                _encode_column(spec, columns[spec['name']][start:stop]) for spec in specs
+            ])
+            payload = zlib.compress(encoded.astype('<i8').tobytes(), 6)
+            timestamps = columns[TIME_COLUMN]
+            chunks.append([int(timestamps[start]), int(timestamps[stop - 1]),
+                           stop - start, f.tell(), len(payload)])
+            f.write(payload)
+
+        footer = {
+            'version': 1,
+            'symbol': symbol,
+            'rows': total,
+            'time_column': TIME_COLUMN,
+            'columns': specs,
+            'chunks': chunks,
+        }
+        footer_bytes = json.dumps(footer, separators=(',', ':')).encode()
+        f.write(footer_bytes)
+        f.write(FOOTER_LEN.pack(len(footer_bytes)))
+        f.write(MAGIC)
+    return footer
+
+
+def convert(jsonl_path, out_path=None):
+    """Convert one recorded JSONL day file; returns (out_path, footer)."""
+    out_path = out_path or os.path.splitext(jsonl_path)[0] + ARCHIVE_SUFFIX
+    footer = write_archive(read_jsonl(jsonl_path), out_path)
+    return out_path, footer
+
+
+class TickArchive:
+    """Random-access reader for archives written by ``write_archive``."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            f.seek(-(len(MAGIC) + FOOTER_LEN.size), os.SEEK_END)
+            (footer_len,) = FOOTER_LEN.unpack(f.read(FOOTER_LEN.size))
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a tick archive")
+            f.seek(-(len(MAGIC) + FOOTER_LEN.size + footer_len), os.SEEK_END)
+            footer = json.loads(f.read(footer_len))
+
+        self.symbol = footer['symbol']
+        self.columns = footer['columns']
+        self.column_names = [spec['name'] for spec in self.columns]
+        index = np.asarray(footer['chunks'], dtype='i8').reshape(-1, 5)
+        self._first_ts = index[:, 0]
+        self._last_ts = index[:, 1]
+        self._rows = index[:, 2]
+        self._offsets = index[:, 3]
+        self._sizes = index[:, 4]
+        self._cached = (None, None)
+
+    def __len__(self):
+        return int(self._rows.sum())
+
+    @property
+    def start_time(self):
+        return int(self._first_ts[0]) if len(self._first_ts) else None
+
+    @property
+    def end_time(self):
+        return int(self._last_ts[-1]) if len(self._last_ts) else None
+
+    def _chunk(self, i):
+        if self._cached[0] == i:
+            return self._cached[1]
+        with open(self.path, 'rb') as f:
+            f.seek(int(self._offsets[i]))
+            raw = np.frombuffer(zlib.decompress(f.read(int(self._sizes[i]))), dtype='<i8')
+        raw = raw.reshape(len(self.columns), int(self._rows[i]))
+        decoded = {spec['name']: _decode_column(spec, raw[j]) for j, spec in enumerate(self.columns)}
+        self._cached = (i, decoded)
+        return decoded
+
+    def _slices(self, start_ts, end_ts):
+        """Yield (chunk, lo, hi) row ranges covering the time window; O(log n) to locate."""
+        first = 0 if start_ts is None else int(np.searchsorted(self._last_ts, start_ts, side='left'))
+        last = len(self._first_ts) if end_ts is None else int(np.searchsorted(self._first_ts, end_ts, side='right'))
+        for i in range(first, last):
+            chunk = self._chunk(i)
+            ts = chunk[TIME_COLUMN]
+            lo = 0 if start_ts is None else int(np.searchsorted(ts, start_ts, side='left'))
+            hi = len(ts) if end_ts is None else int(np.searchsorted(ts, end_ts, side='right'))
+            yield chunk, lo, hi
+
+    def read(self, start_ts=None, end_ts=None):
+        """Columns (name -> ndarray) for rows with ``start_ts <= timestamp <= end_ts``."""
+        parts = []
+        for chunk, lo, hi in self._slices(start_ts, end_ts):
+            if hi > lo:
+                parts.append({name: values[lo:hi] for name, values in chunk.items()})
+
+        if not parts:
+            return {name: np.empty(0) for name in self.column_names}
+        return {name: np.concatenate([p[name] for p in parts]) for name in self.column_names}
+
+    def iter_records(self, start_ts=None, end_ts=None):
+        """Yield ticks as dicts shaped like the original JSON lines."""
+        int_columns = {spec['name'] for spec in self.columns if spec['kind'] == 'int'}
+
+        for chunk, lo, hi in self._slices(start_ts, end_ts):
+            columns = [
+                [int(v) for v in chunk[name][lo:hi]] if name in int_columns else chunk[name][lo:hi].tolist()
+                for name in self.column_names
+            ]
+            for values in zip(*columns):
+                record = {'symbol': self.symbol}
+                record.update(zip(self.column_names, values))
+                yield record
+
+
+def open_day_file(path):
+    """Iterate ticks from either an archive or a JSONL day file."""
+    if path.endswith(ARCHIVE_SUFFIX):
+        return TickArchive(path).iter_records()
+    return iter(read_jsonl(path))
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler(sys.stdout)])
+
+    parser = argparse.ArgumentParser(description='Convert and inspect recorded tick archives.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = sub.add_parser('convert', help='Convert JSONL day files to archives')
+    convert_parser.add_argument('files', nargs='+', help='JSONL files to convert')
+    convert_parser.add_argument('--out-dir', help='Write archives here instead of next to the input')
+
+    info_parser = sub.add_parser('info', help='Show archive metadata')
+    info_parser.add_argument('files', nargs='+', help='Archive files')
+
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        for path in args.files:
+            out_path = None
+            if args.out_dir:
+                os.makedirs(args.out_dir, exist_ok=True)
+                out_path = os.path.join(args.out_dir, os.path.splitext(os.path.basename(path))[0] + ARCHIVE_SUFFIX)
+            out_path, footer = convert(path, out_path)
+            before, after = os.path.getsize(path), os.path.getsize(out_path)
+            logger.info(f"{path} -> {out_path}: {footer['rows']} ticks, "
+                        f"{before / 1024:.0f} KB -> {after / 1024:.0f} KB ({before / max(after, 1):.1f}x)")
+    else:
+        for path in args.files:
+            archive = TickArchive(path)
+            print(f"{path}: {archive.symbol}, {len(archive)} ticks, "
+                  f"{archive.start_time}..{archive.end_time}, {len(archive._rows)} chunks")
+            for spec in archive.columns:
+                print(f"  {spec['name']:<20}{spec['kind']:<8}scale={spec['scale']}")
+
+
+if __name__ == '__main__':
+    main()
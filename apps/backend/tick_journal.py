@@ -0,0 +1,147 @@
+"""
+Group-commit writer for the recorded-day tick files (``LD_dd-mm-yyyy/<CODE>-<EXCHANGE>.json``).
+
+The tick callback only enqueues ``(day_folder, file_name, record)``; a
+background writer keeps one append handle per file open for the day,
+serialises records, and flushes every ``flush_interval`` seconds or every
+``flush_records`` records, whichever comes first. Handles are closed when the
+day folder changes. The queue is bounded and ``write`` never blocks: when
+the disk falls behind, new ticks are dropped and counted.
+
+The writer is always a real OS thread. Under ``eventlet.monkey_patch()``
+the stdlib ``threading``/``queue`` are green, and a green writer would do
+its blocking disk writes on the hub that ingests ticks, so the unpatched
+modules are used instead.
+"""
+import json
+import logging
+import os
+import time
+
+try:
+    from eventlet.patcher import original
+except ImportError:
+    import queue
+    import threading
+else:
+    queue = original('queue')
+    threading = original('threading')
+
+
+logger = logging.getLogger("TickJournal")
+
+
+class TickJournal:
+    def __init__(self, root='.', flush_interval=0.2, flush_records=500, max_queue=50000):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._handles = {}
+        self._day = None
+        self._running = False
+        self._thread = None
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def start(self):
+        self._running = True
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="TickJournal", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """
+        Drain what is queued, then close all handles. If the writer is still
+        busy after ``timeout`` (e.g. a slow disk), the handles are left to
+        it: it closes them once it has drained the queue.
+        """
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(f"⚠️ Journal writer still busy after {timeout}s, "
+                               f"{self._queue.qsize()} records pending; it will close the files when done")
+                return
+        self._close_all()
+
+    def write(self, day_folder, file_name, record):
+        """Enqueue one record; safe from any thread, never blocks."""
+        try:
+            self._queue.put_nowait((day_folder, file_name, record))
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self):
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'queued': self._queue.qsize(),
+            'open_files': len(self._handles),
+        }
+
+    def _collect_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_records:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while self._running or not self._queue.empty():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            try:
+                self._commit(batch)
+            except Exception as e:
+                logger.error(f"❌ Journal write failed for {len(batch)} records: {e}")
+        self._close_all()
+
+    def _commit(self, batch):
+        lines = {}
+        for day_folder, file_name, record in batch:
+            if day_folder != self._day:
+                # Date boundary: flush what we have and rotate to the new folder.
+                self._write_lines(lines)
+                lines = {}
+                self._close_all()
+                self._day = day_folder
+            lines.setdefault(file_name, []).append(json.dumps(record))
+        self._write_lines(lines)
+        self.batches += 1
+
+    def _write_lines(self, lines):
+        for file_name, records in lines.items():
+            handle = self._handles.get(file_name)
+            if handle is None:
+                folder = os.path.join(self.root, self._day)
+                os.makedirs(folder, exist_ok=True)
+                handle = open(os.path.join(folder, file_name), 'a')
+                self._handles[file_name] = handle
+            handle.write('\n'.join(records))
+            handle.write('\n')
+            handle.flush()
+            self.written += len(records)
+
+    def _close_all(self):
+        for handle in self._handles.values():
+            try:
+                handle.close()
+            except Exception:
+                pass
+        self._handles = {}
@@ -0,0 +1,211 @@
+"""
+Columnar per-symbol storage for live market data.
+
+Each symbol gets a fixed-capacity ring buffer backed by a NumPy structured
+array instead of a deque of dicts. Appends are O(1) (amortised over an
+occasional compaction), and the live rows are always one contiguous block,
+so ranges come back as zero-copy views. Dicts are only built at the edge,
+when a payload is handed to Socket.IO.
+"""
+import numpy as np
+
+
+TICK_DTYPE = np.dtype([
+    ('timestamp', 'i8'),
+    ('ltp', 'f8'),
+    ('volume', 'i8'),
+    ('bid', 'f8'),
+    ('ask', 'f8'),
+    ('change', 'f8'),
+    ('changePercent', 'f8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+])
+
+OHLC_DTYPE = np.dtype([
+    ('timestamp', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'i8'),
+    ('turnover', 'f8'),
+    ('vwap', 'f8'),
+])
+
+CHART_DTYPE = np.dtype([
+    ('timestamp', 'i8'),
+    ('price', 'f8'),
+    ('volume', 'i8'),
+    ('change', 'f8'),
+    ('changePercent', 'f8'),
+])
+
+INITIAL_ROWS = 1024
+
+
+class RingBuffer:
+    """
+    Fixed-capacity, time-ordered ring buffer over a structured array.
+
+    The backing array holds ``capacity + slack`` rows. Writes go to the end;
+    when the end is reached the live rows are moved back to the front in one
+    copy, which happens at most once every ``slack`` appends. Storage starts
+    small and doubles up to that size, so idle symbols stay cheap.
+
+    Views returned by ``view``/``since``/``between`` share memory with the
+    buffer and are only valid until the next append.
+    """
+
+    def __init__(self, dtype, capacity, slack=None):
+        self.dtype = np.dtype(dtype)
+        self.capacity = int(capacity)
+        if slack is None:
+            slack = max(1, self.capacity // 4)
+        self._max_rows = self.capacity + int(slack)
+        # Stored for a missing field: NaN ("no data") in float columns, 0 in integer ones.
+        self._missing = tuple(np.nan if self.dtype[name].kind == 'f' else 0 for name in self.dtype.names)
+        self._buf = np.zeros(min(INITIAL_ROWS, self._max_rows), dtype=self.dtype)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __bool__(self):
+        return self._end > self._start
+
+    @property
+    def nbytes(self):
+        return self._buf.nbytes
+
+    def _make_room(self):
+        count = self._end - self._start
+        size = len(self._buf)
+        if size < self._max_rows and count * 2 > size:
+            grown = np.zeros(min(self._max_rows, size * 2), dtype=self.dtype)
+            grown[:count] = self._buf[self._start:self._end]
+            self._buf = grown
+        else:
+            self._buf[:count] = self._buf[self._start:self._end]
+        self._start, self._end = 0, count
+
+    def append(self, row):
+        """Append one row given as a tuple in dtype field order."""
+        if self._end == len(self._buf):
+            self._make_room()
+        self._buf[self._end] = row
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def extend(self, rows):
+        """Bulk-append a structured array (e.g. a restored snapshot) in one copy."""
+        rows = np.asarray(rows, dtype=self.dtype)[-self.capacity:]
+        count = len(rows)
+        if not count:
+            return
+        if self._end + count > len(self._buf):
+            keep = min(self._end - self._start, self.capacity - count)
+            needed = keep + count
+            if needed > len(self._buf):
+                size = min(self._max_rows, max(len(self._buf) * 2, needed))
+                grown = np.zeros(size, dtype=self.dtype)
+                grown[:keep] = self._buf[self._end - keep:self._end]
+                self._buf = grown
+            else:
+                self._buf[:keep] = self._buf[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        self._buf[self._end:self._end + count] = rows
+        self._end += count
+        self._start = max(self._start, self._end - self.capacity)
+
+    def merge(self, rows):
+        """
+        Insert time-ordered ``rows`` that may be older than the live rows
+        (e.g. history fetched after live ticks started), keeping the buffer
+        sorted. A row with the same timestamp as a live row goes after it.
+        """
+        rows = np.asarray(rows, dtype=self.dtype)
+        if not len(rows):
+            return
+        if self._end == self._start or rows['timestamp'][0] >= self._buf[self._end - 1]['timestamp']:
+            self.extend(rows)
+            return
+        merged = np.concatenate([self.view(), rows])
+        merged = merged[np.argsort(merged['timestamp'], kind='stable')]
+        self._start = self._end = 0
+        self.extend(merged)
+
+    def append_dict(self, data):
+        """
+        Append a row from a dict. Missing or ``None`` fields are stored as NaN
+        in float columns (``to_records`` renders them as ``None``) and as 0
+        in integer columns.
+        """
+        self.append(tuple(missing if data.get(name) is None else data[name]
+                          for name, missing in zip(self.dtype.names, self._missing)))
+
+    def last(self):
+        """Most recent row as a writable record, or ``None`` when empty."""
+        if self._end == self._start:
+            return None
+        return self._buf[self._end - 1]
+
+    def view(self, start=None, stop=None):
+        """Zero-copy view of the live rows, optionally sliced by position."""
+        return self._buf[self._start:self._end][start:stop]
+
+    def since(self, timestamp):
+        """Zero-copy view of rows with ``timestamp >= timestamp``."""
+        rows = self.view()
+        return rows[np.searchsorted(rows['timestamp'], timestamp, side='left'):]
+
+    def between(self, start_ts, end_ts):
+        """Zero-copy view of rows with ``start_ts <= timestamp <= end_ts``."""
+        rows = self.view()
+        ts = rows['timestamp']
+        lo = np.searchsorted(ts, start_ts, side='left')
+        hi = np.searchsorted(ts, end_ts, side='right')
+        return rows[lo:hi]
+
+    def discard_before(self, timestamp):
+        """Drop rows older than ``timestamp``; returns how many were dropped."""
+        if self._end == self._start or self._buf[self._start]['timestamp'] >= timestamp:
+            return 0
+        rows = self.view()
+        dropped = int(np.searchsorted(rows['timestamp'], timestamp, side='left'))
+        self._start += dropped
+        if self._start == self._end:
+            self._start = self._end = 0
+        return dropped
+
+    def to_records(self, rows=None, **extra):
+        """Convert rows (default: all) to JSON-ready dicts, adding ``extra`` keys; NaN becomes ``None``."""
+        if rows is None:
+            rows = self.view()
+        keys = self.dtype.names + tuple(extra)
+        columns = [_column_values(rows[name]) for name in self.dtype.names]
+        columns.extend([value] * len(rows) for value in extra.values())
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def _column_values(column):
+    values = column.tolist()
+    if column.dtype.kind == 'f' and np.isnan(column).any():
+        values = [None if value != value else value for value in values]
+    return values
+
+
+def tick_buffer(capacity):
+    return RingBuffer(TICK_DTYPE, capacity)
+
+
+def ohlc_buffer(capacity):
+    return RingBuffer(OHLC_DTYPE, capacity)
+
+
+def chart_buffer(capacity):
+    return RingBuffer(CHART_DTYPE, capacity)
@@ -0,0 +1,200 @@
+"""
+Live top-K / bottom-K rankings across all active symbols.
+
+Each ranking ("board") keeps its K members in an indexed min-heap, whose
+root is the weakest member, and every other symbol in an indexed max-heap,
+whose root is the strongest challenger. A symbol's new value is an
+O(log n) update in whichever heap holds it, after which at most one
+member/challenger swap restores the split. Bottom-K boards are the same
+structure over negated values.
+
+Publishing compares each changed board's ordered members with what was
+last published and returns only the rank changes, so subscribers never
+receive the whole universe.
+"""
+import math
+
+
+class IndexedHeap:
+    """Binary min-heap of ``(priority, item)`` with O(log n) update/remove by item."""
+
+    def __init__(self):
+        self._heap = []
+        self._pos = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, item):
+        return item in self._pos
+
+    def __iter__(self):
+        return iter(self._heap)
+
+    def peek(self):
+        return self._heap[0]
+
+    def push(self, item, priority):
+        self._heap.append((priority, item))
+        self._pos[item] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def pop(self):
+        priority, item = self._heap[0]
+        self.remove(item)
+        return priority, item
+
+    def remove(self, item):
+        i = self._pos.pop(item)
+        last = self._heap.pop()
+        if i < len(self._heap):
+            self._heap[i] = last
+            self._pos[last[1]] = i
+            self._sift_up(i)
+            self._sift_down(self._pos[last[1]])
+
+    def update(self, item, priority):
+        i = self._pos[item]
+        old = self._heap[i]
+        self._heap[i] = (priority, item)
+        if (priority, item) < old:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def _swap(self, i, j):
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._pos[heap[i][1]] = i
+        self._pos[heap[j][1]] = j
+
+    def _sift_up(self, i):
+        heap = self._heap
+        while i:
+            parent = (i - 1) // 2
+            if heap[i] >= heap[parent]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i):
+        heap = self._heap
+        n = len(heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and heap[child] < heap[smallest]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+
+class RankBoard:
+    """The ``k`` items with the largest values, maintained under arbitrary updates."""
+
+    def __init__(self, k):
+        self.k = k
+        self._members = IndexedHeap()       # priority value: root is the weakest member
+        self._rest = IndexedHeap()          # priority -value: root is the best challenger
+
+    def __contains__(self, item):
+        return item in self._members
+
+    def set(self, item, value):
+        if item in self._members:
+            self._members.update(item, value)
+        elif item in self._rest:
+            self._rest.update(item, -value)
+        else:
+            self._rest.push(item, -value)
+        self._rebalance()
+
+    def remove(self, item):
+        if item in self._members:
+            self._members.remove(item)
+        elif item in self._rest:
+            self._rest.remove(item)
+        self._rebalance()
+
+    def _rebalance(self):
+        while len(self._members) < self.k and self._rest:
+            priority, item = self._rest.pop()
+            self._members.push(item, -priority)
+        while self._rest and self._members and -self._rest.peek()[0] > self._members.peek()[0]:
+            priority, item = self._rest.pop()
+            weakest, dropped = self._members.pop()
+            self._members.push(item, -priority)
+            self._rest.push(dropped, -weakest)
+
+    def ranked(self):
+        """Members as ``[(item, value)]``, best first."""
+        return [(item, value) for value, item in sorted(self._members, key=lambda m: (-m[0], m[1]))]
+
+
+class TopKEngine:
+    """
+    Top-K and bottom-K boards per metric, fed one ``{metric: value}`` dict
+    per symbol update. Board ids are ``"<metric>:top"`` / ``"<metric>:bottom"``.
+    """
+
+    def __init__(self, k, metrics):
+        self.k = k
+        self.metrics = tuple(metrics)
+        self._boards = {}
+        for metric in self.metrics:
+            self._boards[f"{metric}:top"] = (metric, 1, RankBoard(k))
+            self._boards[f"{metric}:bottom"] = (metric, -1, RankBoard(k))
+        self._published = {board_id: {} for board_id in self._boards}
+        self._dirty = set()
+        self.updates = 0
+
+    def board_ids(self):
+        return list(self._boards)
+
+    def update(self, symbol, values):
+        """Re-rank ``symbol`` on every metric; missing or NaN values take it off that metric's boards."""
+        self.updates += 1
+        for board_id, (metric, sign, board) in self._boards.items():
+            value = values.get(metric)
+            was_member = symbol in board
+            if value is None or math.isnan(value):
+                board.remove(symbol)
+            else:
+                board.set(symbol, sign * value)
+            if was_member or symbol in board:
+                self._dirty.add(board_id)
+
+    def remove(self, symbol):
+        for board_id, (_, _, board) in self._boards.items():
+            if symbol in board:
+                self._dirty.add(board_id)
+            board.remove(symbol)
+
+    def board(self, board_id):
+        """Full ordered board: ``[{'symbol', 'rank', 'value'}]``, rank 1 first."""
+        _, sign, board = self._boards[board_id]
+        return [{'symbol': symbol, 'rank': rank, 'value': sign * value}
+                for rank, (symbol, value) in enumerate(board.ranked(), 1)]
+
+    def deltas(self):
+        """
+        Rank changes since the previous call, per changed board:
+        ``{board_id: {'changed': [{'symbol', 'rank', 'value'}], 'removed': [symbol]}}``.
+        """
+        deltas = {}
+        for board_id in self._dirty:
+            rows = self.board(board_id)
+            previous = self._published[board_id]
+            changed = [row for row in rows if previous.get(row['symbol']) != row['rank']]
+            current = {row['symbol']: row['rank'] for row in rows}
+            removed = [symbol for symbol in previous if symbol not in current]
+            self._published[board_id] = current
+            if changed or removed:
+                deltas[board_id] = {'changed': changed, 'removed': removed}
+        self._dirty.clear()
+        return deltas
+
+    def stats(self):
+        return {'k': self.k, 'boards': len(self._boards), 'updates': self.updates}